@@ -1,4 +1,4 @@
 """ Sample
 """
-__all__ = ['api', 'data', 'app', 'settings']
+__all__ = ['api', 'data', 'app', 'settings', 'logs', 'bench']
 __version__ = '0.0.1'
@@ -1,8 +1,14 @@
 """ Run Api with gunicorn config
 """
+import importlib.util
+import os
 import sys
-import gunicorn
-from .app import main
+from typing import Any, Callable, Dict, List, Tuple
+import gunicorn.app.base
+from . import settings
+from .app import dispose_engines, main
+from .data import db
+from .data.access import archive_inactive
 
 
 class StandaloneApplication(gunicorn.app.base.BaseApplication):
@@ -15,12 +21,17 @@ class StandaloneApplication(gunicorn.app.base.BaseApplication):
         super().__init__()
 
     def load_config(self):
-        """ load config
+        """ load config, gunicorn validates each value as it is set
+
+            :raises ValueError: on an option gunicorn does not know
         """
-        config = {key: value for key, value in self.options.items()
-                  if key in self.cfg.settings and value is not None}
-        for key, value in config.items():
-            self.cfg.set(key.lower(), value)
+        unknown = [key for key in self.options
+                   if key.lower() not in self.cfg.settings]
+        if unknown:
+            raise ValueError(f'Unknown gunicorn options {", ".join(unknown)}')
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key.lower(), value)
 
     def load(self):
         """ load
@@ -32,12 +43,32 @@ class StandaloneApplication(gunicorn.app.base.BaseApplication):
         """
 
 
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """ gunicorn hook, the worker gets its own database connections instead
+        of the ones the master opened while initializing
+    """
+    dispose_engines(worker.app.load())
+
+
 # Exit codes that will be returned with its error message
 EXIT_CODES = {
     -5: "Incorrect bind format, example: --bind=127.0.0.1:5000",
-    -6: "Incorrect workers format, example: --workers=4"
+    -6: "Incorrect workers format, example: --workers=4 or --workers=auto",
+    -7: "Incorrect threads format, example: --threads=4",
+    -8: "Incorrect worker class, one of: --worker-class=sync|gthread|gevent",
+    -9: "gevent worker class requested but gevent is not installed",
+    -10: "Incorrect keepalive format, example: --keepalive=2",
+    -11: "Incorrect backlog format, example: --backlog=2048",
+    -12: "Incorrect max requests format, example: --max-requests=1000",
+    -13: "Incorrect max requests jitter format, example: "
+         "--max-requests-jitter=50",
+    -14: "Incorrect timeout format, example: --timeout=30",
+    -15: "Incorrect preload format, example: --preload-app=false",
+    -16: "Unknown option, see --help"
 }
 
+WORKER_CLASSES: Tuple[str, ...] = ('sync', 'gthread', 'gevent')
+
 
 def make_table() -> str:
     """
@@ -51,43 +82,198 @@ def make_table() -> str:
     print(f'┗━━━━━━━━┻━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━')
 
 
+def cpu_count() -> int:
+    """ CPUs this process may run on, honours taskset and container cpusets
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def auto_workers(worker_class: str) -> int:
+    """ Worker count for --workers=auto
+
+        Sync workers block on every request so the usual 2 * CPUs + 1 is
+        used, threaded and gevent workers already overlap I/O inside each
+        worker so one per CPU is enough.
+    """
+    if worker_class == 'sync':
+        return 2 * cpu_count() + 1
+    return cpu_count()
+
+
+def bind_address(value: str) -> str:
+    """ host:port or unix:path
+    """
+    if value.startswith('unix:') and len(value) > len('unix:'):
+        return value
+    host, _, port = value.rpartition(':')
+    if not host or not port.isdigit() or ' ' in host:
+        raise ValueError(value)
+    return value
+
+
+def minimum(least: int) -> Callable[[str], int]:
+    """ Converter to an int of at least least
+    """
+    def convert(value: str) -> int:
+        number = int(value)
+        if number < least:
+            raise ValueError(value)
+        return number
+    return convert
+
+
+def worker_count(value: str) -> Any:
+    """ A positive int, or auto which is resolved once the worker class is
+        known
+    """
+    if str(value).lower() == 'auto':
+        return 'auto'
+    return minimum(1)(value)
+
+
+def worker_class(value: str) -> str:
+    """ One of WORKER_CLASSES
+    """
+    if value not in WORKER_CLASSES:
+        raise ValueError(value)
+    return value
+
+
+def boolean(value: str) -> bool:
+    """ Strict true/false, unlike settings.to_bool a typo is an error
+    """
+    text = str(value).lower()
+    if text not in ('true', 'false', '1', '0', 'yes', 'no'):
+        raise ValueError(value)
+    return text in ('true', '1', 'yes')
+
+
+# gunicorn setting: (exit code, converter, default from settings)
+LAUNCHER_OPTIONS: Dict[str, Tuple[int, Callable[[str], Any], Any]] = {
+    'bind': (-5, bind_address,
+             f'{settings.APPLICATION_BIND}:{settings.APPLICATION_PORT}'),
+    'workers': (-6, worker_count, settings.GUNICORN_WORKERS),
+    'threads': (-7, minimum(1), settings.GUNICORN_THREADS),
+    'worker_class': (-8, worker_class, settings.GUNICORN_WORKER_CLASS),
+    'keepalive': (-10, minimum(0), settings.GUNICORN_KEEPALIVE),
+    'backlog': (-11, minimum(1), settings.GUNICORN_BACKLOG),
+    'max_requests': (-12, minimum(0), settings.GUNICORN_MAX_REQUESTS),
+    'max_requests_jitter': (-13, minimum(0),
+                            settings.GUNICORN_MAX_REQUESTS_JITTER),
+    'timeout': (-14, minimum(0), settings.GUNICORN_TIMEOUT),
+    'preload_app': (-15, boolean, settings.GUNICORN_PRELOAD_APP),
+}
+
+
+def fail(code: int) -> None:
+    """ Prints the message of an exit code and exits with it
+    """
+    print(EXIT_CODES[code], file=sys.stderr)
+    sys.exit(code)
+
+
+def print_usage() -> None:
+    """ Options and the environment variables they default from
+    """
+    print('python -m sample [--option=value ...] [--codes] [--no-start] '
+          '[--archive]')
+    for name, (_, _, default) in LAUNCHER_OPTIONS.items():
+        print(f'    --{name.replace("_", "-")}=  (default {default})')
+
+
+def gunicorn_options(arguments: List[str]) -> dict:
+    """ Validated gunicorn options from --option=value arguments, options
+        that are not given come from settings (GUNICORN_* environment
+        variables)
+
+        :param arguments: console arguments without the program name
+        :raises SystemExit: with one of EXIT_CODES on a bad value
+    """
+    given: Dict[str, str] = {}
+    for arg in arguments:
+        if arg in ('--codes', '--help', '--no-start', '--archive'):
+            continue
+        name, separator, value = arg.partition('=')
+        name = name[2:].replace('-', '_') if name.startswith('--') else ''
+        if name not in LAUNCHER_OPTIONS:
+            fail(-16)
+        if not separator or not value:
+            fail(LAUNCHER_OPTIONS[name][0])
+        given[name] = value
+
+    options: dict = {}
+    for name, (code, convert, default) in LAUNCHER_OPTIONS.items():
+        try:
+            options[name] = convert(given.get(name, default))
+        except (TypeError, ValueError):
+            fail(code)
+
+    if options['worker_class'] == 'gevent' \
+            and importlib.util.find_spec('gevent') is None:
+        fail(-9)
+    if options['workers'] == 'auto':
+        options['workers'] = auto_workers(options['worker_class'])
+    if options['workers'] > 1 and settings.TOKEN_REGISTRY == 'memory':
+        print('TOKEN_REGISTRY=memory: a token is only accepted by the worker '
+              'that issued it, use TOKEN_REGISTRY=sqlite with several '
+              'workers', file=sys.stderr)
+    if options['workers'] > 1 and settings.SQLALCHEMY_REPLICA_URIS \
+            and settings.DATABASE_WRITE_MARKS == 'memory':
+        print('DATABASE_WRITE_MARKS=memory: a token only reads its own '
+              'writes on the worker that served them, use '
+              'DATABASE_WRITE_MARKS=sqlite with replicas and several '
+              'workers', file=sys.stderr)
+    options['post_fork'] = post_fork
+    return options
+
+
 def handel_user_arguments() -> dict:
     """
         Parsed console arguments and passes them into application
     """
-    bind = '127.0.0. 1:5000'
-    workers = 4
-    for arg in sys.argv:
-        if arg.startswith('--bind='):
-            parts = arg.split('=')
-            if len(parts) < 2:
-                print(EXIT_CODES[-5], file=sys.stderr)
-                sys.exit(-5)
-            bind = parts[1]
-
-        if arg.startswith('--workers='):
-            if len(parts) < 2:
-                print(EXIT_CODES[-5], file=sys.stderr)
-                sys.exit(-5)
-        if arg.startswith('--codes') or arg.startswith('--help'):
-
-            make_table()
-        if arg.startswith('--no-start') or arg.startswith('--help'):
-            sys.exit(0)
-    return {
-        'bind': bind,
-        'workers': workers,
-    }
+    arguments = sys.argv[1:]
+    if '--help' in arguments:
+        print_usage()
+    if '--codes' in arguments or '--help' in arguments:
+        make_table()
+    options = gunicorn_options(arguments)
+    if '--no-start' in arguments or '--help' in arguments:
+        sys.exit(0)
+    return options
+
+
+def archive() -> None:
+    """ Moves rows inactive for ARCHIVE_RETENTION_DAYS into their archive
+        tables and exits, meant for cron or a scheduled job next to the
+        running application
+    """
+    # Works on the existing database, only tables it lacks are created
+    flask_application = main(UNIT_TEST=False, SQLALCHEMY_REBUILD=False)
+    config = flask_application.config
+    with flask_application.app_context():
+        db.create_all()
+        archived = archive_inactive(
+            config['ARCHIVE_RETENTION_DAYS'], config['ARCHIVE_BATCH_SIZE'])
+    for table, count in archived.items():
+        print(f'{table}: {count} rows archived')
+    dispose_engines(flask_application)
+    sys.exit(0)
 
 
 def run_application():
     """
-        Runs the StandaloneApplication of gunicorn
+        Runs the StandaloneApplication of gunicorn, or the archival job with
+        --archive
     """
-    StandaloneApplication(
-        main(UNIT_TEST=False),
-        options=handel_user_arguments()
-    ).run()
+    options = handel_user_arguments()
+    if '--archive' in sys.argv[1:]:
+        archive()
+    flask_application = main(UNIT_TEST=False)
+    # Nothing in the master should hold a connection a worker could inherit
+    dispose_engines(flask_application)
+    StandaloneApplication(flask_application, options=options).run()
 
 
 if __name__ == '__main__':
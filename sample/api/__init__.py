@@ -1,3 +1,4 @@
 """ Application Program Interface (API)
 """
-__all__ = ['swagger', 'endpoints', 'restplus', 'authentication']
+__all__ = ['swagger', 'endpoints', 'restplus', 'authentication',
+           'metrics', 'pagination', 'profiling', 'streaming']
@@ -2,20 +2,39 @@
     Authentication
 """
 import functools
+import os
 import random
 import string
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
-import jwt
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from flask import request
+from flask import g, request
 from werkzeug.exceptions import Unauthorized
 
+from .. import settings
 from ..settings import get_logger
+from .signers import Signer, make_signer
+from .token_cache import VerifiedTokenCache
+from .token_registry import SqliteTokenRegistry, TokenRegistry
 
 logger = get_logger(__name__)
+
+
+def data_file(name: str) -> str:
+    """ Absolute path of a file setting, relative names live in
+        APP_DATA_FOLDER
+    """
+    return os.path.join(os.path.abspath(settings.APP_DATA_FOLDER), name)
+
+
+def make_registry():
+    """ Token registry chosen by settings.TOKEN_REGISTRY
+    """
+    if settings.TOKEN_REGISTRY == 'sqlite':
+        return SqliteTokenRegistry(data_file(settings.TOKEN_REGISTRY_FILE))
+    return TokenRegistry()
+
+
 class TokenFactory:
     """
         Generates jwt tokens please don't use this in production
@@ -27,42 +46,44 @@ class TokenFactory:
         Then you will get that 3rd party's public key and use that to decode /
         validate the jwt.
 
-        Also nothing is persistant, which I did on purpose, so each time you
-        restart the program a new RSA key will be generated.
+        Also nothing is persistant by default, which I did on purpose, so
+        each time you restart the program a new key will be generated.
+        Set TOKEN_KEY_FILE and TOKEN_REGISTRY=sqlite so every gunicorn
+        worker, and the next start, signs with the same key and accepts the
+        same tokens.
+
+        Tokens are signed with the Signer named by TOKEN_ALGORITHM: RS256
+        (default), ES256, EdDSA or HS256.
 
         You can verify JWT Key Goto https://jwt.io/. You will need
         to copy the public key, and format so \\n are new lines.
+
+        Issued tokens are tracked by their jti in a TokenRegistry, which
+        forgets them once they expire. Claims of tokens that verified are
+        kept in a VerifiedTokenCache so a repeated token is not verified
+        again.
     """
-    _raw: str = []
-    _tokens: str = []
-    logger = get_logger(__name__)
     _audience = 'localhost'
 
     def __init__(self):
-        self._key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend())  # RSA.generate(2048)
-
-        self._private_key: str = self._key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        ).decode("utf-8")
-
-        self._public_key: str = self._key.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ).decode("utf-8")
-        self.logger.debug(
-            "Normally you would NEVER log this but as this is a demo:")
-        self.logger.debug(self._public_key)
-        self.logger.warning("""
-    Please don't use Token Factory in production this is only used for
-    educational purpose. Each time you start the application a new RSA Key will
-    be generated. Hit the open token endpoint to get JWT token.
-        """)
-        self.logger.warning("")
+        self.registry: TokenRegistry = make_registry()
+        self.cache: VerifiedTokenCache = VerifiedTokenCache(
+            max_size=settings.TOKEN_CACHE_SIZE,
+            max_ttl=settings.TOKEN_CACHE_TTL,
+            leeway=settings.JWT_LEEWAY)
+        self.signer: Signer = make_signer(
+            settings.TOKEN_ALGORITHM,
+            data_file(settings.TOKEN_KEY_FILE)
+            if settings.TOKEN_KEY_FILE else None)
+        self._public_key: str = self.signer.public_key
+        logger.debug(
+            "Normally you would NEVER log this but as this is a demo: %s",
+            self._public_key)
+        logger.warning(
+            "Please don't use Token Factory in production this is only used "
+            "for educational purpose. Each time you start the application a "
+            "new Key will be generated. Hit the open token endpoint to get "
+            "JWT token.")
 
     def make_token(self) -> str:
         """
@@ -77,33 +98,58 @@ class TokenFactory:
                 “jit” (JWT Unique ID) Claim
                 “sub” (Subject) Claim
         """
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         time = now + timedelta(seconds=1800)
         value = random.sample(string.digits+string.ascii_letters, 32)
 
+        # Claims are kept as epoch seconds so the stored payload compares
+        # equal to what jwt.decode hands back.
         info = {
             'jti': ''.join(value),
-            'exp': time,
+            'exp': int(time.timestamp()),
             'aud': self._audience,
-            'iat': now,
-            'nbf': now,
+            'iat': int(now.timestamp()),
+            'nbf': int(now.timestamp()),
             'iss': '127.0.0.1',
             'sub': 'test-jwt'
         }
-        self._raw.append(info)
-        jwt_token = jwt.encode(info, self._private_key,
-                               algorithm='RS256').decode("utf-8")
-        self._tokens.append(jwt_token)
+        jwt_token = self.signer.sign(info)
+        self.registry.add(info['jti'], info['exp'])
         return jwt_token
 
+    def decode(self, token: str) -> dict:
+        """ Verifies the signature, audience and expiry of a token, tokens
+            that verified before are answered from the cache
+
+            :return: claims of the token
+            :raises jwt.InvalidTokenError: when the token does not verify
+        """
+        claims = self.cache.get(token)
+        if claims is None:
+            claims = self.signer.verify(
+                token, self._audience, settings.JWT_LEEWAY)
+            self.cache.put(token, claims)
+        return claims
+
     def valid_token(self, token: str) -> bool:
         """ Checks if valid token
         """
-        decoded = jwt.decode(token, self._public_key,
-                             audience=self._audience, algorithms=['RS256'])
-        if decoded in self._raw:
-            return True
-        return False
+        return self.active_claims(token) is not None
+
+    def active_claims(self, token: str) -> Optional[dict]:
+        """ Claims of a valid token, None when it was revoked or expired
+        """
+        decoded = self.decode(token)
+        return decoded if self.registry.is_active(decoded['jti']) else None
+
+    def revoke(self, token: str) -> bool:
+        """ Revokes a token before it expires
+
+            :return: True when the token was active
+        """
+        jti = self.decode(token)['jti']
+        self.cache.discard(token)
+        return self.registry.revoke(jti)
 
 
 _token_factory: TokenFactory = TokenFactory()
@@ -120,14 +166,17 @@ def token_validation(func):
                 args contains self
         """
         try:
-            logger.info("Validating Token")
             token = request.headers.environ['HTTP_AUTHORIZATION']
-            logger.debug("Testing Token \n\n%s\n\n", token)
-            if not _token_factory.valid_token(token):
-                raise Unauthorized(f"Invalid token {token}")
+            claims = _token_factory.active_claims(token)
+            if claims is None:
+                raise Unauthorized("Invalid token")
+            # Lets the data layer keep this token's reads on the primary
+            # right after it writes
+            g.token_id = claims['jti']
         except Exception:
+            logger.debug("Token rejected")
             raise Unauthorized("Invalid token")
-        logger.info("Validation was Successfull")
+        logger.debug("Token %s validated", claims['jti'])
         return func(*args, **kwargs) # This is the calling method
     return wrapper_validate # Inner call from decorator
 
@@ -0,0 +1,97 @@
+""" Conditional requests driven by the audit columns
+
+    Entities get a weak ETag made of their id and modified_on, collection
+    pages one made of the id and modified_on of the rows served, the next
+    cursor and the query arguments. Matching If-None-Match / If-Modified-Since
+    answers 304 before anything is marshaled, If-Match guards updates
+    against lost writes.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+
+from flask import Response, request
+from werkzeug.http import http_date, quote_etag
+
+MODIFIED_FORMAT: str = '%Y%m%d%H%M%S%f'
+
+
+def entity_etag(entity_id: int, modified_on: datetime) -> str:
+    """ Opaque part of an entity's ETag, see expected_modified_on
+    """
+    stamp = modified_on.strftime(MODIFIED_FORMAT) if modified_on else '0'
+    return f'{entity_id}-{stamp}'
+
+
+def collection_etag(versions: Iterable[Tuple[int, datetime]],
+                    next_cursor: str = None) -> str:
+    """ Opaque part of a collection page's ETag, made of what the page
+        holds so no query beyond the page's own is needed
+
+        :param versions: id and modified_on of every row on the page
+        :param str next_cursor: cursor of the next page, a row added after
+            the last page gives it a next link
+    """
+    arguments = sorted(request.args.items(multi=True))
+    digest = hashlib.sha1(
+        repr((list(versions), next_cursor, arguments)).encode('utf-8'))
+    return digest.hexdigest()[:20]
+
+
+def as_utc(value: datetime) -> Optional[datetime]:
+    """ Audit columns hold naive local time, HTTP dates are UTC
+    """
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc)
+
+
+def validator_headers(etag: str, modified_on: datetime) -> dict:
+    """ ETag and Last-Modified response headers
+    """
+    headers = {'ETag': quote_etag(etag, weak=True)}
+    if modified_on:
+        headers['Last-Modified'] = http_date(as_utc(modified_on))
+    return headers
+
+
+def not_modified(etag: str, modified_on: datetime) -> bool:
+    """ True when the client's copy, named by If-None-Match or
+        If-Modified-Since, is still current. If-None-Match wins when both
+        are sent.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since and modified_on:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return as_utc(modified_on).replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(etag: str, modified_on: datetime) -> Response:
+    """ Empty 304 carrying the validators
+    """
+    return Response(status=304, headers=validator_headers(etag, modified_on))
+
+
+def expected_modified_on(entity_id: int) -> Optional[datetime]:
+    """ modified_on the client expects, read from If-Match
+
+        :return: None when no If-Match was sent or it is ``*``
+        :rtype: datetime
+        :raises ValueError: when If-Match names no version of this entity,
+            the update has to fail with 412
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    for etag in if_match.as_set(include_weak=True):
+        entity, _, stamp = etag.partition('-')
+        if entity == str(entity_id) and stamp:
+            try:
+                return datetime.strptime(stamp, MODIFIED_FORMAT)
+            except ValueError:
+                continue
+    raise ValueError('If-Match does not name a version of this entity')
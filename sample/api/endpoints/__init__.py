@@ -1,5 +1,7 @@
 """ Endpoint for api
 """
-from .person import PersonCollection, PersonItem
-from .status import StatusCollection
+from .person import PersonBulk, PersonCollection, PersonItem
+from .status import (StatusCollection, StatusEntityCache, StatusMetrics,
+                     StatusPool, StatusProfile, StatusProfiles,
+                     StatusTokenCache)
 from .token import Token
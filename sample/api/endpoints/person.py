@@ -3,17 +3,30 @@
 import logging
 
 from http import HTTPStatus
-from flask import request
+from flask import current_app, request
+from werkzeug.exceptions import BadRequest, PreconditionFailed
 from flask_restplus import Resource
 from ..restplus import api, name_space
-from ..swagger import api_model_factory
+from ..swagger import (BULK_AFFECTED, BULK_RESULT, BULK_SELECTION,
+                       BULK_UPDATE, api_model_factory)
+from ..conditional import (collection_etag, entity_etag,
+                           expected_modified_on, not_modified,
+                           not_modified_response, validator_headers)
+from ..fieldsets import field_sets, fields_arguments
+from ..metrics import marshal
+from ..pagination import (filter_arguments, next_link, page_arguments,
+                          page_limit, requested_filters, scope_arguments,
+                          search_arguments, search_limit)
+from ..streaming import ndjson_response, stream_arguments, stream_requested
 
-from ...data.access import PersonAccess
-from ...data.models import Person
+from ...data.access import PersonAccess, PersonArchiveAccess
+from ...data.models import Person, PersonArchive
 from ..authentication import user_id, token_validation
 
 ENTITY = api_model_factory.get_entity(Person.__tablename__)
+ARCHIVED_ENTITY = api_model_factory.get_entity(PersonArchive.__tablename__)
 NAME_SPACE = name_space(Person.__tablename__)
+FILTER_ARGUMENTS = filter_arguments(PersonAccess.filterable)
 
 @NAME_SPACE.route('')
 @NAME_SPACE.response(401, "Unauthorized") # Tell Users endpoint is protected.
@@ -24,20 +37,222 @@ class PersonCollection(Resource):
     person_access: PersonAccess = PersonAccess()
 
     @token_validation # Protects the endpoint
-    @api.marshal_list_with(ENTITY)
+    @api.expect(page_arguments, stream_arguments, fields_arguments,
+                scope_arguments, FILTER_ARGUMENTS)
+    @api.response(HTTPStatus.OK, 'Page of persons', [ENTITY])
+    @api.response(HTTPStatus.BAD_REQUEST, 'Bad sort, cursor or filter')
     def get(self):
         """
-        Returns list of persons.
+        Returns a page of persons, follow the "next" Link header for more.
+
+        Filter with the listed query arguments, first_name only together
+        with last_name, and sort on several fields with
+        ?sort=last_name,first_name.
+
+        Ask for fewer fields with ?fields=id,first_name,last_name.
+
+        Only active persons are listed unless ?include_inactive=true or an
+        active filter is given.
+
+        Send Accept: application/x-ndjson or ?stream=true to stream every
+        person instead, one JSON document per line.
+
+        Answers 304 when If-None-Match shows the client already has the
+        current page, streams carry no validators.
         """
-        return self.person_access.get(), HTTPStatus.OK
+        fields = field_sets.requested(ENTITY)
+        model = field_sets.model(ENTITY, fields)
+        filters = requested_filters(
+            page_arguments, stream_arguments, fields_arguments,
+            scope_arguments)
+        include_inactive = scope_arguments.parse_args()['include_inactive']
+        if stream_requested():
+            return ndjson_response(
+                self.person_access.stream(
+                    current_app.config['STREAM_BATCH_SIZE'], filters, fields,
+                    include_inactive),
+                model)
+        arguments = page_arguments.parse_args()
+        page = self.person_access.page(
+            limit=page_limit(arguments['limit']),
+            after=arguments['after'],
+            sort=arguments['sort'],
+            filters=filters,
+            # modified_on goes into the ETag even when it is not returned
+            fields=fields and fields + ('modified_on',),
+            include_inactive=include_inactive)
+        # No Last-Modified, a row leaving the page does not move the newest
+        # modified_on of the rows left on it
+        etag = collection_etag(
+            [(item.id, item.modified_on) for item in page.items],
+            page.next_cursor)
+        if not_modified(etag, None):
+            return not_modified_response(etag, None)
+        headers = validator_headers(etag, None)
+        headers.update(next_link(page.next_cursor))
+        return marshal(page.items, model), HTTPStatus.OK, headers
 
     @token_validation # Protects the endpoint
-    @api.response(HTTPStatus.CREATED, 'Created person')
+    @api.response(HTTPStatus.CREATED, 'Created person', ENTITY)
     @api.expect(ENTITY)
     def post(self):
         """ Creates a new person
         """
-        return self.person_access.create(user_id(), request.json), HTTPStatus.CREATED
+        person = self.person_access.create(user_id(), json_object())
+        return marshal(person, ENTITY), HTTPStatus.CREATED
+
+
+@NAME_SPACE.route('/search')
+@NAME_SPACE.response(401, "Unauthorized")
+class PersonSearch(Resource):
+    """ PersonSearch
+    """
+    log = logging.getLogger(__name__)
+    person_access: PersonAccess = PersonAccess()
+
+    @token_validation
+    @api.expect(search_arguments, scope_arguments)
+    @api.response(HTTPStatus.OK, 'Matching persons, best first', [ENTITY])
+    @api.response(HTTPStatus.BAD_REQUEST, 'No words to search for')
+    def get(self):
+        """ Finds persons whose first, middle and last names match every
+            word of q, whole or by prefix, for typeahead boxes. Only active
+            persons unless ?include_inactive=true.
+
+        Follow the "next" Link header for more matches, at most
+        SEARCH_MAX_RESULTS can be paged through.
+        """
+        arguments = search_arguments.parse_args()
+        page = self.person_access.search(
+            query=arguments['q'],
+            limit=search_limit(arguments['limit']),
+            offset=arguments['offset'],
+            max_results=current_app.config['SEARCH_MAX_RESULTS'],
+            candidates=current_app.config['SEARCH_CANDIDATES'],
+            include_inactive=scope_arguments.parse_args()['include_inactive'])
+        return marshal(page.items, ENTITY), HTTPStatus.OK, \
+            next_link(page.next_cursor, 'offset')
+
+
+@NAME_SPACE.route('/archive')
+@NAME_SPACE.response(401, "Unauthorized")
+class PersonArchiveCollection(Resource):
+    """ PersonArchiveCollection
+    """
+    log = logging.getLogger(__name__)
+    archive_access: PersonArchiveAccess = PersonArchiveAccess()
+
+    @token_validation
+    @api.expect(page_arguments)
+    @api.response(HTTPStatus.OK, 'Page of archived persons', [ARCHIVED_ENTITY])
+    @api.response(HTTPStatus.BAD_REQUEST, 'Bad sort or cursor')
+    def get(self):
+        """ Returns a page of persons moved out of the person table after
+        being inactive for ARCHIVE_RETENTION_DAYS, follow the "next" Link
+        header for more.
+
+        Sort on id or archived_on.
+        """
+        arguments = page_arguments.parse_args()
+        page = self.archive_access.page(
+            limit=page_limit(arguments['limit']),
+            after=arguments['after'],
+            sort=arguments['sort'])
+        return marshal(page.items, ARCHIVED_ENTITY), HTTPStatus.OK, \
+            next_link(page.next_cursor)
+
+
+@NAME_SPACE.route('/archive/<int:id>')
+@NAME_SPACE.response(404, "Could not find archived person")
+@NAME_SPACE.response(401, "Unauthorized")
+class PersonArchiveItem(Resource):
+    """ PersonArchiveItem
+    """
+    log = logging.getLogger(__name__)
+    archive_access: PersonArchiveAccess = PersonArchiveAccess()
+
+    @token_validation
+    @api.response(HTTPStatus.OK, 'Archived person', ARCHIVED_ENTITY)
+    @api.response(HTTPStatus.NOT_FOUND, 'Cant find archived person')
+    def get(self, id: int):
+        """ Returns a single archived person
+        """
+        return marshal(self.archive_access.get_values(id), ARCHIVED_ENTITY), \
+            HTTPStatus.OK
+
+
+@NAME_SPACE.route('/bulk')
+@NAME_SPACE.response(401, "Unauthorized")
+class PersonBulk(Resource):
+    """ PersonBulk
+    """
+    log = logging.getLogger(__name__)
+    person_access: PersonAccess = PersonAccess()
+
+    @token_validation
+    @api.expect([ENTITY])
+    @api.marshal_with(BULK_RESULT, code=HTTPStatus.CREATED)
+    @api.response(HTTPStatus.BAD_REQUEST, 'Body is not a list of persons')
+    def post(self):
+        """ Creates many persons in one transaction, rows that fail
+            validation are reported without failing the others
+        """
+        if not isinstance(request.json, list):
+            raise BadRequest('Expected a list of persons')
+        result = self.person_access.bulk_create(user_id(), request.json)
+        return result, HTTPStatus.CREATED
+
+    @token_validation
+    @api.expect(BULK_UPDATE)
+    @api.marshal_with(BULK_AFFECTED)
+    @api.response(HTTPStatus.BAD_REQUEST, 'Missing selection or values')
+    def patch(self):
+        """ Sets the same values on every selected person
+        """
+        body = selection()
+        affected = self.person_access.bulk_update(
+            user_id=user_id(),
+            data=body.get('values') or {},
+            ids=body.get('ids'),
+            where=body.get('filter'))
+        return {'affected': affected}, HTTPStatus.OK
+
+    @token_validation
+    @api.expect(BULK_SELECTION)
+    @api.marshal_with(BULK_AFFECTED)
+    @api.response(HTTPStatus.BAD_REQUEST, 'Missing selection')
+    def delete(self):
+        """ Deactivates every selected person
+        """
+        body = selection()
+        affected = self.person_access.bulk_delete(
+            user_id=user_id(),
+            ids=body.get('ids'),
+            where=body.get('filter'))
+        return {'affected': affected}, HTTPStatus.OK
+
+
+def json_object() -> dict:
+    """ Request body, has to be a JSON object
+    """
+    body = request.json
+    if not isinstance(body, dict):
+        raise BadRequest('Expected an object')
+    return body
+
+
+def selection() -> dict:
+    """ Request body of a bulk change, ids and filter are checked for shape
+    """
+    body = json_object()
+    ids = body.get('ids')
+    if ids is not None and (not isinstance(ids, list) or not all(
+            isinstance(entity_id, int) for entity_id in ids)):
+        raise BadRequest('ids has to be a list of integers')
+    for key in ('filter', 'values'):
+        if body.get(key) is not None and not isinstance(body[key], dict):
+            raise BadRequest(f'{key} has to be an object')
+    return body
 
 
 @NAME_SPACE.route('/<int:id>')
@@ -50,25 +265,51 @@ class PersonItem(Resource):
     person_access: PersonAccess = PersonAccess()
 
     @token_validation
-    @api.marshal_list_with(ENTITY)
+    @api.expect(fields_arguments, scope_arguments)
+    @api.response(HTTPStatus.OK, 'Person', ENTITY)
+    @api.response(HTTPStatus.NOT_MODIFIED, 'Client copy is current')
     @api.response(HTTPStatus.NOT_FOUND, 'Cant find person')
     def get(self, id: int):
-        """ Returns a single person.
+        """ Returns a single person, only the fields listed in ?fields= when
+        it is given. A soft deleted person is only found with
+        ?include_inactive=true.
+
+        Answers 304 when If-None-Match or If-Modified-Since show the client
+        already has the current version.
         """
-        return self.person_access.get(id), HTTPStatus.OK
+        fields = field_sets.requested(ENTITY)
+        model = field_sets.model(ENTITY, fields)
+        values = self.person_access.get_values(
+            id, fields, scope_arguments.parse_args()['include_inactive'])
+        etag = entity_etag(id, values['modified_on'])
+        if not_modified(etag, values['modified_on']):
+            return not_modified_response(etag, values['modified_on'])
+        return marshal(values, model), HTTPStatus.OK, \
+            validator_headers(etag, values['modified_on'])
 
     @token_validation
     @api.response(HTTPStatus.NO_CONTENT, 'Update classed person information')
+    @api.response(HTTPStatus.PRECONDITION_FAILED,
+                  'If-Match does not name the current version')
     @api.expect(ENTITY)
     def put(self, id):
         """ Updates a person
+
+        Send the ETag of the version being edited as If-Match to fail with
+        412 instead of overwriting someone else's change.
         """
+        try:
+            expected = expected_modified_on(id)
+        except ValueError as error:
+            raise PreconditionFailed(str(error))
         self.person_access.update(
             user_id=user_id(),
             entity_id=id,
-            data=request.json)
+            data=json_object(),
+            expected_modified_on=expected)
         return None, HTTPStatus.NO_CONTENT
 
+    @token_validation
     @api.response(HTTPStatus.NO_CONTENT, 'Deleted person information')
     def delete(self, id):
         """ Delete a new person
@@ -2,9 +2,17 @@
 """
 import logging
 from http import HTTPStatus
+from flask import Response, send_file
+from werkzeug.exceptions import NotFound
 from flask_restplus import Resource
 from ..restplus import api, name_space
-from ..swagger import STATUS
+from ..swagger import ENTITY_CACHE, POOL, PROFILE, STATUS, TOKEN_CACHE
+from ..authentication import _token_factory, token_validation
+from ..metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus, request_metrics
+from ..profiling import request_profiler
+from ...data import db
+from ...data.access import entity_cache
+from ...data.pool import pool_statistics, pool_status
 
 NAME_SPACE = name_space('status')
 
@@ -19,3 +27,95 @@ class StatusCollection(Resource):
         Returns the status.
         """
         return {"message":"Online"}, HTTPStatus.OK
+
+
+@NAME_SPACE.route('/token-cache')
+class StatusTokenCache(Resource):
+    """ StatusTokenCache
+    """
+    log = logging.getLogger(__name__)
+    @api.marshal_with(TOKEN_CACHE)
+    def get(self):
+        """
+        Returns hit and miss counters of the verified token cache.
+        """
+        return _token_factory.cache.stats(), HTTPStatus.OK
+
+
+@NAME_SPACE.route('/entity-cache')
+class StatusEntityCache(Resource):
+    """ StatusEntityCache
+    """
+    log = logging.getLogger(__name__)
+    @api.marshal_with(ENTITY_CACHE)
+    def get(self):
+        """
+        Returns hit ratio and eviction counters of the entity cache.
+        """
+        return entity_cache.stats(), HTTPStatus.OK
+
+
+@NAME_SPACE.route('/pool')
+class StatusPool(Resource):
+    """ StatusPool
+    """
+    log = logging.getLogger(__name__)
+    @api.marshal_with(POOL)
+    def get(self):
+        """
+        Returns checkout, wait and overflow figures of the connection pool.
+        """
+        status = pool_status(db.engine)
+        status.update(pool_statistics.stats())
+        return status, HTTPStatus.OK
+
+
+@NAME_SPACE.route('/metrics')
+class StatusMetrics(Resource):
+    """ StatusMetrics
+    """
+    log = logging.getLogger(__name__)
+    @api.produces([PROMETHEUS_CONTENT_TYPE])
+    def get(self):
+        """
+        Returns request, SQL and serialization counters of every worker in
+        the Prometheus text format.
+        """
+        return Response(render_prometheus(request_metrics.aggregate()),
+                        status=HTTPStatus.OK,
+                        content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@NAME_SPACE.route('/profiles')
+@NAME_SPACE.response(401, "Unauthorized")
+class StatusProfiles(Resource):
+    """ StatusProfiles
+    """
+    log = logging.getLogger(__name__)
+    @token_validation
+    @api.marshal_list_with(PROFILE)
+    def get(self):
+        """
+        Returns the request profiles this worker can read, newest first.
+        """
+        return request_profiler.profiles(), HTTPStatus.OK
+
+
+@NAME_SPACE.route('/profiles/<string:name>')
+@NAME_SPACE.response(401, "Unauthorized")
+@NAME_SPACE.response(404, "Could not find profile")
+class StatusProfile(Resource):
+    """ StatusProfile
+    """
+    log = logging.getLogger(__name__)
+    @token_validation
+    @api.produces(['application/octet-stream'])
+    def get(self, name: str):
+        """
+        Returns a profile, load it with pstats or snakeviz.
+        """
+        path = request_profiler.path(name)
+        if path is None:
+            raise NotFound(f'No profile {name}')
+        return send_file(path, mimetype='application/octet-stream',
+                         as_attachment=True, attachment_filename=name)
@@ -3,9 +3,10 @@
 """
 import logging
 from http import HTTPStatus
+from flask import request
 from flask_restplus import Resource
-from ..restplus import name_space
-from ..authentication import _token_factory
+from ..restplus import api, name_space
+from ..authentication import _token_factory, token_validation
 NAME_SPACE = name_space('token')
 
 @NAME_SPACE.route('')
@@ -19,3 +20,13 @@ class Token(Resource):
             Generates a JWT Toke for you to use on protected endpoints
         """
         return {"token": _token_factory.make_token()}, HTTPStatus.OK
+
+    @token_validation
+    @api.response(HTTPStatus.NO_CONTENT, 'Token revoked')
+    @api.response(HTTPStatus.UNAUTHORIZED, 'Unauthorized')
+    def delete(self):
+        """
+            Revokes the token sent in the Authorization header
+        """
+        _token_factory.revoke(request.headers['Authorization'])
+        return None, HTTPStatus.NO_CONTENT
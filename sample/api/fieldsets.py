@@ -0,0 +1,71 @@
+""" Sparse fieldsets, ``?fields=id,first_name,last_name``
+
+    The requested fields limit the columns read from the database and the
+    model responses are marshaled with. The projected marshal model of each
+    field set is built once and reused, field sets are kept in model order
+    so the same fields in any order share one entry.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import request
+from flask_restplus import Model as ApiModel, reqparse
+from werkzeug.exceptions import BadRequest
+
+fields_arguments: reqparse.RequestParser = reqparse.RequestParser()
+fields_arguments.add_argument(
+    'fields', type=str, location='args',
+    help='Comma separated fields to return, every field when missing')
+
+
+class FieldSets:
+    """ Cache of marshal models projected onto field sets
+
+        A model with n fields has at most 2^n field sets, every entry is a
+        small dict sharing the model's field objects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, Tuple[str, ...]], dict] = {}
+
+    @staticmethod
+    def requested(model: ApiModel) -> Optional[Tuple[str, ...]]:
+        """ Fields named by the fields query argument, in model order
+
+            :return: None when every field was asked for
+            :rtype: tuple
+            :raises BadRequest: on a field the model does not have
+        """
+        text = request.args.get('fields')
+        if text is None:
+            return None
+        names = {name.strip() for name in text.split(',') if name.strip()}
+        unknown = names - set(model)
+        if unknown:
+            raise BadRequest(f'Unknown fields {", ".join(sorted(unknown))}')
+        if not names:
+            raise BadRequest('Name at least one field')
+        if len(names) == len(model):
+            return None
+        return tuple(name for name in model if name in names)
+
+    def model(self, model: ApiModel, fields: Optional[Tuple[str, ...]]):
+        """ Marshal model limited to fields, model itself when fields is None
+        """
+        if fields is None:
+            return model
+        key = (model.name, fields)
+        projection = self._models.get(key)
+        if projection is None:
+            with self._lock:
+                projection = self._models.setdefault(
+                    key, OrderedDict((name, model[name]) for name in fields))
+        return projection
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+field_sets: FieldSets = FieldSets()
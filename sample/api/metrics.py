@@ -0,0 +1,314 @@
+""" Per request SQL and timing instrumentation
+
+    Every request records its query count, time spent in SQL, time spent
+    marshaling and encoding the response and its total latency, labelled by
+    endpoint (the URL rule) and method. The figures go out as a Server-Timing
+    header and are summed into Prometheus counters served by
+    /status/metrics.
+
+    Each thread adds to its own counters so requests never wait on a lock.
+    Every worker writes its counters to a file of its own in METRICS_FOLDER
+    at most once per flush interval, the worker answering a scrape adds up
+    the files of every worker.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import Response, g, has_request_context, request
+from flask_restplus import marshal as restplus_marshal
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram
+BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestTiming:  # pylint: disable=too-few-public-methods
+    """ Figures of the request being handled
+    """
+
+    def __init__(self):
+        self.start: float = time.perf_counter()
+        self.queries: int = 0
+        self.sql_seconds: float = 0.0
+        self.serialize_seconds: float = 0.0
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """ Timing of the current request, None outside of one
+    """
+    return g.get('request_timing') if has_request_context() else None
+
+
+class RequestMetrics:
+    """ Counters of every request this worker answered
+
+        Counters are keyed by (metric, endpoint, method, label), label is the
+        status code for requests and the bucket bound for latencies.
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.server_timing: bool = False
+        self.folder: Optional[str] = None
+        self.flush_interval: float = 1.0
+        self._lock = threading.Lock()
+        # Held while one thread writes the file, never with _lock
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._threads: List[dict] = []
+        self._process: Optional[str] = None
+        self._pid: Optional[int] = None
+        self._next_flush: float = 0
+        self._installed: bool = False
+
+    def configure(self, enabled: bool, server_timing: bool,
+                  folder: Optional[str], flush_interval: float) -> None:
+        """ Sets up instrumentation and forgets every counter, run in the
+            master before workers are forked
+
+            :param str folder: where workers leave their counters, None
+                only reports the worker answering the scrape
+        """
+        with self._lock:
+            self.enabled = enabled
+            self.server_timing = server_timing
+            self.folder = folder
+            self.flush_interval = flush_interval
+            self._threads = []
+            self._local = threading.local()
+            self._pid = None
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+                for path in glob.glob(os.path.join(folder, '*.json')):
+                    os.unlink(path)
+            if enabled and not self._installed:
+                event.listen(Engine, 'before_cursor_execute',
+                             self.before_cursor_execute)
+                event.listen(Engine, 'after_cursor_execute',
+                             self.after_cursor_execute)
+                self._installed = True
+
+    def counters(self) -> dict:
+        """ Counters of the current thread, threads of a forked worker start
+            from zero
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._threads = []
+                    self._local = threading.local()
+                    self._process = f'{pid}-{time.time_ns()}'
+                    self._pid = pid
+        counters = getattr(self._local, 'counters', None)
+        if counters is None:
+            counters = self._local.counters = defaultdict(float)
+            with self._lock:
+                self._threads.append(counters)
+        return counters
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters,  # pylint: disable=unused-argument,too-many-arguments
+                              context, executemany):
+        """ SQLAlchemy event, a statement is about to run
+        """
+        if current_timing() is not None:
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters,  # pylint: disable=unused-argument,too-many-arguments
+                             context, executemany):
+        """ SQLAlchemy event, a statement ran
+        """
+        timing = current_timing()
+        starts = conn.info.get('query_start')
+        if timing is None or not starts:
+            return
+        timing.queries += 1
+        timing.sql_seconds += time.perf_counter() - starts.pop()
+
+    @contextmanager
+    def serializing(self) -> Iterator[None]:
+        """ Time spent inside counts as serialization of the response
+        """
+        timing = current_timing()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if timing is not None:
+                timing.serialize_seconds += time.perf_counter() - start
+
+    def start_request(self) -> None:
+        """ Flask before_request hook
+        """
+        if self.enabled:
+            g.request_timing = RequestTiming()
+
+    def finish_request(self, response: Response) -> Response:
+        """ Flask after_request hook, streamed bodies are produced after it
+            ran and are not part of the figures
+        """
+        timing = current_timing()
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.start
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+        counters = self.counters()
+        counters[('requests', endpoint, method,
+                  str(int(response.status_code)))] += 1
+        counters[('duration_sum', endpoint, method, '')] += total
+        for bound in BUCKETS:
+            if total <= bound:
+                counters[('duration_bucket', endpoint, method, str(bound))] += 1
+                break
+        counters[('queries', endpoint, method, '')] += timing.queries
+        counters[('sql_seconds', endpoint, method, '')] += timing.sql_seconds
+        counters[('serialize_seconds', endpoint, method, '')] += \
+            timing.serialize_seconds
+        if self.server_timing:
+            response.headers['Server-Timing'] = ', '.join((
+                f'db;dur={timing.sql_seconds * 1000:.2f};'
+                f'desc="{timing.queries} queries"',
+                f'serialize;dur={timing.serialize_seconds * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}'))
+        self.flush()
+        return response
+
+    def snapshot(self) -> Dict[tuple, float]:
+        """ Counters of every thread of this worker added up
+        """
+        self.counters()
+        totals: Dict[tuple, float] = defaultdict(float)
+        with self._lock:
+            threads = list(self._threads)
+        for counters in threads:
+            for key, value in list(counters.items()):
+                totals[key] += value
+        return totals
+
+    def flush(self, force: bool = False) -> None:
+        """ Writes this worker's counters to its file, at most once per
+            flush interval unless forced
+
+            One thread writes at a time, a request finding another thread
+            writing skips its flush. A failed write is logged, it never
+            fails the request that triggered it.
+        """
+        if not self.folder:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now < self._next_flush:
+                return
+            self._next_flush = now + self.flush_interval
+            # snapshot names this worker's process first, see counters
+            totals = self.snapshot()
+            path = os.path.join(self.folder, f'{self._process}.json')
+            temporary = f'{path}.tmp'
+            with open(temporary, 'w') as metrics_file:
+                json.dump([list(key) + [value]
+                           for key, value in totals.items()],
+                          metrics_file)
+            os.replace(temporary, path)
+        except (OSError, TypeError, ValueError) as error:
+            log.warning('Writing metrics failed: %s', error)
+        finally:
+            self._flush_lock.release()
+
+    def aggregate(self) -> Dict[tuple, float]:
+        """ Counters of every worker added up
+        """
+        if not self.folder:
+            return self.snapshot()
+        self.flush(force=True)
+        totals: Dict[tuple, float] = defaultdict(float)
+        for path in glob.glob(os.path.join(self.folder, '*.json')):
+            try:
+                with open(path) as metrics_file:
+                    rows = json.load(metrics_file)
+            except (OSError, ValueError):
+                continue
+            for *key, value in rows:
+                totals[tuple(key)] += value
+        return totals
+
+
+def render_prometheus(totals: Dict[tuple, float]) -> str:
+    """ Counters in the Prometheus text exposition format
+    """
+    labelled: Dict[str, Dict[tuple, float]] = defaultdict(dict)
+    for (metric, endpoint, method, label), value in sorted(totals.items()):
+        labelled[metric][(endpoint, method, label)] = value
+
+    def labels(endpoint: str, method: str, **extra) -> str:
+        pairs = [('endpoint', endpoint), ('method', method)] + list(extra.items())
+        return ','.join(f'{name}="{value}"' for name, value in pairs)
+
+    lines: List[str] = [
+        '# HELP sample_http_requests_total Requests answered',
+        '# TYPE sample_http_requests_total counter']
+    counts: Dict[tuple, float] = defaultdict(float)
+    for (endpoint, method, status), value in labelled['requests'].items():
+        counts[(endpoint, method)] += value
+        lines.append(f'sample_http_requests_total'
+                     f'{{{labels(endpoint, method, status=status)}}} {value:g}')
+
+    lines += [
+        '# HELP sample_http_request_duration_seconds Request latency',
+        '# TYPE sample_http_request_duration_seconds histogram']
+    for (endpoint, method), count in counts.items():
+        cumulative = 0.0
+        for bound in BUCKETS:
+            cumulative += labelled['duration_bucket'].get(
+                (endpoint, method, str(bound)), 0)
+            lines.append(
+                f'sample_http_request_duration_seconds_bucket'
+                f'{{{labels(endpoint, method, le=bound)}}} {cumulative:g}')
+        lines.append(
+            f'sample_http_request_duration_seconds_bucket'
+            f'{{{labels(endpoint, method, le="+Inf")}}} {count:g}')
+        lines.append(
+            f'sample_http_request_duration_seconds_sum'
+            f'{{{labels(endpoint, method)}}} '
+            f'{labelled["duration_sum"].get((endpoint, method, ""), 0):g}')
+        lines.append(
+            f'sample_http_request_duration_seconds_count'
+            f'{{{labels(endpoint, method)}}} {count:g}')
+
+    for metric, name, description in (
+            ('queries', 'sample_http_request_sql_queries_total',
+             'SQL statements run'),
+            ('sql_seconds', 'sample_http_request_sql_seconds_total',
+             'Time spent running SQL'),
+            ('serialize_seconds',
+             'sample_http_request_serialization_seconds_total',
+             'Time spent marshaling and encoding responses')):
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        for (endpoint, method, _), value in labelled[metric].items():
+            lines.append(f'{name}{{{labels(endpoint, method)}}} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def marshal(data, fields, *args, **kwargs):
+    """ flask_restplus.marshal counted as serialization time
+    """
+    with request_metrics.serializing():
+        return restplus_marshal(data, fields, *args, **kwargs)
+
+
+request_metrics: RequestMetrics = RequestMetrics()
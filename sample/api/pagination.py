@@ -0,0 +1,110 @@
+""" Request parsing and response headers for keyset paginated endpoints
+"""
+from typing import Dict, Tuple
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from flask_restplus import inputs, reqparse
+
+from .profiling import PROFILE_ARGUMENT
+
+# Query arguments every endpoint accepts, never filters and never copied
+# into links
+APPLICATION_ARGUMENTS: Tuple[str, ...] = (PROFILE_ARGUMENT,)
+
+page_arguments: reqparse.RequestParser = reqparse.RequestParser()
+page_arguments.add_argument(
+    'limit', type=inputs.positive, location='args',
+    help='Maximum number of items on the page')
+page_arguments.add_argument(
+    'after', type=str, location='args',
+    help='Opaque cursor taken from the "next" link of the previous page')
+page_arguments.add_argument(
+    'sort', type=str, default='id', location='args',
+    help='Comma separated indexed fields to sort on, prefix every field '
+    'with "-" for descending')
+
+
+scope_arguments: reqparse.RequestParser = reqparse.RequestParser()
+scope_arguments.add_argument(
+    'include_inactive', type=inputs.boolean, default=False, location='args',
+    help='Also return soft deleted items')
+
+
+def filter_arguments(filterable: Dict[str, Tuple[str, ...]]) -> \
+        reqparse.RequestParser:
+    """ Documents the whitelisted filters of a collection, ``field`` for
+        equality and ``field[operator]`` for the other operators
+
+        :param dict filterable: field name to the operators it accepts
+        :rtype: flask_restplus.reqparse.RequestParser
+    """
+    parser = reqparse.RequestParser()
+    for field, operators in filterable.items():
+        for operator in operators:
+            name = field if operator == 'eq' else f'{field}[{operator}]'
+            parser.add_argument(
+                name, type=str, location='args',
+                help=f'Only items whose {field} is {operator} this value')
+    return parser
+
+
+def requested_filters(*parsers: reqparse.RequestParser) -> Dict[str, str]:
+    """ Query arguments not claimed by any of the parsers or the
+        application, these are the filters the data layer checks against its
+        whitelist
+
+        :rtype: dict
+    """
+    claimed = {argument.name for parser in parsers for argument in parser.args}
+    claimed.update(APPLICATION_ARGUMENTS)
+    return {key: value for key, value in request.args.items()
+            if key not in claimed}
+
+
+def page_limit(limit: int = None) -> int:
+    """ Applies the configured default and maximum page size
+
+        :param int limit: limit asked for by the client
+        :rtype: int
+    """
+    if not limit:
+        return current_app.config['PAGE_DEFAULT_LIMIT']
+    return min(limit, current_app.config['PAGE_MAX_LIMIT'])
+
+
+def next_link(next_cursor: str, argument: str = 'after') -> dict:
+    """ Link header pointing at the next page, keeping the other query
+        arguments of the current request.
+
+        :param str next_cursor: cursor of the next page, None on the last page
+        :param str argument: query argument the cursor is passed in
+        :return: headers to add to the response
+        :rtype: dict
+    """
+    if not next_cursor:
+        return {}
+    arguments = {key: value for key, value in request.args.items()
+                 if key not in APPLICATION_ARGUMENTS}
+    arguments[argument] = next_cursor
+    return {'Link': f'<{request.base_url}?{urlencode(arguments)}>; rel="next"'}
+
+
+search_arguments: reqparse.RequestParser = reqparse.RequestParser()
+search_arguments.add_argument(
+    'q', type=str, required=True, location='args',
+    help='Words to search for, each matches a name or its beginning')
+search_arguments.add_argument(
+    'limit', type=inputs.positive, location='args',
+    help='Maximum number of matches on the page')
+search_arguments.add_argument(
+    'offset', type=inputs.natural, default=0, location='args',
+    help='Matches to skip, taken from the "next" link of the previous page')
+
+
+def search_limit(limit: int = None) -> int:
+    """ Applies the configured default and maximum search page size
+    """
+    if not limit:
+        return current_app.config['SEARCH_DEFAULT_LIMIT']
+    return min(limit, current_app.config['SEARCH_MAX_RESULTS'])
@@ -0,0 +1,140 @@
+""" On demand request profiling
+
+    A request is run under cProfile when it sends the configured secret in an
+    ``X-Profile`` header or ``profile`` query argument, or when it is picked
+    by the sample rate. The profile is written as a pstats ``.prof`` file,
+    its name is returned in the ``X-Profile-File`` response header. Only the
+    newest files are kept.
+"""
+import cProfile
+import glob
+import hmac
+import logging
+import os
+import random
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from flask import Response, g, request
+
+log = logging.getLogger(__name__)
+
+PROFILE_HEADER: str = 'X-Profile'
+PROFILE_FILE_HEADER: str = 'X-Profile-File'
+PROFILE_ARGUMENT: str = 'profile'
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+
+
+class RequestProfiler:
+    """ Profiles selected requests of this worker
+
+        :param bool enabled: nothing is profiled when False
+        :param str secret: header or query value that asks for a profile,
+            empty only profiles sampled requests
+        :param float sample_rate: share of all requests profiled, 0 to 1
+        :param str folder: where profiles are written
+        :param int retention: newest profiles kept
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.secret: str = ''
+        self.sample_rate: float = 0.0
+        self.folder: Optional[str] = None
+        self.retention: int = 50
+
+    def configure(self, enabled: bool, secret: str, sample_rate: float,
+                  folder: str, retention: int) -> None:
+        """ Sets when and where requests are profiled
+        """
+        self.enabled = enabled and bool(folder)
+        self.secret = secret or ''
+        self.sample_rate = sample_rate
+        self.folder = folder
+        self.retention = retention
+        if self.enabled:
+            os.makedirs(folder, exist_ok=True)
+
+    def requested(self) -> bool:
+        """ True when the current request asks for, or is sampled for, a
+            profile
+        """
+        if not self.enabled:
+            return False
+        if self.secret:
+            value = request.headers.get(PROFILE_HEADER) \
+                or request.args.get(PROFILE_ARGUMENT)
+            if value and hmac.compare_digest(value, self.secret):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start_request(self) -> None:
+        """ Flask before_request hook
+        """
+        if self.requested():
+            profiler = cProfile.Profile()
+            g.profiler = profiler
+            profiler.enable()
+
+    def finish_request(self, response: Response) -> Response:
+        """ Flask after_request hook, writes the profile of the request
+
+            A profile that can not be written is logged and left out, the
+            response goes out unchanged.
+        """
+        profiler: cProfile.Profile = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        label = re.sub(r'[^\w]+', '_', endpoint).strip('_') or 'root'
+        name = (f'{datetime.now().strftime("%Y%m%d%H%M%S%f")}-'
+                f'{request.method}-{label}-{os.getpid()}.prof')
+        try:
+            profiler.dump_stats(os.path.join(self.folder, name))
+        except OSError as error:
+            log.warning('Writing profile %s failed: %s', name, error)
+            return response
+        response.headers[PROFILE_FILE_HEADER] = name
+        self.prune()
+        return response
+
+    def profiles(self) -> List[dict]:
+        """ Kept profiles, newest first
+        """
+        if not self.folder:
+            return []
+        found: List[dict] = []
+        for path in glob.glob(os.path.join(self.folder, '*.prof')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found.append({
+                'name': os.path.basename(path),
+                'size': stat.st_size,
+                'created_on': datetime.fromtimestamp(stat.st_mtime)
+            })
+        found.sort(key=lambda profile: profile['name'], reverse=True)
+        return found
+
+    def path(self, name: str) -> Optional[str]:
+        """ File of a kept profile, None for unknown or unsafe names
+        """
+        if not self.folder or not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.folder, name)
+        return path if os.path.isfile(path) else None
+
+    def prune(self) -> None:
+        """ Deletes all but the newest retention profiles
+        """
+        for profile in self.profiles()[self.retention:]:
+            try:
+                os.unlink(os.path.join(self.folder, profile['name']))
+            except OSError:
+                pass
+
+
+request_profiler: RequestProfiler = RequestProfiler()
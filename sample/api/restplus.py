@@ -2,10 +2,16 @@
 """
 import logging
 from http import HTTPStatus
-from flask_restplus import Api, Namespace
+from flask_restplus import Api, Namespace, representations
 from werkzeug.exceptions import Unauthorized
 from sqlalchemy.orm.exc import NoResultFound
 from .. import __version__
+from ..data.access.accessible import StaleEntity
+from ..data.access.converter import InvalidEntity
+from ..data.access.filtering import InvalidFilter
+from ..data.access.pagination import InvalidPage
+from ..data.search import InvalidSearch
+from .metrics import request_metrics
 log = logging.getLogger(__name__)
 
 authorizations = {
@@ -54,6 +60,14 @@ def name_space(entity_name) -> Namespace:
         description=f'Operations related to {explode_entity_name(entity_name)}')
 
 
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    """ JSON encoding, counted as serialization time of the request
+    """
+    with request_metrics.serializing():
+        return representations.output_json(data, code, headers)
+
+
 @api.errorhandler
 def default_error_handler(e):
     """ By default all errors will be handeled here
@@ -72,6 +86,47 @@ def database_not_found_error_handler(e):
     return {'message': 'A database result was not found'}, HTTPStatus.NOT_FOUND
 
 
+@api.errorhandler(InvalidPage)
+def invalid_page_error_handler(e):
+    """ Bad pagination arguments, sort or cursor
+    """
+    log.debug(e)
+    return {'message': str(e)}, HTTPStatus.BAD_REQUEST
+
+
+@api.errorhandler(InvalidFilter)
+def invalid_filter_error_handler(e):
+    """ Filter that is not whitelisted or has a bad value
+    """
+    log.debug(e)
+    return {'message': str(e)}, HTTPStatus.BAD_REQUEST
+
+
+@api.errorhandler(InvalidSearch)
+def invalid_search_error_handler(e):
+    """ Search without words or on something not searchable
+    """
+    log.debug(e)
+    return {'message': str(e)}, HTTPStatus.BAD_REQUEST
+
+
+@api.errorhandler(InvalidEntity)
+def invalid_entity_error_handler(e):
+    """ Submitted data can not be stored
+    """
+    log.debug(e)
+    return {'message': str(e)}, HTTPStatus.BAD_REQUEST
+
+
+@api.errorhandler(StaleEntity)
+def stale_entity_error_handler(e):
+    """ If-Match named an older version of the entity
+    """
+    log.debug(e)
+    return {'message': 'The entity was changed by someone else'}, \
+        HTTPStatus.PRECONDITION_FAILED
+
+
 @api.errorhandler(Unauthorized)
 def unauthorized_error_handler(e):
     """ Unauthorized Exception thrown
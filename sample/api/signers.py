@@ -0,0 +1,178 @@
+""" JWT signing backends
+
+    Each signer builds its key objects once, PyJWT is handed those objects
+    instead of PEM text so nothing is parsed again per token.
+"""
+import os
+import secrets
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Type
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+
+def load_key_bytes(path: str, generate: Callable[[], bytes]) -> bytes:
+    """ Reads key material from path, when there is no such file it is
+        generated and written there first.
+
+        Several workers may start at once, the key is written to a temporary
+        file and linked into place so exactly one key wins and the others
+        read it.
+
+        :param str path: key file, None always generates new material
+        :param generate: returns new key material
+    """
+    if path and os.path.exists(path):
+        with open(path, 'rb') as key_file:
+            return key_file.read()
+    material = generate()
+    if not path:
+        return material
+    temporary = f'{path}.{os.getpid()}.tmp'
+    file_descriptor = os.open(
+        temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(file_descriptor, 'wb') as key_file:
+        key_file.write(material)
+    try:
+        os.link(temporary, path)
+    except FileExistsError:
+        return load_key_bytes(path, generate)
+    finally:
+        os.unlink(temporary)
+    return material
+
+
+def private_pem(key) -> bytes:
+    """ PKCS8 PEM of a private key
+    """
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption())
+
+
+class Signer(ABC):
+    """ Signs and verifies tokens with one algorithm, subclasses set
+        algorithm and key_type and implement generate
+
+        :param str key_path: file holding the private key, generated when
+            missing, None keeps a new key for the life of the process
+    """
+    algorithm: str = None
+    key_type: type = None
+
+    def __init__(self, key_path: str = None):
+        self.signing_key = self.load_signing_key(key_path)
+        self.verifying_key = self.signing_key.public_key()
+
+    @abstractmethod
+    def generate(self):
+        """ New private key
+        """
+
+    def load_signing_key(self, key_path: str = None):
+        """ Private key from key_path, see load_key_bytes
+        """
+        if not key_path:
+            return self.generate()
+        pem = load_key_bytes(key_path, lambda: private_pem(self.generate()))
+        key = serialization.load_pem_private_key(
+            pem, password=None, backend=default_backend())
+        if not isinstance(key, self.key_type):
+            raise ValueError(
+                f'{key_path} does not hold a key for {self.algorithm}')
+        return key
+
+    @property
+    def public_key(self) -> str:
+        """ PEM of the key tokens are verified with
+        """
+        return self.verifying_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode("utf-8")
+
+    def sign(self, claims: dict) -> str:
+        """ Encoded and signed token
+        """
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm)
+
+    def verify(self, token: str, audience: str, leeway: int = 0) -> dict:
+        """ Claims of a token whose signature, audience and expiry verify
+
+            :raises jwt.InvalidTokenError: when the token does not verify
+        """
+        return jwt.decode(token, self.verifying_key, audience=audience,
+                          algorithms=[self.algorithm], leeway=leeway)
+
+
+class RS256Signer(Signer):
+    """ RSA 2048 with SHA-256, slow to sign, quick to verify
+    """
+    algorithm = 'RS256'
+    key_type = rsa.RSAPrivateKey
+
+    def generate(self):
+        return rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048,
+            backend=default_backend())  # RSA.generate(2048)
+
+
+class ES256Signer(Signer):
+    """ ECDSA on P-256 with SHA-256
+    """
+    algorithm = 'ES256'
+    key_type = ec.EllipticCurvePrivateKey
+
+    def generate(self):
+        return ec.generate_private_key(ec.SECP256R1(), default_backend())
+
+
+class EdDSASigner(Signer):
+    """ Ed25519, small keys and signatures, fast to sign
+    """
+    algorithm = 'EdDSA'
+    key_type = ed25519.Ed25519PrivateKey
+
+    def generate(self):
+        return ed25519.Ed25519PrivateKey.generate()
+
+
+class HS256Signer(Signer):
+    """ HMAC with SHA-256, the same secret signs and verifies so only use it
+        when nothing outside this service has to verify tokens
+    """
+    algorithm = 'HS256'
+
+    def __init__(self, key_path: str = None):  # pylint: disable=super-init-not-called
+        self.signing_key = load_key_bytes(key_path, self.generate)
+        self.verifying_key = self.signing_key
+
+    def generate(self):
+        return secrets.token_bytes(32)
+
+    @property
+    def public_key(self) -> str:
+        return ''
+
+
+SIGNERS: Dict[str, Type[Signer]] = {
+    signer.algorithm: signer
+    for signer in (RS256Signer, ES256Signer, EdDSASigner, HS256Signer)
+}
+
+
+def make_signer(algorithm: str, key_path: str = None) -> Signer:
+    """ Signer for an algorithm name
+
+        :raises ValueError: on an unsupported algorithm
+    """
+    if algorithm not in SIGNERS:
+        raise ValueError(
+            f'Unsupported token algorithm {algorithm}, '
+            f'use one of {", ".join(SIGNERS)}')
+    return SIGNERS[algorithm](key_path)
@@ -0,0 +1,58 @@
+""" Newline delimited JSON (NDJSON) streaming for large collections
+
+    Rows are marshaled one at a time as they come off the database cursor and
+    written in chunks, so memory stays flat and the first byte does not wait
+    for the whole result.
+"""
+import json
+from typing import Iterable, Iterator
+
+from flask import Response, current_app, request, stream_with_context
+from flask_restplus import Model as ApiModel, inputs, marshal, reqparse
+
+NDJSON: str = 'application/x-ndjson'
+
+stream_arguments: reqparse.RequestParser = reqparse.RequestParser()
+stream_arguments.add_argument(
+    'stream', type=inputs.boolean, location='args',
+    help=f'Stream every item as {NDJSON}, same as sending Accept: {NDJSON}')
+
+
+def stream_requested() -> bool:
+    """ True when the client asked for NDJSON through the Accept header or
+        the stream query argument.
+    """
+    if request.accept_mimetypes.best == NDJSON:
+        return True
+    return bool(stream_arguments.parse_args()['stream'])
+
+
+def ndjson_lines(items: Iterable, model: ApiModel,
+                 chunk_size: int) -> Iterator[str]:
+    """ Marshals items into NDJSON, yielding a chunk every chunk_size items
+
+        :param items: entities, ideally a lazy iterator over a cursor
+        :param flask_restplus.Model model: model used to marshal each item
+        :param int chunk_size: items per written chunk
+    """
+    chunk = []
+    for item in items:
+        chunk.append(json.dumps(marshal(item, model), separators=(',', ':')))
+        if len(chunk) >= chunk_size:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def ndjson_response(items: Iterable, model: ApiModel) -> Response:
+    """ Chunked NDJSON response, the request context is kept alive until
+        the last item has been written.
+
+        :param items: entities, ideally a lazy iterator over a cursor
+        :param flask_restplus.Model model: model used to marshal each item
+        :rtype: flask.Response
+    """
+    lines = ndjson_lines(
+        items, model, current_app.config['STREAM_BATCH_SIZE'])
+    return Response(stream_with_context(lines), mimetype=NDJSON)
@@ -8,4 +8,5 @@
 
 """
 from .factory import api_model_factory
-from .status import STATUS
+from .status import ENTITY_CACHE, POOL, PROFILE, STATUS, TOKEN_CACHE
+from .bulk import BULK_AFFECTED, BULK_RESULT, BULK_SELECTION, BULK_UPDATE
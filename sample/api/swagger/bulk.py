@@ -0,0 +1,48 @@
+""" Bulk operation swagger documentation
+"""
+from flask_restplus import fields
+from ..restplus import api
+
+BULK_ERROR_SCHEMA = {
+    'index': fields.Integer(
+        readOnly=True,
+        description='Position of the failed row in the request'),
+    'message': fields.String(
+        readOnly=True,
+        description='Why the row was rejected')
+}
+BULK_ERROR = api.model('bulk_error', BULK_ERROR_SCHEMA)
+
+BULK_RESULT_SCHEMA = {
+    'ids': fields.List(
+        fields.Integer,
+        readOnly=True,
+        description='Id per submitted row, null where the row failed'),
+    'errors': fields.List(
+        fields.Nested(BULK_ERROR),
+        readOnly=True,
+        description='Rows that were rejected')
+}
+BULK_RESULT = api.model('bulk_result', BULK_RESULT_SCHEMA)
+
+BULK_SELECTION_SCHEMA = {
+    'ids': fields.List(
+        fields.Integer,
+        description='Ids of the rows to change'),
+    'filter': fields.Raw(
+        description='Column name to value, rows have to match every pair')
+}
+BULK_SELECTION = api.model('bulk_selection', BULK_SELECTION_SCHEMA)
+
+BULK_UPDATE = api.clone('bulk_update', BULK_SELECTION, {
+    'values': fields.Raw(
+        required=True,
+        description='Fields to set on every selected row')
+})
+
+BULK_AFFECTED_SCHEMA = {
+    'affected': fields.Integer(
+        readOnly=True,
+        description='Number of rows changed')
+}
+BULK_AFFECTED = api.model('bulk_affected', BULK_AFFECTED_SCHEMA)
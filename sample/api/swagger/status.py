@@ -9,3 +9,58 @@ STATUS_SCHEMA = {
         description='Current Application Status')
 }
 STATUS = api.model('status', STATUS_SCHEMA)
+
+TOKEN_CACHE_SCHEMA = {
+    'size': fields.Integer(readOnly=True, description='Cached tokens'),
+    'max_size': fields.Integer(readOnly=True, description='Cache capacity'),
+    'hits': fields.Integer(readOnly=True, description='Lookups answered'),
+    'misses': fields.Integer(
+        readOnly=True, description='Lookups that had to verify the token'),
+    'evictions': fields.Integer(
+        readOnly=True, description='Entries dropped to stay within capacity'),
+    'hit_ratio': fields.Float(readOnly=True, description='hits / lookups')
+}
+TOKEN_CACHE = api.model('token_cache', TOKEN_CACHE_SCHEMA)
+
+ENTITY_CACHE_SCHEMA = {
+    'size': fields.Integer(readOnly=True, description='Cached rows'),
+    'max_size': fields.Integer(readOnly=True, description='Cache capacity'),
+    'hits': fields.Integer(readOnly=True, description='Reads answered'),
+    'misses': fields.Integer(
+        readOnly=True, description='Reads that went to the database'),
+    'evictions': fields.Integer(
+        readOnly=True, description='Rows dropped to stay within capacity'),
+    'expirations': fields.Integer(
+        readOnly=True, description='Rows dropped because they were too old'),
+    'hit_ratio': fields.Float(readOnly=True, description='hits / lookups')
+}
+ENTITY_CACHE = api.model('entity_cache', ENTITY_CACHE_SCHEMA)
+
+POOL_SCHEMA = {
+    'size': fields.Integer(readOnly=True, description='Pool size'),
+    'checked_in': fields.Integer(
+        readOnly=True, description='Idle connections in the pool'),
+    'checked_out': fields.Integer(
+        readOnly=True, description='Connections in use'),
+    'overflow': fields.Integer(
+        readOnly=True, description='Connections open beyond the pool size'),
+    'connects': fields.Integer(
+        readOnly=True, description='Connections opened by this worker'),
+    'checkouts': fields.Integer(
+        readOnly=True, description='Connections handed out'),
+    'timeouts': fields.Integer(
+        readOnly=True, description='Checkouts that gave up waiting'),
+    'wait_seconds': fields.Float(
+        readOnly=True, description='Total time spent waiting for checkouts'),
+    'wait_max_seconds': fields.Float(
+        readOnly=True, description='Longest wait for a checkout')
+}
+POOL = api.model('pool', POOL_SCHEMA)
+
+PROFILE_SCHEMA = {
+    'name': fields.String(
+        readOnly=True, description='File name, as sent in X-Profile-File'),
+    'size': fields.Integer(readOnly=True, description='Bytes'),
+    'created_on': fields.DateTime(readOnly=True, description='Written at')
+}
+PROFILE = api.model('profile', PROFILE_SCHEMA)
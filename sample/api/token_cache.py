@@ -0,0 +1,99 @@
+""" Cache of tokens whose signature was already verified
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class VerifiedTokenCache:
+    """ Bounded LRU of decoded claims keyed by a hash of the raw token
+
+        Verifying an RS256 signature is the most expensive step of a
+        protected request, clients send the same bearer token over and over
+        so the verified claims are kept until the token stops being valid.
+
+        :param int max_size: entries kept, the least recently used entry is
+            evicted first, 0 disables the cache
+        :param int max_ttl: seconds an entry may live, entries never outlive
+            the token's exp (plus leeway)
+        :param int leeway: clock skew in seconds allowed on exp and nbf, must
+            match the leeway used to verify the token
+    """
+
+    def __init__(self, max_size: int = 1024, max_ttl: int = 300,
+                 leeway: int = 0):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.leeway = leeway
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        """ Raw tokens are not kept in memory, only their digest
+        """
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """ Claims of a previously verified token that is still within its
+            validity window, None otherwise
+        """
+        if not self.max_size:
+            return None
+        key = self.key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, not_before, expires = entry
+                if not_before <= now < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                if now >= expires:
+                    del self._entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, token: str, claims: dict) -> None:
+        """ Remembers the claims of a token that just verified
+        """
+        if not self.max_size:
+            return
+        now = time.time()
+        expires = now + self.max_ttl
+        if 'exp' in claims:
+            expires = min(expires, claims['exp'] + self.leeway)
+        not_before = claims.get('nbf', now) - self.leeway
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (claims, not_before, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, token: str) -> None:
+        """ Forgets a token, used when it is revoked
+        """
+        with self._lock:
+            self._entries.pop(self.key(token), None)
+
+    def stats(self) -> dict:
+        """ Counters used to size the cache
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
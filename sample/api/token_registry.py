@@ -0,0 +1,154 @@
+""" Issued token bookkeeping
+"""
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+class TokenRegistry:
+    """ Tokens that were issued and are still usable, keyed by their
+        "jti" (JWT ID) claim.
+
+        Lookups are O(1). Expiry times are also kept in a min heap so expired
+        entries are dropped in order, at most once each, whenever the
+        registry is touched; nothing has to scan the whole registry.
+
+        Revoked tokens are removed right away, their heap entry is skipped
+        when it comes up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expires: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._prune(time.time())
+            return len(self._expires)
+
+    def add(self, jti: str, exp: int) -> None:
+        """ Registers an issued token
+
+            :param str jti: unique id of the token
+            :param int exp: expiry as epoch seconds
+        """
+        with self._lock:
+            self._prune(time.time())
+            self._expires[jti] = exp
+            heapq.heappush(self._heap, (exp, jti))
+
+    def is_active(self, jti: str) -> bool:
+        """ True when the token was issued here, is not expired and was not
+            revoked
+        """
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            exp = self._expires.get(jti)
+        return exp is not None and exp > now
+
+    def revoke(self, jti: str) -> bool:
+        """ Stops a token from validating before it expires
+
+            :return: True when the token was active
+        """
+        with self._lock:
+            return self._expires.pop(jti, None) is not None
+
+    def _prune(self, now: float) -> None:
+        """ Drops expired entries, caller holds the lock
+        """
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            exp, jti = heapq.heappop(heap)
+            if self._expires.get(jti) == exp:
+                del self._expires[jti]
+
+
+class SqliteTokenRegistry:
+    """ TokenRegistry kept in a SQLite file so every gunicorn worker (and
+        every restart) sees the same issued and revoked tokens.
+
+        Each process and thread opens its own connection, the file runs in
+        WAL mode so lookups from many workers do not block each other.
+        Expired rows are deleted by the indexed exp column every
+        prune_interval seconds.
+
+        :param str path: SQLite database file
+        :param int prune_interval: seconds between expired row deletes
+    """
+
+    def __init__(self, path: str, prune_interval: int = 60):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._next_prune: float = 0
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS token '
+                '(jti TEXT PRIMARY KEY, exp INTEGER NOT NULL)')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS token_exp ON token (exp)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current process and thread, connections are
+            never shared across a fork
+        """
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def __len__(self) -> int:
+        row = self._connection().execute(
+            'SELECT COUNT(*) FROM token WHERE exp > ?',
+            (int(time.time()),)).fetchone()
+        return row[0]
+
+    def add(self, jti: str, exp: int) -> None:
+        """ Registers an issued token
+
+            :param str jti: unique id of the token
+            :param int exp: expiry as epoch seconds
+        """
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO token (jti, exp) VALUES (?, ?)',
+                (jti, exp))
+        self._prune(time.time())
+
+    def is_active(self, jti: str) -> bool:
+        """ True when the token was issued, is not expired and was not
+            revoked
+        """
+        row = self._connection().execute(
+            'SELECT 1 FROM token WHERE jti = ? AND exp > ?',
+            (jti, time.time())).fetchone()
+        return row is not None
+
+    def revoke(self, jti: str) -> bool:
+        """ Stops a token from validating before it expires
+
+            :return: True when the token was active
+        """
+        with self._connection() as connection:
+            cursor = connection.execute(
+                'DELETE FROM token WHERE jti = ?', (jti,))
+        return cursor.rowcount > 0
+
+    def _prune(self, now: float) -> None:
+        """ Deletes expired rows at most once per prune_interval
+        """
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.prune_interval
+        with self._connection() as connection:
+            connection.execute('DELETE FROM token WHERE exp <= ?', (now,))
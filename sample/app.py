@@ -2,11 +2,18 @@
 """
 import os
 from logging import Logger
+from typing import List, Optional
 from flask import Flask, Blueprint
 from flask_cors import CORS
 
 from . import settings
 from .data import db
+from .data.pool import engine_options
+from .data.routing import SqliteWriteMarks, replica_router
+from .data.search import create_name_search
+from .data.sqlite import sqlite_profile
+from .api.metrics import request_metrics
+from .api.profiling import request_profiler
 from .api.restplus import api
 application: Flask = Flask(__name__)
 
@@ -33,11 +40,55 @@ def settings_to_config(flask_application: Flask) -> Flask:
     flask_application.config['SQLALCHEMY_REBUILD'] = settings.SQLALCHEMY_REBUILD
     flask_application.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = \
         settings.SQLALCHEMY_TRACK_MODIFICATIONS
+    flask_application.config['SQLALCHEMY_REPLICA_URIS'] = \
+        settings.SQLALCHEMY_REPLICA_URIS
+    flask_application.config['DATABASE_REPLICA_STRATEGY'] = \
+        settings.DATABASE_REPLICA_STRATEGY
+    flask_application.config['DATABASE_STICKY_SECONDS'] = \
+        settings.DATABASE_STICKY_SECONDS
+    flask_application.config['DATABASE_WRITE_MARKS'] = \
+        settings.DATABASE_WRITE_MARKS
+    flask_application.config['DATABASE_WRITE_MARKS_FILE'] = \
+        settings.DATABASE_WRITE_MARKS_FILE
+    flask_application.config['DATABASE_POOL_SIZE'] = settings.DATABASE_POOL_SIZE
+    flask_application.config['DATABASE_MAX_OVERFLOW'] = settings.DATABASE_MAX_OVERFLOW
+    flask_application.config['DATABASE_POOL_TIMEOUT'] = settings.DATABASE_POOL_TIMEOUT
+    flask_application.config['DATABASE_POOL_RECYCLE'] = settings.DATABASE_POOL_RECYCLE
+    flask_application.config['DATABASE_POOL_PRE_PING'] = settings.DATABASE_POOL_PRE_PING
+    flask_application.config['DATABASE_STATEMENT_CACHE_SIZE'] = \
+        settings.DATABASE_STATEMENT_CACHE_SIZE
+    flask_application.config['SQLITE_PERFORMANCE_PROFILE'] = \
+        settings.SQLITE_PERFORMANCE_PROFILE
+    flask_application.config['SQLITE_MMAP_SIZE'] = settings.SQLITE_MMAP_SIZE
+    flask_application.config['SQLITE_CACHE_SIZE'] = settings.SQLITE_CACHE_SIZE
+    flask_application.config['SQLITE_BUSY_TIMEOUT'] = settings.SQLITE_BUSY_TIMEOUT
+    flask_application.config['SQLITE_MAINTENANCE_INTERVAL'] = \
+        settings.SQLITE_MAINTENANCE_INTERVAL
+    flask_application.config['ENTITY_CACHE_SIZE'] = settings.ENTITY_CACHE_SIZE
+    flask_application.config['ENTITY_CACHE_TTL'] = settings.ENTITY_CACHE_TTL
     flask_application.config['SWAGGER_UI_DOC_EXPANSION'] = \
         settings.REST_PLUS_SWAGGER_UI_DOC_EXPANSION
     flask_application.config['RESTPLUS_VALIDATE'] = settings.REST_PLUS_VALIDATE
     flask_application.config['RESTPLUS_MASK_SWAGGER'] = settings.REST_PLUS_MASK_SWAGGER
     flask_application.config['ERROR_404_HELP'] = settings.REST_PLUS_ERROR_404_HELP
+    flask_application.config['METRICS_ENABLED'] = settings.METRICS_ENABLED
+    flask_application.config['METRICS_SERVER_TIMING'] = settings.METRICS_SERVER_TIMING
+    flask_application.config['METRICS_FOLDER'] = settings.METRICS_FOLDER
+    flask_application.config['METRICS_FLUSH_INTERVAL'] = \
+        settings.METRICS_FLUSH_INTERVAL
+    flask_application.config['PROFILE_ENABLED'] = settings.PROFILE_ENABLED
+    flask_application.config['PROFILE_SECRET'] = settings.PROFILE_SECRET
+    flask_application.config['PROFILE_SAMPLE_RATE'] = settings.PROFILE_SAMPLE_RATE
+    flask_application.config['PROFILE_FOLDER'] = settings.PROFILE_FOLDER
+    flask_application.config['PROFILE_RETENTION'] = settings.PROFILE_RETENTION
+    flask_application.config['PAGE_DEFAULT_LIMIT'] = settings.PAGE_DEFAULT_LIMIT
+    flask_application.config['PAGE_MAX_LIMIT'] = settings.PAGE_MAX_LIMIT
+    flask_application.config['STREAM_BATCH_SIZE'] = settings.STREAM_BATCH_SIZE
+    flask_application.config['SEARCH_DEFAULT_LIMIT'] = settings.SEARCH_DEFAULT_LIMIT
+    flask_application.config['SEARCH_MAX_RESULTS'] = settings.SEARCH_MAX_RESULTS
+    flask_application.config['SEARCH_CANDIDATES'] = settings.SEARCH_CANDIDATES
+    flask_application.config['ARCHIVE_RETENTION_DAYS'] = settings.ARCHIVE_RETENTION_DAYS
+    flask_application.config['ARCHIVE_BATCH_SIZE'] = settings.ARCHIVE_BATCH_SIZE
 
     flask_application.config['APP_DATA_FOLDER'] = settings.APP_DATA_FOLDER
     flask_application.config['CORS_ORIGIN'] = settings.CORS_ORIGIN
@@ -63,6 +114,79 @@ def arguments_to_config(flask_application: Flask, **kwargs) -> Flask:
     return flask_application
 
 
+def engine_options_to_config(flask_application: Flask) -> Flask:
+    """ Builds SQLALCHEMY_ENGINE_OPTIONS from the pool settings, after
+        arguments were applied so they can change the database
+
+        :param flask.Flask flask_application:
+        :return: modifed flask application
+        :rtype: flask.Flask
+    """
+    config = flask_application.config
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        config['SQLALCHEMY_DATABASE_URI'],
+        pool_size=config['DATABASE_POOL_SIZE'],
+        max_overflow=config['DATABASE_MAX_OVERFLOW'],
+        pool_timeout=config['DATABASE_POOL_TIMEOUT'],
+        pool_recycle=config['DATABASE_POOL_RECYCLE'],
+        pool_pre_ping=config['DATABASE_POOL_PRE_PING'],
+        statement_cache_size=config['DATABASE_STATEMENT_CACHE_SIZE'])
+    return flask_application
+
+
+def replica_binds(flask_application: Flask) -> List[str]:
+    """ Adds a SQLALCHEMY_BINDS entry per replica URI
+
+        :param flask.Flask flask_application:
+        :return: bind keys of the replicas
+        :rtype: list
+    """
+    config = flask_application.config
+    binds = {key: uri for key, uri
+             in (config.get('SQLALCHEMY_BINDS') or {}).items()
+             if not key.startswith('replica_')}
+    keys: List[str] = []
+    for number, uri in enumerate(config['SQLALCHEMY_REPLICA_URIS']):
+        key = f'replica_{number}'
+        binds[key] = uri
+        keys.append(key)
+    config['SQLALCHEMY_BINDS'] = binds or None
+    return keys
+
+
+def dispose_engines(flask_application: Flask) -> None:
+    """ Drops every pooled connection, run in each gunicorn worker right
+        after the fork so no worker reuses a socket opened by the master
+
+        :param flask.Flask flask_application:
+    """
+    binds = [None] + list(flask_application.config.get('SQLALCHEMY_BINDS') or {})
+    with flask_application.app_context():
+        for bind in binds:
+            db.get_engine(flask_application, bind).dispose()
+
+
+def data_folder(flask_application: Flask, name: str) -> Optional[str]:
+    """ Absolute path of a folder inside APP_DATA_FOLDER, None for an empty
+        name
+    """
+    if not name:
+        return None
+    return os.path.join(
+        os.path.abspath(flask_application.config['APP_DATA_FOLDER']), name)
+
+
+def write_marks(flask_application: Flask) -> Optional[SqliteWriteMarks]:
+    """ Write marks shared by every worker when DATABASE_WRITE_MARKS is
+        sqlite, None keeps them per worker
+    """
+    config = flask_application.config
+    if config['DATABASE_WRITE_MARKS'] != 'sqlite':
+        return None
+    return SqliteWriteMarks(
+        data_folder(flask_application, config['DATABASE_WRITE_MARKS_FILE']))
+
+
 def touch(path: str) -> None:
     """ This is needed for windows as windows
         has no touch command
@@ -89,6 +213,23 @@ def initialize_api(flask_application: Flask) -> Flask:
         from .api import endpoints  # pylint: disable=unused-import,import-outside-toplevel
         api.init_app(blueprint)
         flask_application.register_blueprint(blueprint)
+        flask_application.before_request(request_metrics.start_request)
+        flask_application.after_request(request_metrics.finish_request)
+        # Registered last so the profile is taken inside the metrics timing
+        flask_application.before_request(request_profiler.start_request)
+        flask_application.after_request(request_profiler.finish_request)
+    config = flask_application.config
+    request_metrics.configure(
+        config['METRICS_ENABLED'],
+        server_timing=config['METRICS_SERVER_TIMING'],
+        folder=data_folder(flask_application, config['METRICS_FOLDER']),
+        flush_interval=config['METRICS_FLUSH_INTERVAL'])
+    request_profiler.configure(
+        config['PROFILE_ENABLED'],
+        secret=config['PROFILE_SECRET'],
+        sample_rate=config['PROFILE_SAMPLE_RATE'],
+        folder=data_folder(flask_application, config['PROFILE_FOLDER']),
+        retention=config['PROFILE_RETENTION'])
     return flask_application
 
 
@@ -102,7 +243,24 @@ def initialize_database(flask_application: Flask) -> Flask:
     """
     with flask_application.app_context():
         from .data import models  # pylint: disable=import-outside-toplevel
+        from .data.access import entity_cache  # pylint: disable=import-outside-toplevel
+        replicas = replica_binds(flask_application)
+        sqlite_profile.configure(
+            flask_application.config['SQLITE_PERFORMANCE_PROFILE'],
+            mmap_size=flask_application.config['SQLITE_MMAP_SIZE'],
+            cache_size=flask_application.config['SQLITE_CACHE_SIZE'],
+            busy_timeout=flask_application.config['SQLITE_BUSY_TIMEOUT'],
+            maintenance_interval=flask_application.config[
+                'SQLITE_MAINTENANCE_INTERVAL'])
         db.init_app(flask_application)
+        entity_cache.configure(
+            flask_application.config['ENTITY_CACHE_SIZE'],
+            flask_application.config['ENTITY_CACHE_TTL'])
+        replica_router.configure(
+            replicas,
+            flask_application.config['DATABASE_REPLICA_STRATEGY'],
+            flask_application.config['DATABASE_STICKY_SECONDS'],
+            write_marks(flask_application) if replicas else None)
 
         if flask_application.config['SQLALCHEMY_REBUILD']:
             db.drop_all()
@@ -112,6 +270,8 @@ def initialize_database(flask_application: Flask) -> Flask:
             dal = DatabaseAccess(models.Person)
             dal.audit_create(1, person)
             dal.save(person)
+        create_name_search(db.engine, models.Person.__table__,
+                           models.Person.search_columns)
 
     return flask_application
 
@@ -150,6 +310,7 @@ def initialize(flask_application: Flask, **kwargs) -> Flask:
     logger.info('>>>>>Initializing Application<<<<<')
     flask_application = settings_to_config(flask_application)
     flask_application = arguments_to_config(flask_application, **kwargs)
+    flask_application = engine_options_to_config(flask_application)
     flask_application = initialize_data(flask_application)
     flask_application = initialize_api(flask_application)
     return flask_application
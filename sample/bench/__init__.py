@@ -0,0 +1,28 @@
+""" Benchmarks
+
+    python3 -m sample.bench
+"""
+import time
+from typing import Callable
+
+__all__ = ['baseline', 'histogram', 'hotpath', 'load', 'tokens']
+
+
+def measure(func: Callable[[], object], iterations: int) -> dict:
+    """ Calls func iterations times and reports the throughput
+
+        :param func: work to time, called without arguments
+        :param int iterations: number of calls
+        :return: total seconds, operations per second and mean microseconds
+        :rtype: dict
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    seconds = time.perf_counter() - start
+    return {
+        'iterations': iterations,
+        'seconds': seconds,
+        'ops_per_second': iterations / seconds if seconds else float('inf'),
+        'mean_us': seconds / iterations * 1e6
+    }
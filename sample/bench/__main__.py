@@ -0,0 +1,66 @@
+""" Run the benchmarks and print a table of the results
+"""
+import argparse
+import sys
+
+from .baseline import load_results, regressions, save_results
+from .hotpath import benchmark_hotpath
+from .tokens import benchmark_signers
+
+SUITES = {
+    'signers': lambda arguments: benchmark_signers(arguments.iterations),
+    'hotpath': lambda arguments: benchmark_hotpath(
+        arguments.iterations, arguments.rows),
+}
+
+
+def print_results(results: dict) -> None:
+    """ One row per benchmark
+    """
+    print(f'{"benchmark":<24}{"ops/s":>14}{"mean µs":>12}')
+    for name, result in results.items():
+        print(f'{name:<24}{result["ops_per_second"]:>14,.0f}'
+              f'{result["mean_us"]:>12,.1f}')
+
+
+def main() -> None:
+    """ Parses arguments and runs the benchmarks, exits with 1 when a
+        benchmark regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(prog='python3 -m sample.bench')
+    parser.add_argument(
+        '--iterations', type=int, default=1000,
+        help='calls per benchmark')
+    parser.add_argument(
+        '--suite', choices=['all'] + list(SUITES), default='all',
+        help='benchmarks to run')
+    parser.add_argument(
+        '--rows', type=int, default=1000,
+        help='persons seeded for the hotpath round trips')
+    parser.add_argument(
+        '--output', help='write the results to this JSON file')
+    parser.add_argument(
+        '--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='allowed slowdown against the baseline, 0.2 is 20%%')
+    arguments = parser.parse_args()
+
+    results: dict = {}
+    for name, suite in SUITES.items():
+        if arguments.suite in ('all', name):
+            results.update(suite(arguments))
+    print_results(results)
+    if arguments.output:
+        save_results(results, arguments.output)
+    if arguments.baseline:
+        slower = regressions(
+            results, load_results(arguments.baseline), arguments.threshold)
+        for message in slower:
+            print(f'REGRESSION {message}', file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
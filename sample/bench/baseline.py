@@ -0,0 +1,39 @@
+""" Saving benchmark results and comparing them with a baseline
+"""
+import json
+from typing import Dict, List
+
+
+def save_results(results: Dict[str, dict], path: str) -> None:
+    """ Writes results as JSON
+    """
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    """ Reads results written by save_results
+    """
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def regressions(results: Dict[str, dict], baseline: Dict[str, dict],
+                threshold: float) -> List[str]:
+    """ Benchmarks whose mean time grew by more than threshold over the
+        baseline, benchmarks missing from either side are not compared
+
+        :param float threshold: allowed slowdown, 0.2 allows 20%
+        :return: one message per regression
+    """
+    messages: List[str] = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('mean_us'):
+            continue
+        change = result['mean_us'] / before['mean_us'] - 1
+        if change > threshold:
+            messages.append(
+                f'{name}: {before["mean_us"]:,.1f} µs -> '
+                f'{result["mean_us"]:,.1f} µs (+{change:.0%})')
+    return messages
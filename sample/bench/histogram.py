@@ -0,0 +1,70 @@
+""" Latency histogram with bounded memory
+"""
+import math
+from collections import Counter
+from typing import Iterable
+
+# Buckets per doubling of latency, 32 keeps every percentile within ~2%
+BUCKETS_PER_DOUBLING: int = 32
+
+
+class LatencyHistogram:
+    """ Log bucketed latencies in microseconds
+
+        Memory grows with the spread of latencies, not with the number of
+        samples, so every client thread can keep its own histogram without
+        locking and they are merged at the end.
+    """
+
+    def __init__(self):
+        self.buckets: Counter = Counter()
+        self.count: int = 0
+        self.total_us: float = 0.0
+        self.max_us: float = 0.0
+
+    def record(self, latency_us: float) -> None:
+        """ Adds one sample
+        """
+        latency_us = max(latency_us, 1.0)
+        self.buckets[round(math.log2(latency_us) * BUCKETS_PER_DOUBLING)] += 1
+        self.count += 1
+        self.total_us += latency_us
+        self.max_us = max(self.max_us, latency_us)
+
+    def merge(self, others: Iterable['LatencyHistogram']) -> 'LatencyHistogram':
+        """ Adds the samples of other histograms to this one
+        """
+        for other in others:
+            self.buckets.update(other.buckets)
+            self.count += other.count
+            self.total_us += other.total_us
+            self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, percent: float) -> float:
+        """ Latency below which percent of the samples fall, 0 when empty
+        """
+        if not self.count:
+            return 0.0
+        if percent >= 100:
+            return self.max_us
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** (bucket / BUCKETS_PER_DOUBLING), self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict:
+        """ Count, mean, p50/p90/p99/p99.9 and max in milliseconds
+        """
+        return {
+            'count': self.count,
+            'mean_ms': self.total_us / self.count / 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(50) / 1000,
+            'p90_ms': self.percentile(90) / 1000,
+            'p99_ms': self.percentile(99) / 1000,
+            'p99.9_ms': self.percentile(99.9) / 1000,
+            'max_ms': self.max_us / 1000
+        }
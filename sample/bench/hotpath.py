@@ -0,0 +1,130 @@
+""" Request hot path: conversion, tokens, marshaling and test client round
+    trips against a seeded SQLite database of its own
+"""
+import os
+import tempfile
+from typing import Dict
+
+from flask import Flask
+from flask_restplus import marshal
+
+from ..api.authentication import TokenFactory
+from ..api.endpoints.person import ENTITY
+from ..data.access import DatabaseAccess, PersonAccess
+from ..data.models import Person
+from . import measure
+
+SAMPLE = {
+    'first_name': 'Ada',
+    'middle_name': 'King',
+    'last_name': 'Lovelace',
+    'created_on': '2020-01-01T10:00:00',
+    'active': 'true'
+}
+
+
+def benchmark_conversion(iterations: int = 1000) -> Dict[str, dict]:
+    """ DatabaseAccess.dict_to_entity of a full person
+    """
+    access = DatabaseAccess(Person)
+    return {'dict_to_entity': measure(
+        lambda: access.dict_to_entity(Person(), SAMPLE), iterations)}
+
+
+def benchmark_tokens(iterations: int = 1000) -> Dict[str, dict]:
+    """ TokenFactory.make_token and valid_token, with and without the
+        verified token cache
+    """
+    factory = TokenFactory()
+    token = factory.make_token()
+
+    def uncached():
+        factory.cache.discard(token)
+        return factory.valid_token(token)
+
+    return {
+        'token.make': measure(factory.make_token, iterations),
+        'token.valid': measure(lambda: factory.valid_token(token), iterations),
+        'token.valid_uncached': measure(uncached, iterations)
+    }
+
+
+def benchmark_marshal(flask_application: Flask, iterations: int = 1000,
+                      sizes=(1, 100, 10000)) -> Dict[str, dict]:
+    """ Marshaling lists of persons with ENTITY, fewer iterations are run for
+        the larger lists
+    """
+    person = Person('Ada', 'Lovelace', 'King')
+    PersonAccess().audit_create(1, person)
+    person.id = 1
+    results: Dict[str, dict] = {}
+    with flask_application.test_request_context():
+        for size in sizes:
+            rows = [person] * size
+            results[f'marshal.{size}'] = measure(
+                lambda rows=rows: marshal(rows, ENTITY),
+                max(1, min(iterations, iterations * 100 // size)))
+    return results
+
+
+def benchmark_round_trips(flask_application: Flask, iterations: int = 1000
+                          ) -> Dict[str, dict]:
+    """ Every person verb through the test client, the status code of the
+        last call is kept with each result
+    """
+    client = flask_application.test_client()
+    prefix = flask_application.config['FLASK_URL_PREFIX']
+    headers = {'Authorization': client.get(f'{prefix}/token').json['token']}
+    body = {'first_name': 'Ada', 'last_name': 'Lovelace'}
+    calls = {
+        'GET /person': lambda: client.get(
+            f'{prefix}/person?limit=100', headers=headers),
+        'GET /person?fields': lambda: client.get(
+            f'{prefix}/person?limit=100&fields=id,first_name,last_name',
+            headers=headers),
+        'GET /person/<id>': lambda: client.get(
+            f'{prefix}/person/2', headers=headers),
+        'GET /person/search': lambda: client.get(
+            f'{prefix}/person/search?q=last%2012', headers=headers),
+        'POST /person': lambda: client.post(
+            f'{prefix}/person', headers=headers, json=body),
+        'PUT /person/<id>': lambda: client.put(
+            f'{prefix}/person/3', headers=headers, json=body),
+        'DELETE /person/<id>': lambda: client.delete(
+            f'{prefix}/person/4', headers=headers),
+    }
+    results: Dict[str, dict] = {}
+    for name, call in calls.items():
+        results[name] = measure(call, iterations)
+        results[name]['status'] = call().status_code
+    return results
+
+
+def seeded_application(rows: int = 1000) -> Flask:
+    """ Application on a new SQLite file holding rows persons, the local
+        database is left alone
+    """
+    from ..app import main  # pylint: disable=import-outside-toplevel
+    path = os.path.join(tempfile.mkdtemp(prefix='sample-bench-'), 'bench.db')
+    flask_application = main(
+        UNIT_TEST=True,
+        SQL_LITE_DATABASE_PATH=path,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}')
+    with flask_application.app_context():
+        PersonAccess().bulk_create(1, [
+            {'first_name': f'First {number}', 'last_name': f'Last {number}'}
+            for number in range(rows)])
+    return flask_application
+
+
+def benchmark_hotpath(iterations: int = 1000, rows: int = 1000
+                      ) -> Dict[str, dict]:
+    """ Every hot path benchmark
+    """
+    flask_application = seeded_application(rows)
+    results: Dict[str, dict] = {}
+    results.update(benchmark_conversion(iterations))
+    results.update(benchmark_tokens(iterations))
+    results.update(benchmark_marshal(flask_application, iterations))
+    results.update(benchmark_round_trips(flask_application, iterations))
+    return results
@@ -0,0 +1,338 @@
+""" End to end load test of the gunicorn deployment
+
+    python3 -m sample.bench.load --workers=4 --clients=32 --duration=30
+
+    Starts ``python -m sample`` on a free local port with the current
+    environment (a new APP_DATA_FOLDER and, unless set, the shared SQLite
+    token registry), seeds persons through the bulk endpoint and drives a
+    weighted mix of calls from concurrent keep-alive clients. Everything
+    runs on this machine, nothing leaves it.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from .. import settings
+from .baseline import save_results
+from .histogram import LatencyHistogram
+
+OPERATIONS: Tuple[str, ...] = (
+    'token', 'list', 'get', 'search', 'create', 'update', 'delete')
+DEFAULT_MIX: str = \
+    'token=1,list=4,get=10,search=4,create=2,update=2,delete=1'
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """ Operation weights from ``name=weight,...``
+
+        :raises ValueError: on an unknown operation or a bad weight
+    """
+    mix: Dict[str, int] = {}
+    for part in filter(None, text.split(',')):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation {name}, '
+                             f'use one of {", ".join(OPERATIONS)}')
+        mix[name] = int(weight or 1)
+        if mix[name] < 0:
+            raise ValueError(f'Weight of {name} is negative')
+    if not any(mix.values()):
+        raise ValueError('Every weight is 0')
+    return mix
+
+
+def free_port() -> int:
+    """ A local port nothing listens on right now
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+class Server:
+    """ ``python -m sample`` running in a child process
+
+        :param int port: local port to bind
+        :param list arguments: extra python -m sample flags, e.g.
+            ``--workers=4``
+        :param str data_folder: APP_DATA_FOLDER of the server
+    """
+
+    def __init__(self, port: int, arguments: List[str], data_folder: str):
+        self.port = port
+        self.arguments = arguments
+        self.data_folder = data_folder
+        self.log_path = os.path.join(data_folder, 'server.log')
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> 'Server':
+        environment = dict(os.environ, APP_DATA_FOLDER=self.data_folder)
+        environment.setdefault('TOKEN_REGISTRY', 'sqlite')
+        with open(self.log_path, 'wb') as log:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'sample',
+                 f'--bind=127.0.0.1:{self.port}'] + self.arguments,
+                stdout=log, stderr=subprocess.STDOUT, env=environment)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def wait_ready(self, prefix: str, timeout: float = 60) -> None:
+        """ Blocks until the status endpoint answers
+
+            :raises RuntimeError: when the server exits or does not answer
+                within timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f'Server exited with {self.process.returncode}, '
+                    f'see {self.log_path}')
+            try:
+                connection = http.client.HTTPConnection(
+                    '127.0.0.1', self.port, timeout=2)
+                connection.request('GET', f'{prefix}/status')
+                if connection.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f'Server did not start, see {self.log_path}')
+
+
+def call(connection: http.client.HTTPConnection, method: str, path: str,
+         headers: dict = None, body=None) -> Tuple[int, bytes]:
+    """ One request on a keep-alive connection
+    """
+    headers = dict(headers or {})
+    payload = None
+    if body is not None:
+        payload = json.dumps(body).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    connection.request(method, path, body=payload, headers=headers)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def seed(host: str, port: int, prefix: str, rows: int,
+         batch_size: int = 500) -> List[int]:
+    """ Creates rows synthetic persons
+
+        :return: their ids
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    _, body = call(connection, 'GET', f'{prefix}/token')
+    headers = {'Authorization': json.loads(body)['token']}
+    ids: List[int] = []
+    for start in range(0, rows, batch_size):
+        batch = [{'first_name': f'First {number}',
+                  'middle_name': f'Middle {number}',
+                  'last_name': f'Last {number}'}
+                 for number in range(start, min(rows, start + batch_size))]
+        status, body = call(connection, 'POST', f'{prefix}/person/bulk',
+                            headers, batch)
+        if status != 201:
+            raise RuntimeError(f'Seeding failed with {status}: {body[:200]}')
+        ids.extend(entity_id for entity_id in json.loads(body)['ids']
+                   if entity_id is not None)
+    connection.close()
+    return ids
+
+
+class Client(threading.Thread):
+    """ One simulated client sending requests back to back until deadline
+
+        Latencies, error responses (4xx/5xx) and failures (no response) are
+        kept per client and per operation so clients never share state while
+        running.
+    """
+
+    def __init__(self, host: str, port: int, prefix: str,
+                 mix: Dict[str, int], ids: List[int], deadline: float,
+                 seed_value: int):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.ids = ids
+        self.deadline = deadline
+        self.random = random.Random(seed_value)
+        self.created: List[int] = []
+        self.histograms: Dict[str, LatencyHistogram] = {
+            name: LatencyHistogram() for name in OPERATIONS}
+        self.errors: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.token: str = None
+
+    def request_for(self, operation: str) -> Tuple[str, str, Optional[dict]]:
+        """ Method, path and body of an operation
+        """
+        prefix = self.prefix
+        body = {'first_name': 'Load', 'last_name': f'Test {self.random.random()}'}
+        if operation == 'token':
+            return 'GET', f'{prefix}/token', None
+        if operation == 'list':
+            return 'GET', f'{prefix}/person?limit=100', None
+        if operation == 'search':
+            return 'GET', f'{prefix}/person/search?q=' \
+                f'last%20{self.random.randint(1, 99)}', None
+        if operation == 'create':
+            return 'POST', f'{prefix}/person', body
+        if operation == 'update':
+            return 'PUT', f'{prefix}/person/{self.random.choice(self.ids)}', body
+        if operation == 'delete':
+            entity_id = self.created.pop() if self.created \
+                else self.random.choice(self.ids)
+            return 'DELETE', f'{prefix}/person/{entity_id}', None
+        return 'GET', f'{prefix}/person/{self.random.choice(self.ids)}', None
+
+    def run(self) -> None:
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        _, body = call(connection, 'GET', f'{self.prefix}/token')
+        self.token = json.loads(body)['token']
+        while time.monotonic() < self.deadline:
+            operation = self.random.choices(self.operations, self.weights)[0]
+            method, path, payload = self.request_for(operation)
+            start = time.perf_counter()
+            try:
+                status, body = call(connection, method, path,
+                                    {'Authorization': self.token}, payload)
+            except (OSError, http.client.HTTPException):
+                self.failures[operation] += 1
+                connection.close()
+                connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=60)
+                continue
+            self.histograms[operation].record(
+                (time.perf_counter() - start) * 1e6)
+            if status >= 400:
+                self.errors[operation] += 1
+            elif operation == 'token':
+                self.token = json.loads(body)['token']
+            elif operation == 'create':
+                self.created.append(json.loads(body)['id'])
+        connection.close()
+
+
+def run_load(host: str, port: int, prefix: str, mix: Dict[str, int],
+             ids: List[int], clients: int, duration: float,
+             seed_value: int = 0) -> Dict[str, dict]:
+    """ Runs clients for duration seconds
+
+        :return: summary per operation plus "total": count, errors,
+            error_rate, requests_per_second and the latency percentiles
+    """
+    deadline = time.monotonic() + duration
+    threads = [Client(host, port, prefix, mix, ids, deadline,
+                      seed_value + number)
+               for number in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    results: Dict[str, dict] = {}
+    histograms: Dict[str, LatencyHistogram] = {}
+    errors: Counter = Counter()
+    failures: Counter = Counter()
+    for operation in mix:
+        histograms[operation] = LatencyHistogram().merge(
+            thread.histograms[operation] for thread in threads)
+        for thread in threads:
+            errors[operation] += thread.errors[operation]
+            failures[operation] += thread.failures[operation]
+    histograms['total'] = LatencyHistogram().merge(histograms.values())
+    errors['total'] = sum(errors.values())
+    failures['total'] = sum(failures.values())
+    for operation, histogram in histograms.items():
+        summary = histogram.summary()
+        attempts = summary['count'] + failures[operation]
+        failed = errors[operation] + failures[operation]
+        summary.update({
+            'errors': failed,
+            'error_rate': failed / attempts if attempts else 0.0,
+            'requests_per_second': summary['count'] / elapsed
+        })
+        results[operation] = summary
+    return results
+
+
+def print_report(results: Dict[str, dict]) -> None:
+    """ One row per operation
+    """
+    print(f'{"operation":<10}{"req/s":>10}{"errors":>9}{"p50 ms":>10}'
+          f'{"p90 ms":>10}{"p99 ms":>10}{"p99.9 ms":>10}{"max ms":>10}')
+    for name, result in results.items():
+        print(f'{name:<10}{result["requests_per_second"]:>10,.1f}'
+              f'{result["error_rate"]:>9.2%}{result["p50_ms"]:>10.2f}'
+              f'{result["p90_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+              f'{result["p99.9_ms"]:>10.2f}{result["max_ms"]:>10.2f}')
+
+
+def main() -> None:
+    """ Parses arguments, starts the server, seeds it and runs the load
+    """
+    parser = argparse.ArgumentParser(
+        prog='python3 -m sample.bench.load',
+        description='Extra arguments are passed to python -m sample, '
+                    'e.g. --workers=4 --worker-class=gthread')
+    parser.add_argument('--clients', type=int, default=16,
+                        help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='seconds to run')
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='persons seeded before the run')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'operation weights, default {DEFAULT_MIX}')
+    parser.add_argument('--port', type=int, default=0,
+                        help='local port of the server, default a free one')
+    parser.add_argument('--no-server', action='store_true',
+                        help='load a server already listening on --port')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed of the clients')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    arguments, server_arguments = parser.parse_known_args()
+    mix = arguments.mix
+    port = arguments.port or free_port()
+    prefix = settings.FLASK_URL_PREFIX
+
+    def load() -> Dict[str, dict]:
+        ids = seed('127.0.0.1', port, prefix, max(arguments.rows, 1))
+        return run_load('127.0.0.1', port, prefix, mix, ids,
+                        arguments.clients, arguments.duration, arguments.seed)
+
+    if arguments.no_server:
+        results = load()
+    else:
+        data_folder = tempfile.mkdtemp(prefix='sample-load-')
+        with Server(port, server_arguments, data_folder) as server:
+            server.wait_ready(prefix)
+            results = load()
+    print_report(results)
+    if arguments.output:
+        save_results(results, arguments.output)
+
+
+if __name__ == '__main__':
+    main()
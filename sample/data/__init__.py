@@ -3,6 +3,7 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import create_engine
+from .routing import RoutingSQLAlchemy
 
-__all__ = ['models', 'access']
-db: SQLAlchemy = SQLAlchemy()
+__all__ = ['models', 'access', 'pool', 'routing', 'search', 'sqlite']
+db: SQLAlchemy = RoutingSQLAlchemy()
@@ -1,4 +1,10 @@
 """ Data Access Layers
 """
-from .accessible import DatabaseAccess
+from .accessible import BulkResult, DatabaseAccess, StaleEntity
+from .archive import ARCHIVED, archive_inactive
+from .cache import EntityCache, entity_cache
+from .converter import Converter, InvalidEntity, converter_for
+from .filtering import InvalidFilter
+from .pagination import InvalidPage, Page
 from .person import PersonAccess
+from .person_archive import PersonArchiveAccess
@@ -2,13 +2,22 @@
 """
 
 from abc import ABC
-from datetime import date, datetime
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
-from dateutil import parser
+from sqlalchemy import DateTime, and_, literal, select, union
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm.exc import NoResultFound
 
 from .. import db
 from ..models import Model
+from ..routing import ReplicaRouter, replica_router
+from ..search import InvalidSearch, name_search, search_words
+from .cache import EntityCache, entity_cache
+from .converter import Converter, InvalidEntity, converter_for
+from .filtering import filter_clauses, parse_filter_key
+from .pagination import (InvalidPage, Page, after_clause, decode_cursor,
+                         encode_cursor, parse_sort)
 
 
 class DataAccess(ABC):  # pylint: disable=too-few-public-methods
@@ -28,25 +37,314 @@ class DataAccess(ABC):  # pylint: disable=too-few-public-methods
     """
 
 
+class StaleEntity(Exception):
+    """ Raised when an entity changed since the version the caller expected
+    """
+
+
+class BulkResult:  # pylint: disable=too-few-public-methods
+    """ Outcome of a bulk operation
+
+        :param list ids: one id per submitted row, None where the row failed
+        :param list errors: ``{'index': int, 'message': str}`` for each
+            failed row
+    """
+
+    def __init__(self, ids: List[Optional[int]], errors: List[dict]):
+        self.ids = ids
+        self.errors = errors
+
+
 class DatabaseAccess(DataAccess):
     """ Database Access
+
+        Reads run on a replica picked by the router when replicas are
+        configured, writes always run on the primary.
     """
+    bulk_batch_size: int = 500
+    # Field name to the filter operators a collection accepts, see
+    # filtering.filter_clauses. Only list indexed fields.
+    filterable: Dict[str, Tuple[str, ...]] = {}
+    # Field to the field it has to be filtered with, for the later columns
+    # of a composite index.
+    filter_requires: Dict[str, str] = {}
+    cache: EntityCache = entity_cache
+    router: ReplicaRouter = replica_router
+    # Reads only see active rows unless asked for inactive ones, see scope
+    active_only: bool = True
+    # Table soft deleted rows are moved to by archive, None to keep them
+    archive_model: Model = None
 
     def __init__(
             self,
             model: Model = None):
         self.model = model
 
-    def get(self, entity_id: int = None):
-        """ Here
+    def scope(self, include_inactive: bool = False,
+              filters: Dict[str, str] = None) -> list:
+        """ WHERE clauses every read starts from: only active rows, unless
+            include_inactive is set, the model has no active column or the
+            filters already name active
+
+            :param bool include_inactive: read soft deleted rows too
+            :param dict filters: whitelisted filters of the read
+            :rtype: list
         """
-        result = self.model.query.filter(self.model.id == entity_id).first() \
-            if entity_id else self.model.query.all()
+        if include_inactive or not self.active_only \
+                or 'active' not in self.model.__table__.columns:
+            return []
+        if filters and any(parse_filter_key(key)[0] == 'active'
+                           for key in filters):
+            return []
+        return [self.model.active.is_(True)]
+
+    def get(self, entity_id: int = None, include_inactive: bool = False):
+        """ One entity by id, every entity when entity_id is None
+
+            :param bool include_inactive: read soft deleted rows too
+            :raises NoResultFound: when there is no such entity
+        """
+        query = self.model.query.filter(*self.scope(include_inactive))
+        with self.router.reading(db):
+            result = query.filter(self.model.id == entity_id).first() \
+                if entity_id else query.all()
         if not result and entity_id:
             raise NoResultFound()
 
         return result
 
+    def cache_key(self, entity_id: int) -> tuple:
+        """ Key of an entity in the entity cache
+        """
+        return (self.model.__tablename__, entity_id)
+
+    def entity_to_values(self, entity: Model) -> dict:
+        """ Column values of an entity keyed by column name
+        """
+        return {column.key: getattr(entity, column.key)
+                for column in self.model.__table__.columns}
+
+    def get_values(self, entity_id: int, fields: Sequence[str] = None,
+                   include_inactive: bool = False) -> dict:
+        """ Column values of one entity, read through the entity cache
+
+            The cache holds whole rows so one read serves every field set,
+            without a cache only fields, id and modified_on are selected.
+
+            :param list fields: columns needed, None for every column
+            :param bool include_inactive: read a soft deleted row too
+            :raises NoResultFound: when there is no such entity
+        """
+        scope = self.scope(include_inactive)
+        if fields is not None and not self.cache.max_size:
+            columns = [self.model.__table__.columns[name]
+                       for name in self.projected(fields, 'modified_on')]
+            with self.router.reading(db):
+                row = db.session.query(*columns).filter(  # pylint: disable=E1101
+                    self.model.id == entity_id, *scope).first()
+            if row is None:
+                raise NoResultFound()
+            return row._asdict()
+        key = self.cache_key(entity_id)
+        values = self.cache.get(key)
+        if values is None:
+            # Cached whatever its state, scoped readers check active below
+            values = self.entity_to_values(
+                self.get(entity_id, include_inactive=True))
+            self.cache.put(key, values)
+        if scope and not values.get('active'):
+            raise NoResultFound()
+        return values
+
+    def projected(self, fields: Sequence[str], *required: str) -> List[str]:
+        """ Column names of fields plus the id and required columns, names
+            that are not columns are left out
+        """
+        columns = self.model.__table__.columns
+        names: List[str] = [column.name for column in
+                            self.model.__table__.primary_key.columns]
+        for name in (*fields, *required):
+            if name in columns and name not in names:
+                names.append(name)
+        return names
+
+    def projection(self, fields: Sequence[str] = None,
+                   *required: str) -> list:
+        """ Query options loading only fields plus required columns into the
+            entities, see projected
+
+            :param list fields: columns needed, None for every column
+            :rtype: list
+        """
+        if fields is None:
+            return []
+        return [load_only(*self.projected(fields, *required))]
+
+    def sort_orders(self) -> List[Tuple[str, ...]]:
+        """ Field lists a page can be sorted on: the primary key and every
+            leading run of an index's columns, so keyset pages are read in
+            index order and stay cheap.
+        """
+        table = self.model.__table__
+        orders: List[Tuple[str, ...]] = [
+            tuple(column.name for column in table.primary_key.columns)]
+        for index in table.indexes:
+            names = [column.name for column in index.columns]
+            for length in range(1, len(names) + 1):
+                if tuple(names[:length]) not in orders:
+                    orders.append(tuple(names[:length]))
+        return orders
+
+    def filter_clauses(self, filters: Dict[str, str] = None) -> list:
+        """ WHERE clauses of whitelisted filters, see filterable
+
+            :param dict filters: query argument name to value
+            :raises InvalidFilter: on a filter that is not whitelisted
+        """
+        if not filters:
+            return []
+        return filter_clauses(self.model.__table__.columns, self.filterable,
+                              filters, self.dict_to_values,
+                              self.filter_requires)
+
+    def page(self, limit: int, after: str = None, sort: str = 'id',
+             filters: Dict[str, str] = None,
+             fields: Sequence[str] = None,
+             include_inactive: bool = False) -> Page:
+        """ Reads one page of entities using keyset pagination
+
+            :param int limit: maximum number of entities on the page
+            :param str after: cursor of the previous page, None for the first
+            :param str sort: comma separated indexed fields to sort on, all
+                ascending or all prefixed with ``-`` for descending, ties are
+                broken on id
+            :param dict filters: whitelisted filters, see filter_clauses
+            :param list fields: columns to load, None for every column, the
+                sort columns are always loaded
+            :param bool include_inactive: list soft deleted rows too, see
+                scope
+            :return: entities and the cursor of the next page
+            :rtype: Page
+            :raises InvalidPage: on a bad limit, sort or cursor
+            :raises InvalidFilter: on a filter that is not whitelisted
+        """
+        if limit < 1:
+            raise InvalidPage('Limit must be a positive number')
+        order = parse_sort(sort)
+        sort_fields = [field for field, _ in order]
+        descending = order[0][1]
+        id_column = self.model.id
+        if any(direction != descending for _, direction in order):
+            raise InvalidPage('Every sort field has to have the same direction')
+        leading = sort_fields[:-1] if len(sort_fields) > 1 and \
+            sort_fields[-1] == id_column.key else sort_fields
+        if tuple(leading) not in self.sort_orders():
+            raise InvalidPage(f'Can not sort on {",".join(sort_fields)}')
+        columns = [self.model.__table__.columns[field] for field in sort_fields]
+        query = self.model.query \
+            .options(*self.projection(fields, *sort_fields)) \
+            .filter(*self.scope(include_inactive, filters),
+                    *self.filter_clauses(filters))
+        if after:
+            values, entity_id = decode_cursor(after, sort, columns)
+            query = query.filter(
+                after_clause(columns, id_column, values, entity_id, descending))
+        if id_column.key not in sort_fields:
+            columns.append(id_column)
+        with self.router.reading(db):
+            items = query.order_by(*[
+                column.desc() if descending else column.asc()
+                for column in columns]).limit(limit + 1).all()
+
+        next_cursor: str = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(
+                sort, [getattr(last, field) for field in sort_fields], last.id)
+        return Page(items, next_cursor)
+
+    def search(self, query: str, limit: int, offset: int = 0,
+               max_results: int = 50, candidates: int = 200,
+               include_inactive: bool = False) -> Page:
+        """ Entities whose search_columns match every word of query, best
+            match first, see data.search
+
+            Ranked results can not be read by keyset, pages are taken by
+            offset instead and never reach past max_results.
+
+            :param str query: words to search for, each may be a prefix
+            :param int limit: maximum number of entities on the page
+            :param int offset: matches skipped
+            :param int max_results: matches that can be paged through
+            :param int candidates: best matches kept per query, see
+                NameSearch.statement
+            :param bool include_inactive: find soft deleted rows too
+            :return: entities and the offset of the next page as cursor
+            :rtype: Page
+            :raises InvalidSearch: on a query without words or a model with
+                nothing to search
+            :raises InvalidPage: on a bad limit or offset
+        """
+        columns = self.model.search_columns
+        if not columns:
+            raise InvalidSearch(f'{self.model.__tablename__} is not searchable')
+        words = search_words(query)
+        if limit < 1 or offset < 0:
+            raise InvalidPage('Limit must be positive and offset not negative')
+        limit = min(limit, max_results - offset)
+        if limit < 1:
+            return Page([])
+        table = self.model.__table__
+        search = name_search(db.get_engine().dialect.name, table, columns)
+        where = '' if not self.scope(include_inactive) \
+            else f'{table.name}.active IS true'
+        statement, parameters = search.statement(
+            words, limit + 1, offset, where=where,
+            candidates=max(candidates, max_results + 1))
+        with self.router.reading(db):
+            items = self.model.query.from_statement(statement) \
+                .params(**parameters).all()
+
+        next_cursor: str = None
+        if len(items) > limit:
+            items = items[:limit]
+            if offset + limit < max_results:
+                next_cursor = str(offset + limit)
+        return Page(items, next_cursor)
+
+    def stream(self, batch_size: int = 1000, filters: Dict[str, str] = None,
+               fields: Sequence[str] = None,
+               include_inactive: bool = False) -> Iterator[Model]:
+        """ Iterates every entity ordered by id while only holding one batch
+            of rows in memory, a server side cursor is used where the driver
+            supports one.
+
+            :param int batch_size: rows fetched from the database at a time
+            :param dict filters: whitelisted filters, see filter_clauses
+            :param list fields: columns to load, None for every column
+            :param bool include_inactive: stream soft deleted rows too
+            :raises InvalidFilter: right away, before anything is read
+        """
+        query = self.model.query \
+            .options(*self.projection(fields)) \
+            .filter(*self.scope(include_inactive, filters),
+                    *self.filter_clauses(filters)) \
+            .order_by(self.model.id) \
+            .execution_options(stream_results=True) \
+            .yield_per(batch_size)
+
+        def rows() -> Iterator[Model]:
+            with self.router.reading(db):
+                yield from query
+        return rows()
+
+    @property
+    def converter(self) -> Converter:
+        """ Cached dict to entity conversion plan of the model
+        """
+        return converter_for(self.model)
+
     def dict_to_entity(self, entity: Model, data: dict) -> None:
         """ Implement the conversion needed from
             dict to entity, entity will need to be
@@ -54,58 +352,288 @@ class DatabaseAccess(DataAccess):
             entity is mutable,
                 entity.<field> = data['field']
         """
-        for column in entity.__table__.columns:
-            field: str = column.name
-            print(column)
-            if field in dir(Model) or field == 'id':
+        self.converter.apply(entity, data)
+
+    def dict_to_values(self, data: dict) -> dict:
+        """ Column values found in data, converted to the column's python
+            type, keyed by column name
+        """
+        return self.converter.to_values(data)
+
+    def validate_values(self, values: dict, partial: bool = False) -> None:
+        """ Checks values against the table before they are written
+
+            :param dict values: column values
+            :param bool partial: only check the columns present in values,
+                used for updates
+            :raises InvalidEntity: on a missing required column, a value that
+                is not of its column's type or a string longer than its
+                column allows
+        """
+        converter = self.converter
+        for column in self.model.__table__.columns:
+            if partial and column.name not in values:
                 continue
-            python_type: type = column.type.impl.python_type \
-                if hasattr(column.type, 'impl') else column.type.python_type
-            if field not in data.keys():
+            value = values.get(column.name)
+            if value is None:
+                if not column.nullable and not column.primary_key \
+                        and column.default is None \
+                        and column.server_default is None:
+                    raise InvalidEntity(f'{column.name} is required')
                 continue
-            value = data[field]
-            if python_type is datetime or python_type is date:
-                if value:
-                    value = parser.parse(str(value))
-            setattr(entity, field, value)
+            converter.check_type(column.name, value)
+            length: int = getattr(column.type, 'length', None)
+            if length and isinstance(value, str) and len(value) > length:
+                raise InvalidEntity(
+                    f'{column.name} is longer than {length} characters')
+
+    def bulk_create(self, user_id: int, rows: List[dict]) -> BulkResult:
+        """ Creates many entities in one transaction
 
-    def create(self, user_id: int, data: dict):
-        """ Create
+            Audit fields are computed once for the whole batch. Where the
+            database can return generated keys (RETURNING) rows are written
+            with multi-row INSERTs, otherwise one INSERT per row is issued on
+            the same connection. Invalid rows are reported and skipped, the
+            rest are still created.
+
+            :param int user_id: id of the person creating the rows
+            :param list rows: one dict per entity
+            :rtype: BulkResult
+        """
+        audit: dict = self.audit_create_values(user_id)
+        ids: List[Optional[int]] = [None] * len(rows)
+        errors: List[dict] = []
+        # Multi-row INSERTs need the same columns on every row.
+        shapes: Dict[frozenset, list] = {}
+        for index, values in self.converter.to_values_many(rows, errors):
+            values.update(audit)
+            try:
+                self.validate_values(values)
+            except InvalidEntity as error:
+                errors.append({'index': index, 'message': str(error)})
+                continue
+            shapes.setdefault(frozenset(values), []).append((index, values))
+        errors.sort(key=lambda error: error['index'])
+
+        table = self.model.__table__
+        connection = db.session.connection()  # pylint: disable=E1101
+        dialect = connection.dialect
+        for shape in shapes.values():
+            if dialect.implicit_returning and dialect.supports_multivalues_insert:
+                for start in range(0, len(shape), self.bulk_batch_size):
+                    batch = shape[start:start + self.bulk_batch_size]
+                    result = connection.execute(
+                        table.insert()
+                        .values([values for _, values in batch])
+                        .returning(table.c.id))
+                    for (index, _), row in zip(batch, result.fetchall()):
+                        ids[index] = row[0]
+            else:
+                statement = table.insert()
+                for index, values in shape:
+                    ids[index] = connection.execute(
+                        statement, values).inserted_primary_key[0]
+        db.session.commit()  # pylint: disable=E1101
+        self.router.record_write()
+        return BulkResult(ids, errors)
+
+    def create(self, user_id: int, data: dict) -> Model:
+        """ Creates an entity with a single INSERT
+
+            The stored row comes back from the INSERT itself where the
+            database can return it (RETURNING), otherwise it is made of the
+            inserted values and the generated key, it is never read again.
+
+            :param int user_id: id of the person creating the entity
+            :param dict data: fields of the entity
+            :return: detached entity holding the stored row
+            :raises InvalidEntity: on a missing or invalid field
+        """
+        values = self.dict_to_values(data)
+        values.update(self.audit_create_values(user_id))
+        self.validate_values(values)
+        table = self.model.__table__
+        statement = table.insert().values(**values)
+        connection = db.session.connection()  # pylint: disable=E1101
+        if connection.dialect.implicit_returning:
+            row = dict(connection.execute(
+                statement.returning(*table.columns)).first())
+        else:
+            result = connection.execute(statement)
+            row = {column.name: None for column in table.columns}
+            row.update(result.last_inserted_params())
+            row.update(zip(
+                [column.name for column in table.primary_key.columns],
+                result.inserted_primary_key))
+        db.session.commit()  # pylint: disable=E1101
+        self.router.record_write()
+        return self.values_to_entity(row)
+
+    def values_to_entity(self, values: dict) -> Model:
+        """ Entity holding column values, not attached to the session
         """
         entity = self.model()
-        self.dict_to_entity(entity, data)
-        self.audit_create(user_id, entity)
-        self.save(entity)
-        return self.model.query.filter(self.model.id == entity.id).first()
+        for key, value in values.items():
+            setattr(entity, key, value)
+        return entity
 
-    def update(self, user_id: int, entity_id: int, data: dict) -> Model:
-        """ update entity based on entity_id
+    def exists(self, entity_id: int, *criteria) -> bool:
+        """ True when a row with the id, matching criteria, is stored, read
+            from the primary so a write that just failed is checked against
+            current data
         """
-        entity = self.model.query.filter(self.model.id == entity_id).first()
-        if not entity:
-            raise NoResultFound()
-        self.dict_to_entity(entity, data)
-        self.audit_modify(user_id, entity)
-        self.save(entity)
+        return db.session.query(self.model.id).filter(  # pylint: disable=E1101
+            self.model.id == entity_id, *criteria).first() is not None
+
+    def bulk_criteria(self, ids: List[int] = None, where: dict = None) -> list:
+        """ WHERE clauses selecting the rows of a bulk operation, ids are
+            split into IN lists of at most bulk_batch_size
+
+            :param list ids: ids of the rows
+            :param dict where: column name to value, rows must match all
+            :return: one clause per statement to run
+            :raises InvalidEntity: when neither ids nor where is given or
+                where names an unknown column
+        """
+        if not ids and not where:
+            raise InvalidEntity('Either ids or a filter is required')
+        table = self.model.__table__
+        clauses = []
+        if where:
+            unknown = [field for field in where if field not in table.columns]
+            if unknown:
+                raise InvalidEntity(f'Can not filter on {", ".join(unknown)}')
+            values = self.dict_to_values(where)
+            for field, value in values.items():
+                self.converter.check_type(field, value)
+            clauses = [table.c[field] == value for field, value in values.items()]
+        if not ids:
+            return [and_(*clauses)]
+        return [
+            and_(table.c.id.in_(ids[start:start + self.bulk_batch_size]),
+                 *clauses)
+            for start in range(0, len(ids), self.bulk_batch_size)]
+
+    def bulk_update(self, user_id: int, data: dict, ids: List[int] = None,
+                    where: dict = None) -> int:
+        """ Applies the same change to many rows with set based
+            ``UPDATE ... WHERE id IN (...)`` statements in one transaction,
+            modified fields are written by the same statements.
+
+            :param int user_id: id of the person making the change
+            :param dict data: fields to change
+            :param list ids: ids of the rows to change
+            :param dict where: column name to value, rows must match all
+            :return: number of rows changed
+            :raises InvalidEntity: on bad data or selection
+        """
+        values = self.dict_to_values(data)
+        if not values:
+            raise InvalidEntity('Nothing to update')
+        self.validate_values(values, partial=True)
+        values.update(self.audit_modify_values(user_id))
+        return self.bulk_execute(values, ids, where)
+
+    def bulk_delete(self, user_id: int, ids: List[int] = None,
+                    where: dict = None) -> int:
+        """ Soft deletes many rows, see bulk_update
+
+            :return: number of rows deactivated
+        """
+        values = {'active': False}
+        values.update(self.audit_modify_values(user_id))
+        return self.bulk_execute(values, ids, where)
+
+    def bulk_execute(self, values: dict, ids: List[int] = None,
+                     where: dict = None) -> int:
+        """ Runs one UPDATE per batch of ids and commits once
+        """
+        table = self.model.__table__
+        affected: int = 0
+        for clause in self.bulk_criteria(ids, where):
+            result = db.session.execute(  # pylint: disable=E1101
+                table.update().where(clause).values(**values))
+            affected += result.rowcount
+        db.session.commit()  # pylint: disable=E1101
+        self.router.record_write()
+        if ids and not where:
+            for entity_id in ids:
+                self.cache.invalidate(self.cache_key(entity_id))
+        else:
+            self.cache.invalidate_table(self.model.__tablename__)
+        return affected
+
+    def update(self, user_id: int, entity_id: int, data: dict,
+               expected_modified_on: datetime = None) -> None:
+        """ Updates an entity with a single ``UPDATE ... WHERE id = :id``
+
+            The If-Match check is part of the same statement, so no other
+            write can land between the check and the change. Only when no
+            row was changed is the entity looked up, to tell a missing
+            entity from a stale version. Soft deleted entities are missing,
+            as they are to reads, and keep their modified_on for archive.
+
+            :param datetime expected_modified_on: only update when the
+                entity was last modified at this time
+            :raises NoResultFound: when there is no such active entity
+            :raises StaleEntity: when expected_modified_on does not match
+            :raises InvalidEntity: on an invalid field
+        """
+        values = self.dict_to_values(data)
+        self.validate_values(values, partial=True)
+        values.update(self.audit_modify_values(user_id))
+        table = self.model.__table__
+        scope = self.scope()
+        clauses = [table.c.id == entity_id, *scope]
+        if expected_modified_on:
+            clauses.append(table.c.modified_on == expected_modified_on)
+        if self.execute_one(table.update().where(and_(*clauses))
+                            .values(**values), entity_id):
+            return
+        if expected_modified_on and self.exists(entity_id, *scope):
+            raise StaleEntity()
+        raise NoResultFound()
+
+    def execute_one(self, statement, entity_id: int) -> bool:
+        """ Runs a statement writing one entity and commits
 
-    def delete(self, user_id: int, entity_id: int, persistant=True):
-        """ Delete
+            :return: True when a row was written
+        """
+        result = db.session.execute(statement)  # pylint: disable=E1101
+        db.session.commit()  # pylint: disable=E1101
+        self.router.record_write()
+        if not result.rowcount:
+            return False
+        self.cache.invalidate(self.cache_key(entity_id))
+        return True
+
+    def delete(self, user_id: int, entity_id: int, persistant=True) -> None:
+        """ Soft deletes the entity, or removes the row when persistant is
+            False
         """
         if persistant:
             self.persistant_delete(user_id, entity_id)
         else:
             self.non_persistant_delete(user_id, entity_id)
 
-        return self.non_persistant_delete(user_id, entity_id)
+    def persistant_delete(self, user_id: int, entity_id: int) -> None:
+        """ Deactivates the entity with a single ``UPDATE ... WHERE id = :id``
 
-    def persistant_delete(self, user_id: int, entity_id: int) -> Model:
-        """ Changes the active record to active
+            Deleting an inactive entity again changes nothing, its
+            modified_on keeps counting towards the archive retention.
+
+            :raises NoResultFound: when there is no such entity
         """
-        entity = self.model.query.filter(self.model.id == entity_id).first()
-        self.audit_modify(user_id, entity)
-        entity.active = False
-        self.save(entity)
-        return entity
+        table = self.model.__table__
+        values = {'active': False}
+        values.update(self.audit_modify_values(user_id))
+        if self.execute_one(
+                table.update().where(and_(
+                    table.c.id == entity_id, table.c.active.is_(True)))
+                .values(**values), entity_id):
+            return
+        if not self.exists(entity_id):
+            raise NoResultFound()
 
     def non_persistant_delete(self, user_id: int, entity: Model):
         """ This method will need to be implemented with necessary
@@ -113,6 +641,75 @@ class DatabaseAccess(DataAccess):
         """
         raise Exception("Not Implemented")
 
+    def referencing_columns(self) -> list:
+        """ Columns of every table with a foreign key to the model's id
+        """
+        table = self.model.__table__
+        return [key.parent for other in db.Model.metadata.sorted_tables
+                for key in other.foreign_keys if key.column.table is table]
+
+    def referenced_ids(self) -> Set[int]:
+        """ Ids some row refers to through a foreign key, one read of every
+            referencing column
+        """
+        selects = [select([column]).where(column.isnot(None)).distinct()
+                   for column in self.referencing_columns()]
+        if not selects:
+            return set()
+        return {row[0] for row in db.session.execute(union(*selects))}  # pylint: disable=E1101
+
+    def archive(self, before: datetime, batch_size: int = 500) -> int:
+        """ Moves rows soft deleted before a time into archive_model
+
+            Each batch is copied with one ``INSERT ... SELECT``, removed with
+            one ``DELETE`` and committed on its own, so the hot table's rows
+            and index entries go away without a long running transaction.
+            Rows another row still refers to, like the person who created
+            others, stay until nothing points at them. The referenced ids
+            are read once per run and the candidates are walked by id, so
+            no batch scans the table again.
+
+            :param datetime before: rows last modified before this time move
+            :param int batch_size: rows moved per transaction
+            :return: number of rows archived
+        """
+        if self.archive_model is None:
+            return 0
+        table = self.model.__table__
+        archive = self.archive_model.__table__
+        columns = [column for column in table.columns
+                   if column.name in archive.columns]
+        referenced = self.referenced_ids()
+        archived: int = 0
+        last_id: int = 0
+        while True:
+            found = [row[0] for row in db.session.execute(  # pylint: disable=E1101
+                select([table.c.id]).where(and_(
+                    table.c.id > last_id,
+                    table.c.active.is_(False),
+                    table.c.modified_on < before
+                )).order_by(table.c.id).limit(batch_size))]
+            if not found:
+                break
+            last_id = found[-1]
+            ids = [entity_id for entity_id in found
+                   if entity_id not in referenced]
+            if ids:
+                selected = table.c.id.in_(ids)
+                db.session.execute(archive.insert().from_select(  # pylint: disable=E1101
+                    [column.name for column in columns] + ['archived_on'],
+                    select([*columns, literal(datetime.now(), DateTime)])
+                    .where(selected)))
+                db.session.execute(table.delete().where(selected))  # pylint: disable=E1101
+                db.session.commit()  # pylint: disable=E1101
+                self.router.record_write()
+                for entity_id in ids:
+                    self.cache.invalidate(self.cache_key(entity_id))
+                archived += len(ids)
+            if len(found) < batch_size:
+                break
+        return archived
+
     def audit_create(self, user_id: int, entity: Model) -> None:
         """ Sets the correct 'created on' fields on entity
         """
@@ -121,15 +718,40 @@ class DatabaseAccess(DataAccess):
         entity.created_on = datetime.now()
         self.audit_modify(user_id, entity)
 
+    def audit_create_values(self, user_id: int) -> dict:
+        """ The 'created on' and modified fields as column values, for
+            statements that write many rows at once
+        """
+        values = {
+            'created_by_id': user_id,
+            'active': True,
+            'created_on': datetime.now()
+        }
+        values.update(self.audit_modify_values(user_id))
+        columns = self.model.__table__.columns
+        return {key: value for key, value in values.items() if key in columns}
+
     def audit_modify(self, user_id: int, entity: Model) -> None:
         """ Sets the correct modifed fields on entity
         """
         entity.modified_by_id = user_id
         entity.modified_on = datetime.now()
 
+    def audit_modify_values(self, user_id: int) -> dict:
+        """ The modified fields as column values, for statements that write
+            many rows at once
+        """
+        values = {
+            'modified_by_id': user_id,
+            'modified_on': datetime.now()
+        }
+        columns = self.model.__table__.columns
+        return {key: value for key, value in values.items() if key in columns}
+
     def save(self, entity: Model) -> Model:
         """ Save the entity to database
         """
         db.session.add(entity)  # pylint: disable=E1101
         db.session.commit()  # pylint: disable=E1101
+        self.router.record_write()
         return entity
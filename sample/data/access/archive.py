@@ -0,0 +1,29 @@
+""" Archival of soft deleted rows, run by ``python -m sample --archive``
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Tuple, Type
+
+from .accessible import DatabaseAccess
+from .person import PersonAccess
+
+# Data accesses whose archive_model receives their old inactive rows
+ARCHIVED: Tuple[Type[DatabaseAccess], ...] = (PersonAccess,)
+
+
+def archive_inactive(retention_days: float,
+                     batch_size: int = 500) -> Dict[str, int]:
+    """ Moves rows inactive for longer than retention_days out of every
+        ARCHIVED table, needs an application context
+
+        :param float retention_days: days a soft deleted row stays in place
+        :param int batch_size: rows moved per transaction
+        :return: table name to the number of rows archived
+        :rtype: dict
+    """
+    before = datetime.now() - timedelta(days=retention_days)
+    archived: Dict[str, int] = {}
+    for access_type in ARCHIVED:
+        access = access_type()
+        archived[access.model.__tablename__] = access.archive(
+            before, batch_size)
+    return archived
@@ -0,0 +1,100 @@
+""" Per worker read-through cache of entity rows
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class EntityCache:
+    """ Bounded LRU of serialized rows keyed by (table name, id)
+
+        Rows are kept as plain dicts of column values so they outlive the
+        database session that read them. Each gunicorn worker has its own
+        cache, writes made by other workers are only seen once the entry
+        expires, keep ttl short when running several workers.
+
+        :param int max_size: entries kept, 0 disables the cache
+        :param float ttl: seconds an entry is served before it is read again
+    """
+
+    def __init__(self, max_size: int = 0, ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def configure(self, max_size: int, ttl: float) -> None:
+        """ Resizes the cache and drops every entry
+        """
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        """ Cached row, None when missing, expired or the cache is off
+        """
+        if not self.max_size:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                values, expires = entry
+                if now < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(values)
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        return None
+
+    def put(self, key: Hashable, values: dict) -> None:
+        """ Stores a row, evicting the least recently used rows when full
+        """
+        if not self.max_size:
+            return
+        with self._lock:
+            self._entries[key] = (dict(values), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """ Drops one row, called after it was written
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_table(self, table: str) -> None:
+        """ Drops every row of a table, for writes that can not name the
+            rows they changed
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == table]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        """ Counters used to size the cache
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+
+entity_cache: EntityCache = EntityCache()
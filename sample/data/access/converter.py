@@ -0,0 +1,146 @@
+""" Dict to entity conversion
+
+    Which columns can be written and how each value is coerced never changes
+    for a model, so it is worked out once per model class and reused for
+    every request.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dateutil import parser
+
+from ..models import Model
+
+
+class InvalidEntity(ValueError):
+    """ Raised when a dict can not be turned into a valid entity
+    """
+
+
+def parse_datetime(value: Any) -> Any:
+    """ Coerces a client value to datetime, ISO 8601 strings take the fast
+        path and anything else goes through dateutil
+    """
+    if not value or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return parser.parse(str(value))
+
+
+def parse_date(value: Any) -> Any:
+    """ Coerces a client value to date
+    """
+    if not value or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    return parse_datetime(value).date()
+
+
+COERCERS = {
+    datetime: parse_datetime,
+    date: parse_date
+}
+
+
+class Converter:
+    """ Precomputed conversion plan of a model
+
+        :param Model model: model class the plan is built for
+
+        .. note::
+            Use converter_for to get the cached plan of a model instead of
+            building a new one.
+    """
+
+    def __init__(self, model: Model):
+        self.model = model
+        # (field, setter, coercer), coercer is None when values pass as is.
+        self.plan: List[Tuple[str, Callable, Optional[Callable]]] = []
+        # Python type every column's values have once coerced
+        self.types: Dict[str, type] = {}
+        for column in model.__table__.columns:
+            field: str = column.name
+            python_type: type = column.type.impl.python_type \
+                if hasattr(column.type, 'impl') else column.type.python_type
+            self.types[field] = python_type
+            if field in dir(Model) or field == 'id':
+                continue
+            setter: Callable = getattr(model, field).__set__
+            self.plan.append((field, setter, COERCERS.get(python_type)))
+
+    def to_values(self, data: dict) -> dict:
+        """ Column values found in data, converted to the column's python
+            type, keyed by column name
+
+            :raises InvalidEntity: when data is not a dict or a value can not
+                be coerced
+        """
+        if not isinstance(data, dict):
+            raise InvalidEntity('Expected an object')
+        values: dict = {}
+        field: str = None
+        try:
+            for field, _, coercer in self.plan:
+                if field in data:
+                    value = data[field]
+                    values[field] = coercer(value) if coercer else value
+        except (ValueError, TypeError, OverflowError) as error:
+            raise InvalidEntity(f'{field} is not valid: {error}') from error
+        return values
+
+    def check_type(self, field: str, value: Any) -> None:
+        """ Checks a coerced value has its column's python type, a bool is
+            not accepted as a number
+
+            :raises InvalidEntity: on a value of another type
+        """
+        python_type = self.types.get(field)
+        if python_type is None or value is None:
+            return
+        if python_type is float:
+            python_type = (int, float)
+        if isinstance(value, python_type) and (
+                python_type is bool or not isinstance(value, bool)):
+            return
+        raise InvalidEntity(f'{field} has to be {self.types[field].__name__}')
+
+    def to_values_many(self, rows: List[dict],
+                       errors: List[dict]) -> List[Tuple[int, dict]]:
+        """ Converts a batch of dicts, see to_values
+
+            :param list rows: dicts to convert
+            :param list errors: ``{'index': int, 'message': str}`` is appended
+                for each row that can not be converted
+            :return: index of the row and its values for every converted row
+            :rtype: list
+        """
+        converted: List[Tuple[int, dict]] = []
+        for index, data in enumerate(rows):
+            try:
+                converted.append((index, self.to_values(data)))
+            except InvalidEntity as error:
+                errors.append({'index': index, 'message': str(error)})
+        return converted
+
+    def apply(self, entity: Model, data: dict) -> None:
+        """ Sets the fields found in data on entity
+
+            :raises InvalidEntity: when a value can not be coerced
+        """
+        field: str = None
+        try:
+            for field, setter, coercer in self.plan:
+                if field in data:
+                    value = data[field]
+                    setter(entity, coercer(value) if coercer else value)
+        except (ValueError, TypeError, OverflowError) as error:
+            raise InvalidEntity(f'{field} is not valid: {error}') from error
+
+
+@lru_cache(maxsize=None)
+def converter_for(model: Model) -> Converter:
+    """ Cached conversion plan of a model class
+    """
+    return Converter(model)
@@ -0,0 +1,105 @@
+""" Whitelisted collection filters
+
+    A filter is a query argument naming a field, optionally followed by an
+    operator in brackets: ``last_name=Smith`` or ``created_on[gte]=2020-01-01``.
+    Each access class lists the fields and operators it accepts, everything
+    else is rejected so no filter can force a scan over an unindexed column.
+"""
+import operator
+import re
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import Column
+
+FILTER_KEY = re.compile(r'^(?P<field>\w+)(?:\[(?P<operator>\w+)\])?$')
+
+OPERATORS: Dict[str, Callable] = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le
+}
+
+BOOLEANS: Dict[str, bool] = {
+    'true': True, '1': True, 'yes': True,
+    'false': False, '0': False, 'no': False
+}
+
+
+class InvalidFilter(ValueError):
+    """ Raised on a filter that is not whitelisted or whose value can not be
+        converted to the column's type
+    """
+
+
+def parse_filter_key(key: str) -> Tuple[str, str]:
+    """ Splits a query argument name into field and operator
+
+        :param str key: ``field`` or ``field[operator]``
+        :return: field name and operator, ``eq`` when none is given
+        :rtype: tuple
+        :raises InvalidFilter: when the key is malformed
+    """
+    match = FILTER_KEY.match(key)
+    if not match:
+        raise InvalidFilter(f'Can not filter on {key}')
+    return match.group('field'), match.group('operator') or 'eq'
+
+
+def parse_boolean(value) -> bool:
+    """ Query argument spelling of a boolean
+    """
+    if isinstance(value, bool):
+        return value
+    try:
+        return BOOLEANS[str(value).lower()]
+    except KeyError as error:
+        raise ValueError(f'{value} is not a boolean') from error
+
+
+def filter_clauses(columns, filterable: Dict[str, Tuple[str, ...]],
+                   filters: Dict[str, str], coerce: Callable,
+                   requires: Dict[str, str] = None) -> List:
+    """ WHERE clauses of a set of filters, the same combination always
+        compiles to the same statement
+
+        :param columns: column collection of the table
+        :param dict filterable: field name to the operators it accepts
+        :param dict filters: query argument name to value
+        :param coerce: converts ``{field: value}`` to column values
+        :param dict requires: field to the field it can only be filtered
+            together with, for later columns of a composite index
+        :return: clauses that all have to match
+        :rtype: list
+        :raises InvalidFilter: on a filter that is not whitelisted or a
+            value that can not be converted
+    """
+    clauses: List = []
+    fields = {parse_filter_key(key)[0] for key in filters}
+    for key in sorted(filters):
+        field, name = parse_filter_key(key)
+        if name not in filterable.get(field, ()):
+            raise InvalidFilter(f'Can not filter on {key}')
+        required = (requires or {}).get(field)
+        if required and required not in fields:
+            raise InvalidFilter(f'{field} can only be filtered with {required}')
+        column: Column = columns[field]
+        value = filters[key]
+        python_type: type = column.type.python_type
+        try:
+            if python_type is bool:
+                value = parse_boolean(value)
+            elif python_type is int:
+                value = int(value)
+            else:
+                value = coerce({field: value})[field]
+        except (ValueError, OverflowError) as error:
+            raise InvalidFilter(f'{key} is not valid: {error}') from error
+        if isinstance(value, bool) and name == 'eq':
+            # IS renders a literal, the only form a partial index on the
+            # column can be matched against.
+            clauses.append(column.is_(value))
+        else:
+            clauses.append(OPERATORS[name](column, value))
+    return clauses
@@ -0,0 +1,117 @@
+""" Keyset (cursor) pagination helpers
+
+    A page is read with ``WHERE (sort, id) > (:last_sort, :last_id)
+    ORDER BY sort, id LIMIT :limit`` so the cost of a page does not depend on
+    how deep the client has paged, unlike ``OFFSET``.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from dateutil import parser
+from sqlalchemy import Column, and_, or_
+
+
+class InvalidPage(ValueError):
+    """ Raised when a cursor can not be decoded, does not match the sort, or
+        the requested sort is not backed by an index
+    """
+
+
+class Page:  # pylint: disable=too-few-public-methods
+    """ One page of results plus the cursor to fetch the next page
+
+        :param list items: entities on this page
+        :param str next_cursor: opaque cursor, None when this is the last page
+    """
+
+    def __init__(self, items: List[Any], next_cursor: Optional[str] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def parse_sort(sort: str) -> List[Tuple[str, bool]]:
+    """ Splits a sort expression into field names and directions
+
+        :param str sort: comma separated column names, each prefixed with
+            ``-`` for descending
+        :return: field name and True when descending, per field
+        :rtype: list
+        :raises InvalidPage: on an empty field
+    """
+    order: List[Tuple[str, bool]] = []
+    for field in sort.split(','):
+        field = field.strip()
+        descending = field.startswith('-')
+        if descending:
+            field = field[1:]
+        if not field:
+            raise InvalidPage(f'Malformed sort {sort}')
+        order.append((field, descending))
+    return order
+
+
+def encode_cursor(sort: str, values: List[Any], entity_id: int) -> str:
+    """ Builds an opaque cursor from the last row of a page
+
+        :param str sort: sort expression the page was read with
+        :param list values: values of the sort columns on the last row
+        :param int entity_id: id of the last row
+        :rtype: str
+    """
+    values = [value.isoformat() if isinstance(value, (date, datetime))
+              else value for value in values]
+    raw = json.dumps({'s': sort, 'v': values, 'id': entity_id},
+                     separators=(',', ':'))
+    return base64.urlsafe_b64encode(
+        raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str,
+                  columns: List[Column]) -> Tuple[List[Any], int]:
+    """ Reverses encode_cursor
+
+        :param str cursor: cursor given by the client
+        :param str sort: sort expression of the current request
+        :param list columns: columns the page is sorted on, used to restore
+            the values' types
+        :return: last sort values and last id
+        :rtype: tuple
+        :raises InvalidPage: when the cursor is malformed or was issued for
+            another sort
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, entity_id = list(payload['v']), int(payload['id'])
+        cursor_sort = payload['s']
+    except (ValueError, TypeError, KeyError) as error:
+        raise InvalidPage('Malformed cursor') from error
+    if cursor_sort != sort or len(values) != len(columns):
+        raise InvalidPage('Cursor was issued for a different sort')
+    try:
+        for position, column in enumerate(columns):
+            python_type: type = column.type.impl.python_type \
+                if hasattr(column.type, 'impl') else column.type.python_type
+            if values[position] is not None \
+                    and python_type in (date, datetime):
+                values[position] = parser.parse(values[position])
+    except (ValueError, TypeError, OverflowError) as error:
+        raise InvalidPage('Malformed cursor') from error
+    return values, entity_id
+
+
+def after_clause(columns: List[Column], id_column: Column, values: List[Any],
+                 entity_id: int, descending: bool):
+    """ Row-value comparison ``(a, b, id) > (:a, :b, :id)`` written out with
+        AND/OR so every backend can use the index for it, the leading column
+        becomes the range the index is searched with.
+    """
+    pairs = [(column, value) for column, value in zip(columns, values)
+             if column.key != id_column.key]
+    clause = id_column < entity_id if descending else id_column > entity_id
+    for column, value in reversed(pairs):
+        after = column < value if descending else column > value
+        clause = or_(after, and_(column == value, clause))
+    return clause
@@ -1,7 +1,7 @@
 """ Person data operations
 """
 from .accessible import DatabaseAccess
-from ..models import Person
+from ..models import Person, PersonArchive
 
 
 class PersonAccess(DatabaseAccess):
@@ -12,6 +12,16 @@ class PersonAccess(DatabaseAccess):
             basic crud operations implemented
 
     """
+    filterable = {
+        'first_name': ('eq',),
+        'last_name': ('eq',),
+        'active': ('eq',),
+        'created_by_id': ('eq',),
+        'created_on': ('gt', 'gte', 'lt', 'lte')
+    }
+    # first_name is the second column of person_last_name_first_name
+    filter_requires = {'first_name': 'last_name'}
+    archive_model = PersonArchive
 
     def __init__(self):
         super().__init__(model=Person)
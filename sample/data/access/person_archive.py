@@ -0,0 +1,14 @@
+""" Archived person data operations
+"""
+from .accessible import DatabaseAccess
+from ..models import PersonArchive
+
+
+class PersonArchiveAccess(DatabaseAccess):
+    """ Read access to archived persons, every archived row is inactive so
+        reads are not scoped to active rows
+    """
+    active_only = False
+
+    def __init__(self):
+        super().__init__(model=PersonArchive)
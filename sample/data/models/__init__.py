@@ -2,3 +2,4 @@
 """
 from .model import Model, AuditModel
 from .person import Person
+from .person_archive import PersonArchive
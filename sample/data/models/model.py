@@ -12,6 +12,8 @@ class Model(db.Model):  # pylint: disable=too-few-public-methods
         share or will inherit
     """
     __abstract__ = True
+    # Text columns name searches run over, see data.search
+    search_columns: tuple = ()
 
 
 class AuditModel(Model):  # pylint: disable=too-few-public-methods
@@ -35,3 +37,16 @@ class AuditModel(Model):  # pylint: disable=too-few-public-methods
 #         Note: you will have to bootstrap a System/Operator person row else other.
 #         """
     created_on: Column = Column(DateTime, nullable=False)
+
+    @declared_attr
+    def modified_by_id(self):
+        """ method is used to create a ForeignKey in an abstract class in sqlalchemy
+        """
+        return Column(BigInteger, ForeignKey('person.id'), nullable=False)
+# """
+#         Modified by is who last changed the row, Foreign Key (FK) to a person.
+#         """
+    modified_on: Column = Column(DateTime, nullable=False)
+# """
+#     Last time the row was written, drives ETag and Last-Modified headers.
+#     """
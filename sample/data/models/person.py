@@ -1,9 +1,15 @@
 """ Person
 """
-from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy import (BigInteger, Boolean, Column, Index, Integer, String,
+                        column, true)
 
+from ..search import install_name_search
 from .model import AuditModel
 
+# Condition of the partial index on active rows, a bare column because the
+# mapped one has no name yet while the class body runs.
+ACTIVE = column('active', Boolean).is_(true())
+
 
 class Person(AuditModel): #pylint: disable=too-few-public-methods
     """ Person Entity
@@ -13,6 +19,15 @@ class Person(AuditModel): #pylint: disable=too-few-public-methods
             added, we just need to add the other columns not part of audit
     """
     __tablename__ = "person"
+    __table_args__ = (
+        Index('person_last_name_first_name', 'last_name', 'first_name'),
+        Index('person_created_on', 'created_on'),
+        Index('person_created_by_id', 'created_by_id'),
+        # Partial where the database supports it, a plain index elsewhere.
+        # Only used by queries that also filter on active IS true.
+        Index('person_active_last_name_first_name', 'last_name', 'first_name',
+              sqlite_where=ACTIVE, postgresql_where=ACTIVE),
+    )
     id: Column = Column(
         BigInteger().with_variant(Integer, "sqlite"),
         primary_key=True,
@@ -21,6 +36,8 @@ class Person(AuditModel): #pylint: disable=too-few-public-methods
     first_name: Column = Column(String(100), nullable=False)
     middle_name: Column = Column(String(100), nullable=True)
     last_name: Column = Column(String(100), nullable=False)
+    # Searched by /person/search, most important last
+    search_columns = ('middle_name', 'first_name', 'last_name')
 
     def __init__(
             self,
@@ -32,3 +49,6 @@ class Person(AuditModel): #pylint: disable=too-few-public-methods
         self.last_name = last_name
         self.middle_name = middle_name
         self.active = True
+
+
+install_name_search(Person.__table__, Person.search_columns)
@@ -0,0 +1,35 @@
+""" Person Archive
+"""
+from sqlalchemy import (BigInteger, Boolean, Column, DateTime, Index, Integer,
+                        String)
+
+from .model import Model
+
+
+class PersonArchive(Model): #pylint: disable=too-few-public-methods
+    """ Persons soft deleted longer than the retention window, moved out of
+        the person table by ``python -m sample --archive``
+
+        .. note::
+            The audit ids are kept without foreign keys, the persons they
+            name may be archived as well
+    """
+    __tablename__ = "person_archive"
+    __table_args__ = (
+        Index('person_archive_archived_on', 'archived_on'),
+    )
+    id: Column = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=False,
+        nullable=False
+    )
+    first_name: Column = Column(String(100), nullable=False)
+    middle_name: Column = Column(String(100), nullable=True)
+    last_name: Column = Column(String(100), nullable=False)
+    active: Column = Column(Boolean, nullable=False)
+    created_by_id: Column = Column(BigInteger, nullable=False)
+    created_on: Column = Column(DateTime, nullable=False)
+    modified_by_id: Column = Column(BigInteger, nullable=False)
+    modified_on: Column = Column(DateTime, nullable=False)
+    archived_on: Column = Column(DateTime, nullable=False)
@@ -0,0 +1,114 @@
+""" Connection pool configuration and statistics
+"""
+import threading
+import time
+
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class PoolStatistics:
+    """ Counters shared by every instrumented pool of the worker
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects: int = 0
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.wait_seconds: float = 0.0
+        self.wait_max: float = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """ Time spent waiting for a pooled connection
+        """
+        with self._lock:
+            self.wait_seconds += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def record_connect(self) -> None:
+        """ A new DBAPI connection was opened
+        """
+        with self._lock:
+            self.connects += 1
+
+    def stats(self) -> dict:
+        """ Snapshot of the counters
+        """
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds': self.wait_seconds,
+                'wait_max_seconds': self.wait_max
+            }
+
+
+pool_statistics: PoolStatistics = PoolStatistics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """ QueuePool that records how long each checkout waited
+    """
+
+    def _create_connection(self):
+        pool_statistics.record_connect()
+        return super()._create_connection()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_statistics.record_wait(time.perf_counter() - start, True)
+            raise
+        pool_statistics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(uri: str, pool_size: int, max_overflow: int,
+                   pool_timeout: float, pool_recycle: int,
+                   pool_pre_ping: bool, statement_cache_size: int) -> dict:
+    """ SQLALCHEMY_ENGINE_OPTIONS for a database URI
+
+        In memory SQLite keeps the single connection Flask-SQLAlchemy gives
+        it. For SQLite files connections may be handed between threads by the
+        pool and pysqlite keeps statement_cache_size prepared statements per
+        connection; other drivers have no statement cache option.
+    """
+    url = make_url(uri)
+    options: dict = {}
+    if url.drivername.startswith('sqlite'):
+        options['connect_args'] = {'cached_statements': statement_cache_size}
+        if url.database in (None, '', ':memory:'):
+            return options
+        options['connect_args']['check_same_thread'] = False
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping
+    })
+    return options
+
+
+def pool_status(engine) -> dict:
+    """ Live gauges of an engine's pool, empty for pools without a queue
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0)
+    }
@@ -0,0 +1,244 @@
+""" Primary / replica routing of database reads
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Iterator, List, Optional
+
+from flask import g, has_app_context
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import orm
+
+STRATEGIES = ('round_robin', 'least_connections')
+
+
+class RoutingSession(SignallingSession):
+    """ Session that sends statements to the replica bind named in
+        ``info['read_bind']`` while nothing is being written, everything else
+        goes where SignallingSession sends it: the primary unless the model
+        has a ``__bind_key__``.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        read_bind = self.info.get('read_bind')
+        if read_bind and not self._flushing and not self.new \
+                and not self.dirty and not self.deleted:
+            state = get_state(self.app)
+            return state.db.get_engine(self.app, bind=read_bind)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """ SQLAlchemy whose sessions are RoutingSessions
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class WriteMarks:
+    """ Until when each token reads from the primary, kept in this process
+        only so a gunicorn worker does not see the writes of the others.
+
+        At most max_writers tokens are kept, the least recent writer is
+        dropped first.
+    """
+
+    def __init__(self, max_writers: int = 10000):
+        self._lock = threading.Lock()
+        self._until: OrderedDict = OrderedDict()
+        self.max_writers = max_writers
+
+    def mark(self, writer: Hashable, until: float) -> None:
+        """ Remembers that writer reads from the primary until the epoch
+            time until
+        """
+        with self._lock:
+            self._until[writer] = until
+            self._until.move_to_end(writer)
+            while len(self._until) > self.max_writers:
+                self._until.popitem(last=False)
+
+    def until(self, writer: Hashable) -> Optional[float]:
+        """ Epoch time the writer's mark ends, None without a current mark
+        """
+        now = time.time()
+        with self._lock:
+            until = self._until.get(writer)
+            if until is not None and until <= now:
+                del self._until[writer]
+                until = None
+        return until
+
+
+class SqliteWriteMarks:
+    """ WriteMarks kept in a SQLite file so a token reads its own writes on
+        whichever gunicorn worker serves its next request.
+
+        Shares the file and connection handling of SqliteTokenRegistry: a
+        connection per process and thread, WAL mode, expired rows deleted
+        by the indexed until column every prune_interval seconds.
+
+        :param str path: SQLite database file
+        :param int prune_interval: seconds between expired row deletes
+    """
+
+    def __init__(self, path: str, prune_interval: int = 60):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._next_prune: float = 0
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS write_mark '
+                '(writer TEXT PRIMARY KEY, until REAL NOT NULL)')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS write_mark_until '
+                'ON write_mark (until)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current process and thread, connections are
+            never shared across a fork
+        """
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def mark(self, writer: Hashable, until: float) -> None:
+        """ Remembers that writer reads from the primary until the epoch
+            time until
+        """
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO write_mark (writer, until) '
+                'VALUES (?, ?)', (str(writer), until))
+        self._prune(time.time())
+
+    def until(self, writer: Hashable) -> Optional[float]:
+        """ Epoch time the writer's mark ends, None without a current mark
+        """
+        row = self._connection().execute(
+            'SELECT until FROM write_mark WHERE writer = ? AND until > ?',
+            (str(writer), time.time())).fetchone()
+        return row[0] if row else None
+
+    def _prune(self, now: float) -> None:
+        """ Deletes expired rows at most once per prune_interval
+        """
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.prune_interval
+        with self._connection() as connection:
+            connection.execute(
+                'DELETE FROM write_mark WHERE until <= ?', (now,))
+
+
+class ReplicaRouter:
+    """ Picks the replica bind reads are sent to
+
+        Once a token wrote, its reads go to the primary for sticky_seconds so
+        it always sees its own writes while replicas catch up. Writes are
+        remembered in marks: WriteMarks per gunicorn worker by default,
+        SqliteWriteMarks to share them between workers.
+
+        :param list binds: SQLALCHEMY_BINDS keys of the replicas, empty
+            sends every read to the primary
+        :param str strategy: round_robin, or least_connections which picks
+            the replica with the fewest checked out connections
+        :param float sticky_seconds: reads go to the primary this long after
+            a write by the same token
+    """
+
+    def __init__(self, binds: List[str] = None,
+                 strategy: str = 'round_robin',
+                 sticky_seconds: float = 5):
+        self._lock = threading.Lock()
+        self.configure(binds or [], strategy, sticky_seconds)
+
+    def configure(self, binds: List[str], strategy: str,
+                  sticky_seconds: float, marks=None) -> None:
+        """ Sets the replicas and where writes are remembered, without marks
+            every remembered write is forgotten
+
+            :param marks: WriteMarks or SqliteWriteMarks, None starts an
+                empty WriteMarks
+            :raises ValueError: on an unknown strategy
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f'Unknown replica strategy {strategy}, '
+                f'use one of {", ".join(STRATEGIES)}')
+        with self._lock:
+            self.binds = list(binds)
+            self.strategy = strategy
+            self.sticky_seconds = sticky_seconds
+            self.marks = marks if marks is not None else WriteMarks()
+            self._cycle = itertools.cycle(self.binds)
+
+    @staticmethod
+    def writer() -> Optional[Hashable]:
+        """ Token id of the current request, set by token_validation
+        """
+        return g.get('token_id') if has_app_context() else None
+
+    def record_write(self) -> None:
+        """ Remembers that the current token just wrote
+        """
+        writer = self.writer()
+        if writer is None or not self.binds or not self.sticky_seconds:
+            return
+        self.marks.mark(writer, time.time() + self.sticky_seconds)
+
+    def sticky(self) -> bool:
+        """ True when the current token wrote within sticky_seconds
+        """
+        writer = self.writer()
+        return writer is not None and self.marks.until(writer) is not None
+
+    def choose(self, db: SQLAlchemy) -> Optional[str]:
+        """ Bind the next read goes to, None for the primary
+        """
+        if not self.binds or self.sticky():
+            return None
+        with self._lock:
+            if self.strategy == 'round_robin':
+                return next(self._cycle)
+            start = next(self._cycle)
+        ordered = self.binds[self.binds.index(start):] + \
+            self.binds[:self.binds.index(start)]
+        return min(ordered, key=lambda bind: checked_out(db, bind))
+
+    @contextmanager
+    def reading(self, db: SQLAlchemy) -> Iterator[Optional[str]]:
+        """ Statements of the session run on the chosen replica inside the
+            block, nested blocks keep the outer choice
+        """
+        session = db.session()
+        if 'read_bind' in session.info:
+            yield session.info['read_bind']
+            return
+        bind = self.choose(db)
+        session.info['read_bind'] = bind
+        try:
+            yield bind
+        finally:
+            session.info.pop('read_bind', None)
+
+
+def checked_out(db: SQLAlchemy, bind: str) -> int:
+    """ Connections of a bind in use right now, 0 for pools without a queue
+    """
+    pool = db.get_engine(bind=bind).pool
+    return pool.checkedout() if hasattr(pool, 'checkedout') else 0
+
+
+replica_router: ReplicaRouter = ReplicaRouter()
@@ -0,0 +1,260 @@
+""" Full-text name search
+
+    SQLite keeps an external content FTS5 table next to the searched table,
+    triggers copy every insert, delete and name change into it so writes
+    made through the ORM, bulk statements or by hand all stay searchable.
+    Postgres searches a GIN index over a ``tsvector`` expression of the same
+    columns. Other databases fall back to LIKE prefix matches.
+
+    A query is split into words, a row matches when every word is a prefix
+    of one of its names. Whole word matches rank above prefix matches, a
+    single character only matches a whole name.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Type
+
+from sqlalchemy import DDL, Table, and_, event, or_, text
+from sqlalchemy.engine import Connectable
+
+WORD = re.compile(r'\w+', re.UNICODE)
+# Shorter words only match whole names, the prefix indexes start here
+PREFIX_LENGTH: int = 2
+
+
+class InvalidSearch(ValueError):
+    """ Raised on a query with no words to search for
+    """
+
+
+def search_words(query: str, max_words: int = 8) -> List[str]:
+    """ Lower cased words of a search query
+
+        :raises InvalidSearch: when the query holds no words
+    """
+    words = WORD.findall((query or '').lower())[:max_words]
+    if not words:
+        raise InvalidSearch('Search for at least one word')
+    return words
+
+
+class NameSearch(ABC):
+    """ Ranked prefix search over text columns of a table
+
+        :param Table table: searched table, needs an integer id primary key
+        :param columns: names of the searched columns, most important last
+    """
+    dialect: str = None
+
+    def __init__(self, table: Table, columns: Sequence[str]):
+        self.table = table
+        self.columns = tuple(columns)
+
+    @property
+    def name(self) -> str:
+        """ Name of the index or virtual table
+        """
+        return f'{self.table.name}_search'
+
+    def install(self) -> None:
+        """ Creates and drops the index with the table, see create_ddl and
+            drop_ddl
+        """
+        for create in self.create_ddl():
+            event.listen(self.table, 'after_create',
+                         DDL(create).execute_if(dialect=self.dialect))
+        for drop in self.drop_ddl():
+            event.listen(self.table, 'before_drop',
+                         DDL(drop).execute_if(dialect=self.dialect))
+
+    def create(self, connection: Connectable) -> None:
+        """ Runs create_ddl on a table created before its search was, like
+            one from an older release, nothing happens when the search
+            exists already
+        """
+        statements = self.create_ddl()
+        if not statements or connection.dialect.name != self.dialect \
+                or connection.dialect.has_table(connection, self.name):
+            return
+        for statement in statements:
+            connection.execute(DDL(statement))
+
+    def create_ddl(self) -> List[str]:
+        """ Statements run after the table is created
+        """
+        return []
+
+    def drop_ddl(self) -> List[str]:
+        """ Statements run before the table is dropped
+        """
+        return []
+
+    @abstractmethod
+    def statement(self, words: List[str], limit: int, offset: int = 0,
+                  where: str = '', candidates: int = 200):
+        """ SELECT of the matching rows, best first
+
+            The best candidates matches that satisfy where are kept, in rank
+            order, before the page is cut from them, so rows where leaves
+            out never take the place of rows it keeps.
+
+            :param list words: words from search_words
+            :param int limit: rows returned
+            :param int offset: matching rows skipped
+            :param str where: extra SQL condition on the table
+            :param int candidates: best matches kept
+            :return: statement and its parameters
+            :rtype: tuple
+        """
+
+
+class SqliteNameSearch(NameSearch):
+    """ FTS5 external content table, only the index is stored, the text is
+        read from the table. Prefixes of two to four characters get their
+        own index so typeahead queries do not scan the term list.
+    """
+    dialect = 'sqlite'
+
+    def create_ddl(self) -> List[str]:
+        table, name = self.table.name, self.name
+        columns = ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+            f"{columns}, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON "
+            f"{table} BEGIN INSERT INTO {name} (rowid, {columns}) "
+            f"VALUES (new.id, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON "
+            f"{table} BEGIN INSERT INTO {name} ({name}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF "
+            f"{columns} ON {table} BEGIN "
+            f"INSERT INTO {name} ({name}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {name} (rowid, {columns}) "
+            f"VALUES (new.id, {new}); END",
+            # Indexes rows that existed before the search table did
+            f"INSERT INTO {name} ({name}) VALUES ('rebuild')",
+        ]
+
+    def drop_ddl(self) -> List[str]:
+        return [f'DROP TABLE IF EXISTS {self.name}']
+
+    def statement(self, words: List[str], limit: int, offset: int = 0,
+                  where: str = '', candidates: int = 200):
+        # Every word quoted so nothing in it is read as FTS5 syntax
+        match = ' AND '.join(
+            f'"{word}"*' if len(word) >= PREFIX_LENGTH
+            else f'"{word}"' for word in words)
+        weights = ', '.join(
+            str(float(position + 1)) for position in range(len(self.columns)))
+        table, name = self.table.name, self.name
+        condition = f'AND {where} ' if where else ''
+        return text(
+            f'SELECT {table}.* FROM ('
+            f'SELECT {name}.rowid AS id, bm25({name}, {weights}) AS score '
+            f'FROM {name} JOIN {table} ON {table}.id = {name}.rowid '
+            f'WHERE {name} MATCH :match {condition}'
+            f'ORDER BY score, {name}.rowid LIMIT :candidates) AS found '
+            f'JOIN {table} ON {table}.id = found.id '
+            f'ORDER BY found.score, {table}.id '
+            f'LIMIT :limit OFFSET :offset').columns(*self.table.columns), \
+            {'match': match, 'candidates': candidates,
+             'limit': limit, 'offset': offset}
+
+
+class PostgresNameSearch(NameSearch):
+    """ GIN index over the ``simple`` tsvector of the columns, the query
+        has to repeat the indexed expression exactly to use it
+    """
+    dialect = 'postgresql'
+
+    @property
+    def document(self) -> str:
+        """ Indexed tsvector expression, later columns weigh more
+        """
+        labels = 'DCBA'[-len(self.columns):] if len(self.columns) <= 4 \
+            else 'D' * len(self.columns)
+        return ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce({column}, '')), "
+            f"'{label}')"
+            for column, label in zip(self.columns, labels))
+
+    def create_ddl(self) -> List[str]:
+        return [f'CREATE INDEX IF NOT EXISTS {self.name} ON '
+                f'{self.table.name} USING GIN (({self.document}))']
+
+    def statement(self, words: List[str], limit: int, offset: int = 0,
+                  where: str = '', candidates: int = 200):
+        query = ' & '.join(
+            f"'{word}':*" if len(word) >= PREFIX_LENGTH else f"'{word}'"
+            for word in words)
+        table = self.table.name
+        condition = f' AND {where}' if where else ''
+        return text(
+            f"SELECT {table}.* FROM ("
+            f"SELECT {table}.id, ts_rank(({self.document}), query) AS score "
+            f"FROM {table}, to_tsquery('simple', :query) AS query "
+            f"WHERE ({self.document}) @@ query{condition} "
+            f"ORDER BY score DESC, {table}.id "
+            f"LIMIT :candidates) AS found "
+            f"JOIN {table} ON {table}.id = found.id "
+            f"ORDER BY found.score DESC, {table}.id "
+            f"LIMIT :limit OFFSET :offset").columns(*self.table.columns), \
+            {'query': query, 'candidates': candidates,
+             'limit': limit, 'offset': offset}
+
+
+class LikeNameSearch(NameSearch):
+    """ Fallback for other databases, ``column LIKE 'word%'`` can use an
+        index on the column but rows are not ranked
+    """
+
+    def install(self) -> None:
+        pass
+
+    def statement(self, words: List[str], limit: int, offset: int = 0,
+                  where: str = '', candidates: int = 200):
+        columns = [self.table.c[column] for column in self.columns]
+        clauses = [
+            or_(*[column.ilike(word.replace('_', r'\_') + '%', escape='\\')
+                  for column in columns])
+            for word in words]
+        if where:
+            clauses.append(text(where))
+        statement = self.table.select().where(and_(*clauses)) \
+            .order_by(*reversed(columns), self.table.c.id) \
+            .limit(limit).offset(offset)
+        return statement, {}
+
+
+SEARCHES: Dict[str, Type[NameSearch]] = {
+    search.dialect: search for search in (SqliteNameSearch, PostgresNameSearch)
+}
+
+
+def install_name_search(table: Table, columns: Sequence[str]) -> None:
+    """ Registers the index DDL of every supported database with the table,
+        it runs when the table is created or dropped
+    """
+    for search in SEARCHES.values():
+        search(table, columns).install()
+
+
+def create_name_search(bind: Connectable, table: Table,
+                       columns: Sequence[str]) -> None:
+    """ Adds the index of the database to a table that already exists, run
+        at every start so databases created without it become searchable
+    """
+    with bind.begin() as connection:
+        name_search(connection.dialect.name, table, columns).create(connection)
+
+
+def name_search(dialect: str, table: Table,
+                columns: Sequence[str]) -> NameSearch:
+    """ Search for a database, LikeNameSearch where none is supported
+    """
+    return SEARCHES.get(dialect, LikeNameSearch)(table, columns)
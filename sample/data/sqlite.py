@@ -0,0 +1,114 @@
+""" SQLite performance profile
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+log = logging.getLogger(__name__)
+
+
+class SqliteProfile:
+    """ Pragmas applied to every new SQLite connection, plus periodic WAL
+        checkpoints and ``PRAGMA optimize``
+
+        WAL lets readers run while one writer commits, so reads scale with
+        gunicorn workers instead of queueing on the file lock. With
+        synchronous=NORMAL a commit only waits for the WAL write, a power
+        loss can drop the last transactions but never corrupts the file.
+
+        Maintenance piggybacks on connections being returned to the pool, at
+        most once per maintenance_interval seconds per worker. The checkpoint
+        is PASSIVE so it never waits for, or blocks, other connections.
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.mmap_size: int = 0
+        self.cache_size: int = -2000
+        self.busy_timeout: int = 5000
+        self.maintenance_interval: float = 300
+        self.maintenance_runs: int = 0
+        self._next_maintenance: float = 0
+        self._lock = threading.Lock()
+        self._installed: bool = False
+
+    def configure(self, enabled: bool, mmap_size: int, cache_size: int,
+                  busy_timeout: int, maintenance_interval: float) -> None:
+        """ Sets the profile, connections opened from now on use it
+
+            :param bool enabled: apply the profile at all
+            :param int mmap_size: bytes of the file read through mmap
+            :param int cache_size: page cache, pages or -KiB as in SQLite
+            :param int busy_timeout: milliseconds a locked database is
+                retried before "database is locked"
+            :param float maintenance_interval: seconds between checkpoints
+        """
+        with self._lock:
+            self.enabled = enabled
+            self.mmap_size = mmap_size
+            self.cache_size = cache_size
+            self.busy_timeout = busy_timeout
+            self.maintenance_interval = maintenance_interval
+            self._next_maintenance = time.monotonic() + maintenance_interval
+            if enabled and not self._installed:
+                event.listen(Pool, 'connect', self.on_connect)
+                event.listen(Pool, 'checkin', self.on_checkin)
+                self._installed = True
+
+    def pragmas(self) -> List[str]:
+        """ Statements run on each new connection
+        """
+        return [
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA temp_store=MEMORY',
+            f'PRAGMA mmap_size={int(self.mmap_size)}',
+            f'PRAGMA cache_size={int(self.cache_size)}',
+            f'PRAGMA busy_timeout={int(self.busy_timeout)}',
+        ]
+
+    def on_connect(self, dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        """ Pool connect event
+        """
+        if not self.enabled or not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in self.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    def on_checkin(self, dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        """ Pool checkin event, runs maintenance when it is due
+        """
+        if not self.enabled or not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_maintenance:
+                return
+            self._next_maintenance = now + self.maintenance_interval
+        self.maintain(dbapi_connection)
+
+    def maintain(self, dbapi_connection: sqlite3.Connection) -> None:
+        """ Moves committed WAL pages into the database file and refreshes
+            the query planner statistics
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            cursor.execute('PRAGMA optimize')
+            self.maintenance_runs += 1
+        except sqlite3.Error as error:
+            log.warning('SQLite maintenance failed: %s', error)
+        finally:
+            cursor.close()
+
+
+sqlite_profile: SqliteProfile = SqliteProfile()
@@ -0,0 +1,207 @@
+""" Logging pipeline
+
+    Configured once per process. Loggers hand records to a bounded queue,
+    a listener thread formats them and writes them to stdout, so a request
+    never waits on the terminal or a log collector. When the queue is full
+    records are dropped and counted instead of blocking the caller.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+TEXT_FORMAT: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has, anything else was passed as extra
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord(
+    '', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON document per record, extra fields are added as keys
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in document:
+                document[key] = value
+        return json.dumps(document, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """ Keeps a share of the records below WARNING of chosen loggers
+
+        :param dict rates: logger name to share kept (0 to 1), a name also
+            applies to its child loggers
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def rate(self, name: str) -> Optional[float]:
+        """ Share kept of a logger's records, None keeps every record
+        """
+        if name not in self._resolved:
+            rate, part = None, name
+            while part:
+                if part in self.rates:
+                    rate = self.rates[part]
+                    break
+                part = part.rpartition('.')[0]
+            self._resolved[name] = rate
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class StdoutHandler(logging.StreamHandler):
+    """ Writes to whatever sys.stdout is when the record is written
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """ QueueHandler that drops records instead of blocking when the queue
+        is full, and leaves formatting to the listener thread
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments and tracebacks may change or go away once the caller
+        # moves on, they are resolved here; everything else is formatted by
+        # the listener.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """ Root handler and listener of this process
+
+        A forked gunicorn worker does not inherit the listener thread, it
+        gets a new queue and listener of its own right after the fork.
+    """
+
+    def __init__(self):
+        self.handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        self.output: Optional[logging.Handler] = None
+        self.queue_size: int = 10000
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        """ True once configure ran
+        """
+        return self.handler is not None
+
+    def configure(self, level, json_lines: bool = True,
+                  levels: Dict[str, str] = None,
+                  sampling: Dict[str, float] = None,
+                  queue_size: int = 10000) -> None:
+        """ Replaces the root handlers with the queue handler, later calls
+            only change levels and sampling
+
+            :param level: level of the root logger
+            :param bool json_lines: JSON documents instead of text lines
+            :param dict levels: logger name to level
+            :param dict sampling: logger name to share of records below
+                WARNING that are kept
+            :param int queue_size: records waiting to be written before new
+                ones are dropped
+        """
+        with self._lock:
+            root = logging.getLogger()
+            root.setLevel(level)
+            for name, logger_level in (levels or {}).items():
+                logging.getLogger(name).setLevel(logger_level)
+            if self.handler is None:
+                self.queue_size = queue_size
+                self.output = StdoutHandler()
+                self.handler = BoundedQueueHandler(queue.Queue(queue_size))
+                for handler in list(root.handlers):
+                    root.removeHandler(handler)
+                root.addHandler(self.handler)
+                self._start()
+                atexit.register(self.stop)
+                if hasattr(os, 'register_at_fork'):
+                    os.register_at_fork(after_in_child=self._after_fork)
+            self.output.setFormatter(
+                JsonFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+            self.handler.filters = []
+            if sampling:
+                self.handler.addFilter(SamplingFilter(sampling))
+
+    def _start(self) -> None:
+        self.listener = QueueListener(self.handler.queue, self.output)
+        self.listener.start()
+
+    def _after_fork(self) -> None:
+        """ The child starts with an empty queue and a listener of its own
+        """
+        if self.handler is None:
+            return
+        self._lock = threading.Lock()
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.handler.dropped = 0
+        self._start()
+
+    def stop(self) -> None:
+        """ Writes every queued record and stops the listener
+        """
+        if self.listener is not None and self.listener._thread is not None:  # pylint: disable=protected-access
+            self.listener.stop()
+
+
+def parse_pairs(text: str) -> Dict[str, str]:
+    """ ``name=value,...`` as a dict
+    """
+    pairs: Dict[str, str] = {}
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        name, _, value = part.partition('=')
+        pairs[name.strip()] = value.strip()
+    return pairs
+
+
+log_pipeline: LogPipeline = LogPipeline()
@@ -3,25 +3,28 @@
     python
 """
 import os
-import sys
 import tempfile
 import logging
 from logging import Logger
 
+from .logs import log_pipeline, parse_pairs
+
 
 def get_logger(name: str = __name__) -> Logger:
     """ Gets a logger that will output to sys out by default
+
+        The logging pipeline is configured by the first call, every logger
+        shares its single queued stdout handler.
     """
-    root: Logger = logging.getLogger(name)
-    level: int = logging.DEBUG if environment_is_local() else logging.INFO
-    root.setLevel(level)
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(level)
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    root.addHandler(handler)
-    return root
+    if not log_pipeline.configured:
+        log_pipeline.configure(
+            logging.WARNING,
+            json_lines=LOG_FORMAT == 'json',
+            levels={'sample': LOG_LEVEL, **parse_pairs(LOG_LEVELS)},
+            sampling={name: float(rate) for name, rate
+                      in parse_pairs(LOG_SAMPLING).items()},
+            queue_size=LOG_QUEUE_SIZE)
+    return logging.getLogger(name)
 
 
 def environment_is_local() -> bool:
@@ -38,12 +41,46 @@ def to_bool(value: str) -> bool:
 
 TITLE: str = os.getenv('TITLE', 'Sample App')
 
+################################################################################
+# Logging, see sample.logs
+################################################################################
+# Level of this application's loggers, other libraries log WARNING and up
+LOG_LEVEL: str = os.getenv(
+    'LOG_LEVEL', 'DEBUG' if environment_is_local() else 'INFO').upper()
+# json (one document per line) or text
+LOG_FORMAT: str = os.getenv('LOG_FORMAT', 'json').lower()
+# Per logger levels, e.g. sample.api.authentication=WARNING,sqlalchemy=INFO.
+# The pool logs every checkout at DEBUG.
+LOG_LEVELS: str = os.getenv('LOG_LEVELS', 'sample.data.pool=WARNING')
+# Share of records below WARNING kept per logger, for hot path messages,
+# e.g. sample.api.authentication=0.01
+LOG_SAMPLING: str = os.getenv('LOG_SAMPLING', '')
+# Records waiting to be written before new ones are dropped
+LOG_QUEUE_SIZE: int = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
 ################################################################################
 # Flask / WSGI Settings
 ################################################################################
 APPLICATION_PORT: int = int(os.getenv('APPLICATION_PORT', '5000'))
 APPLICATION_BIND: str = os.getenv('APPLICATION_BIND', '127.0.0.1')
 
+# Gunicorn, each can be overridden by the matching python -m sample flag
+# e.g. --workers=auto. "auto" sizes workers from the CPUs this process may use.
+GUNICORN_WORKERS: str = os.getenv('GUNICORN_WORKERS', '4')
+GUNICORN_THREADS: int = int(os.getenv('GUNICORN_THREADS', '1'))
+# sync, gthread or gevent (gevent has to be installed)
+GUNICORN_WORKER_CLASS: str = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+GUNICORN_KEEPALIVE: int = int(os.getenv('GUNICORN_KEEPALIVE', '2'))
+GUNICORN_BACKLOG: int = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+# Workers are restarted after max_requests (plus up to jitter) requests,
+# 0 never restarts them
+GUNICORN_MAX_REQUESTS: int = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+GUNICORN_MAX_REQUESTS_JITTER: int = int(
+    os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+GUNICORN_TIMEOUT: int = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+GUNICORN_PRELOAD_APP: bool = to_bool(
+    os.getenv('GUNICORN_PRELOAD_APP', 'True'))
+
 FLASK_DEBUG: bool = to_bool(os.getenv('FLASK_DEBUG', 'False'))
 FLASK_URL_PREFIX: str = os.getenv('FLASK_URL_PREFIX', '/api')
 ################################################################################
@@ -60,6 +97,67 @@ REST_PLUS_SWAGGER: bool = to_bool(
 REST_PLUS_ERROR_404_HELP: bool = to_bool(
     os.getenv('REST_PLUS_ERROR_404_HELP'))
 
+# Per request query count and timings, served in the Prometheus format at
+# /status/metrics and as Server-Timing headers. Workers leave their counters
+# in METRICS_FOLDER (inside APP_DATA_FOLDER) every METRICS_FLUSH_INTERVAL
+# seconds, empty only reports the worker answering.
+METRICS_ENABLED: bool = to_bool(os.getenv('METRICS_ENABLED', 'True'))
+METRICS_SERVER_TIMING: bool = to_bool(
+    os.getenv('METRICS_SERVER_TIMING', 'True'))
+METRICS_FOLDER: str = os.getenv('METRICS_FOLDER', 'metrics')
+METRICS_FLUSH_INTERVAL: float = float(
+    os.getenv('METRICS_FLUSH_INTERVAL', '1'))
+
+# Request profiling, see sample.api.profiling. A request sending
+# PROFILE_SECRET as X-Profile header or ?profile= runs under cProfile, as does
+# a PROFILE_SAMPLE_RATE share of all requests. The newest PROFILE_RETENTION
+# profiles are kept in PROFILE_FOLDER (inside APP_DATA_FOLDER).
+PROFILE_ENABLED: bool = to_bool(os.getenv('PROFILE_ENABLED', 'False'))
+PROFILE_SECRET: str = os.getenv('PROFILE_SECRET', '')
+PROFILE_SAMPLE_RATE: float = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_FOLDER: str = os.getenv('PROFILE_FOLDER', 'profiles')
+PROFILE_RETENTION: int = int(os.getenv('PROFILE_RETENTION', '50'))
+
+# Keyset pagination on collection endpoints
+PAGE_DEFAULT_LIMIT: int = int(os.getenv('PAGE_DEFAULT_LIMIT', '100'))
+PAGE_MAX_LIMIT: int = int(os.getenv('PAGE_MAX_LIMIT', '1000'))
+
+# Rows read from the database per batch when streaming a collection
+STREAM_BATCH_SIZE: int = int(os.getenv('STREAM_BATCH_SIZE', '1000'))
+
+# Name search, pages of SEARCH_DEFAULT_LIMIT matches up to SEARCH_MAX_RESULTS.
+# Every active match is ranked and the best SEARCH_CANDIDATES are kept to page
+# through, a two character prefix matching much of a large table costs most.
+SEARCH_DEFAULT_LIMIT: int = int(os.getenv('SEARCH_DEFAULT_LIMIT', '10'))
+SEARCH_MAX_RESULTS: int = int(os.getenv('SEARCH_MAX_RESULTS', '50'))
+SEARCH_CANDIDATES: int = int(os.getenv('SEARCH_CANDIDATES', '200'))
+
+# Soft deleted rows are moved to their archive table by python -m sample
+# --archive once inactive for ARCHIVE_RETENTION_DAYS, ARCHIVE_BATCH_SIZE rows
+# per transaction.
+ARCHIVE_RETENTION_DAYS: float = float(os.getenv('ARCHIVE_RETENTION_DAYS', '30'))
+ARCHIVE_BATCH_SIZE: int = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+
+
+################################################################################
+# Authentication
+################################################################################
+# Token signing algorithm: RS256, ES256, EdDSA or HS256
+TOKEN_ALGORITHM: str = os.getenv('TOKEN_ALGORITHM', 'RS256')
+# Seconds of clock skew tolerated on exp and nbf
+JWT_LEEWAY: int = int(os.getenv('JWT_LEEWAY', '0'))
+# Verified tokens kept so repeat requests skip signature checks, 0 disables
+TOKEN_CACHE_SIZE: int = int(os.getenv('TOKEN_CACHE_SIZE', '1024'))
+TOKEN_CACHE_TTL: int = int(os.getenv('TOKEN_CACHE_TTL', '300'))
+# PEM file holding the signing key, relative paths are inside
+# APP_DATA_FOLDER. Generated on first start when missing, empty keeps a new
+# key per start.
+TOKEN_KEY_FILE: str = os.getenv('TOKEN_KEY_FILE', '')
+# Where issued tokens are tracked: "memory" (per process) or "sqlite" (a file
+# in APP_DATA_FOLDER shared by every worker)
+TOKEN_REGISTRY: str = os.getenv('TOKEN_REGISTRY', 'memory').lower()
+TOKEN_REGISTRY_FILE: str = os.getenv('TOKEN_REGISTRY_FILE', 'tokens.db')
+
 
 ################################################################################
 # CORS
@@ -85,3 +183,51 @@ SQLALCHEMY_DATABASE_URI: str = SQL_LITE_DATABASE_CONNECTION_URI \
     if environment_is_local() else os.getenv('SQLALCHEMY_DATABASE_URI')
 SQLALCHEMY_TRACK_MODIFICATIONS: bool = to_bool(
     os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS', 'False'))
+
+# Read replicas, comma separated URIs. Reads go to a replica, writes to
+# SQLALCHEMY_DATABASE_URI. A replica is picked per read by round_robin or
+# least_connections; a token's reads stay on the primary for
+# DATABASE_STICKY_SECONDS after it wrote so it reads its own writes.
+SQLALCHEMY_REPLICA_URIS: list = [
+    uri.strip() for uri in os.getenv('SQLALCHEMY_REPLICA_URIS', '').split(',')
+    if uri.strip()]
+DATABASE_REPLICA_STRATEGY: str = os.getenv(
+    'DATABASE_REPLICA_STRATEGY', 'round_robin').lower()
+DATABASE_STICKY_SECONDS: float = float(
+    os.getenv('DATABASE_STICKY_SECONDS', '5'))
+# Where those writes are remembered: "memory" (per worker, a token's next
+# request may hit another worker and read a stale replica) or "sqlite" (a
+# file in APP_DATA_FOLDER shared by every worker). Follows TOKEN_REGISTRY and
+# shares its file unless set.
+DATABASE_WRITE_MARKS: str = os.getenv(
+    'DATABASE_WRITE_MARKS', TOKEN_REGISTRY).lower()
+DATABASE_WRITE_MARKS_FILE: str = os.getenv(
+    'DATABASE_WRITE_MARKS_FILE', TOKEN_REGISTRY_FILE)
+
+# Connection pool, see sample.data.pool.engine_options
+DATABASE_POOL_SIZE: int = int(os.getenv('DATABASE_POOL_SIZE', '5'))
+DATABASE_MAX_OVERFLOW: int = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+DATABASE_POOL_TIMEOUT: float = float(os.getenv('DATABASE_POOL_TIMEOUT', '30'))
+DATABASE_POOL_RECYCLE: int = int(os.getenv('DATABASE_POOL_RECYCLE', '1800'))
+DATABASE_POOL_PRE_PING: bool = to_bool(
+    os.getenv('DATABASE_POOL_PRE_PING', 'True'))
+DATABASE_STATEMENT_CACHE_SIZE: int = int(
+    os.getenv('DATABASE_STATEMENT_CACHE_SIZE', '100'))
+
+# SQLite performance profile (WAL, synchronous=NORMAL, temp_store=MEMORY),
+# see sample.data.sqlite. Checkpoints and PRAGMA optimize run every
+# SQLITE_MAINTENANCE_INTERVAL seconds.
+SQLITE_PERFORMANCE_PROFILE: bool = to_bool(
+    os.getenv('SQLITE_PERFORMANCE_PROFILE', 'False'))
+SQLITE_MMAP_SIZE: int = int(os.getenv('SQLITE_MMAP_SIZE', '268435456'))
+# Pages when positive, KiB when negative
+SQLITE_CACHE_SIZE: int = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))
+# Milliseconds a locked database is retried
+SQLITE_BUSY_TIMEOUT: int = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+SQLITE_MAINTENANCE_INTERVAL: float = float(
+    os.getenv('SQLITE_MAINTENANCE_INTERVAL', '300'))
+
+# Per worker read-through cache of single entity reads, 0 disables. Other
+# workers' writes are seen once an entry is ENTITY_CACHE_TTL seconds old.
+ENTITY_CACHE_SIZE: int = int(os.getenv('ENTITY_CACHE_SIZE', '0'))
+ENTITY_CACHE_TTL: float = float(os.getenv('ENTITY_CACHE_TTL', '30'))
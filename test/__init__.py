@@ -1,3 +1,3 @@
 """ Test
 """
-__all__ = ['api']
+__all__ = ['api', 'bench', 'data']
@@ -1,8 +1,19 @@
 """ Test Status Endpoint
 """
+import json
+import os
+import sqlite3
 import unittest
+from unittest import mock
+from flask import g
+from sqlalchemy import event
 from sample import settings
-from sample.app import main
+from sample.app import main, write_marks
+from sample.data import db
+from sample.data.access import PersonAccess, archive_inactive
+from sample.data.access.pagination import encode_cursor
+from sample.data.routing import (
+    ReplicaRouter, SqliteWriteMarks, replica_router)
 
 
 class TestPersonCollection(unittest.TestCase):
@@ -11,10 +22,22 @@ class TestPersonCollection(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.api = main(UNIT_TEST=True).test_client()
+        cls.application = main(UNIT_TEST=True)
+        cls.api = cls.application.test_client()
         cls.url_prefix = settings.FLASK_URL_PREFIX
+        with cls.application.app_context():
+            access = PersonAccess()
+            for number in range(5):
+                access.create(1, {
+                    'first_name': f'First {number}',
+                    'last_name': f'Last {number}'})
         return super().setUpClass()
 
+    def token(self) -> str:
+        """ Fresh token for a protected call
+        """
+        return self.api.get(f'{self.url_prefix}/token').json['token']
+
     def test_get(self):
         """ Test Get method on Status
         """
@@ -23,3 +46,594 @@ class TestPersonCollection(unittest.TestCase):
             f'{self.url_prefix}/person', headers={'Authorization': token})
         self.assertIsNotNone(response)
         self.assertAlmostEqual(response.status_code, 200)
+
+    def test_post(self):
+        """ The created person is returned
+        """
+        response = self.api.post(
+            f'{self.url_prefix}/person', headers={'Authorization': self.token()},
+            json={'first_name': 'Ada', 'last_name': 'Lovelace'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['last_name'], 'Lovelace')
+        self.assertIsNotNone(response.json['id'])
+
+    def test_get_pages(self):
+        """ Following the next links walks every person exactly once
+        """
+        headers = {'Authorization': self.token()}
+        url = f'{self.url_prefix}/person?limit=2'
+        ids = []
+        while url:
+            response = self.api.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json), 2)
+            ids += [person['id'] for person in response.json]
+            link = response.headers.get('Link')
+            url = link[link.index('<') + 1:link.index('>')] if link else None
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(len(ids), 6)
+
+    def test_get_pages_descending(self):
+        """ A descending sort returns the newest person first
+        """
+        response = self.api.get(
+            f'{self.url_prefix}/person?limit=3&sort=-id',
+            headers={'Authorization': self.token()})
+        ids = [person['id'] for person in response.json]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIn('rel="next"', response.headers['Link'])
+
+    def test_get_bad_page(self):
+        """ Unknown sorts and forged cursors are rejected
+        """
+        headers = {'Authorization': self.token()}
+        response = self.api.get(
+            f'{self.url_prefix}/person?sort=first_name', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.api.get(
+            f'{self.url_prefix}/person?after=not-a-cursor', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        for value in ('not a date', 12, ['2020-01-01'], '99999-01-01'):
+            after = encode_cursor('created_on', [value], 1)
+            response = self.api.get(
+                f'{self.url_prefix}/person?sort=created_on&after={after}',
+                headers=headers)
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_get_filtered(self):
+        """ Filters narrow the page and the next link keeps them
+        """
+        headers = {'Authorization': self.token()}
+        response = self.api.get(
+            f'{self.url_prefix}/person?last_name=Last%202&first_name=First%202',
+            headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([person['last_name'] for person in response.json],
+                         ['Last 2'])
+        response = self.api.get(
+            f'{self.url_prefix}/person?created_by_id=1&limit=2'
+            '&created_on[gte]=2000-01-01', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('created_on%5Bgte%5D=2000-01-01',
+                      response.headers['Link'])
+        for query in ('middle_name=x', 'first_name=First%202', 'active=maybe'):
+            response = self.api.get(
+                f'{self.url_prefix}/person?{query}', headers=headers)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_get_pages_multi_sort(self):
+        """ Paging on last_name,first_name returns rows in name order
+        """
+        headers = {'Authorization': self.token()}
+        url = f'{self.url_prefix}/person?limit=2&sort=-last_name,-first_name'
+        names = []
+        while url:
+            response = self.api.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            names += [(person['last_name'], person['first_name'])
+                      for person in response.json]
+            link = response.headers.get('Link')
+            url = link[link.index('<') + 1:link.index('>')] if link else None
+        self.assertEqual(names, sorted(names, reverse=True))
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_get_fields(self):
+        """ ?fields= limits the output of pages, streams and items
+        """
+        headers = {'Authorization': self.token()}
+        response = self.api.get(
+            f'{self.url_prefix}/person?fields=id,last_name&limit=2',
+            headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([set(person) for person in response.json],
+                         [{'id', 'last_name'}] * 2)
+        response = self.api.get(
+            f'{self.url_prefix}/person?fields=first_name&stream=true',
+            headers=headers)
+        first = json.loads(response.get_data(as_text=True).splitlines()[0])
+        self.assertEqual(set(first), {'first_name'})
+        response = self.api.get(
+            f'{self.url_prefix}/person/1?fields=first_name', headers=headers)
+        self.assertEqual(response.json, {'first_name': 'System'})
+        self.assertIn('ETag', response.headers)
+        response = self.api.get(
+            f'{self.url_prefix}/person?fields=salary', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_stream(self):
+        """ Streaming returns every person as one JSON document per line
+        """
+        token = self.token()
+        for query, headers in (
+                ('?stream=true', {'Authorization': token}),
+                ('', {'Authorization': token,
+                      'Accept': 'application/x-ndjson'})):
+            response = self.api.get(
+                f'{self.url_prefix}/person{query}', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            lines = response.get_data(as_text=True).splitlines()
+            ids = [json.loads(line)['id'] for line in lines]
+            self.assertEqual(len(ids), 6)
+            self.assertEqual(ids, sorted(ids))
+
+
+class TestPersonSearch(unittest.TestCase):
+    """ Search Class Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(UNIT_TEST=True, SEARCH_DEFAULT_LIMIT=2)
+        cls.api = cls.application.test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        with cls.application.app_context():
+            PersonAccess().bulk_create(1, [
+                {'first_name': 'Ada', 'last_name': f'Lovelace {number}'}
+                for number in range(3)])
+        return super().setUpClass()
+
+    def test_get(self):
+        """ Matches are paged through the next link
+        """
+        headers = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        response = self.api.get(
+            f'{self.url_prefix}/person/search?q=ada%20lov', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+        link = response.headers['Link']
+        self.assertIn('offset=2', link)
+        response = self.api.get(
+            link[link.index('<') + 1:link.index('>')], headers=headers)
+        self.assertEqual(len(response.json), 1)
+        self.assertNotIn('Link', response.headers)
+        response = self.api.get(
+            f'{self.url_prefix}/person/search?q=%20', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_inactive(self):
+        """ Deleted persons are only found when asked for
+        """
+        headers = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        with self.application.app_context():
+            access = PersonAccess()
+            ids = access.bulk_create(1, [
+                {'first_name': 'Edsger', 'last_name': 'Dijkstra'}]).ids
+            access.bulk_delete(1, ids=ids)
+        url = f'{self.url_prefix}/person/search?q=dijkstra'
+        self.assertEqual(self.api.get(url, headers=headers).json, [])
+        response = self.api.get(f'{url}&include_inactive=true', headers=headers)
+        self.assertEqual([person['id'] for person in response.json], ids)
+
+
+class TestPersonArchive(unittest.TestCase):
+    """ Archive Class Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(UNIT_TEST=True)
+        cls.api = cls.application.test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        with cls.application.app_context():
+            access = PersonAccess()
+            cls.ids = access.bulk_create(1, [
+                {'first_name': 'Ada', 'last_name': f'Lovelace {number}'}
+                for number in range(3)]).ids
+            access.bulk_delete(1, ids=cls.ids)
+            archive_inactive(0)
+        return super().setUpClass()
+
+    def test_get(self):
+        """ Archived persons are paged and read one by one
+        """
+        headers = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        response = self.api.get(
+            f'{self.url_prefix}/person/archive?limit=2', headers=headers)
+        self.assertEqual([person['id'] for person in response.json],
+                         self.ids[:2])
+        self.assertIn('Link', response.headers)
+        response = self.api.get(
+            f'{self.url_prefix}/person/archive/{self.ids[2]}',
+            headers=headers)
+        self.assertEqual(response.json['last_name'], 'Lovelace 2')
+        response = self.api.get(
+            f'{self.url_prefix}/person/{self.ids[2]}?include_inactive=true',
+            headers=headers)
+        self.assertEqual(response.status_code, 404)
+        response = self.api.get(
+            f'{self.url_prefix}/person/archive/1', headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+
+class TestPersonBulk(unittest.TestCase):
+    """ Bulk Class Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = main(UNIT_TEST=True).test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        return super().setUpClass()
+
+    def test_post(self):
+        """ Valid rows are created, invalid rows are reported by index
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        response = self.api.post(
+            f'{self.url_prefix}/person/bulk',
+            headers={'Authorization': token},
+            json=[
+                {'first_name': 'Ada', 'last_name': 'Lovelace'},
+                {'first_name': 'Nobody'},
+                {'first_name': 'Alan', 'last_name': 'Turing'},
+                'not a person',
+                {'first_name': {'x': 1}, 'last_name': 'Hopper'},
+                {'first_name': 'Grace', 'last_name': 'Hopper', 'middle_name': 12},
+            ])
+        self.assertEqual(response.status_code, 201)
+        ids = response.json['ids']
+        self.assertEqual(len(ids), 6)
+        self.assertIsNone(ids[1])
+        self.assertIsNone(ids[3])
+        self.assertEqual(
+            [error['index'] for error in response.json['errors']],
+            [1, 3, 4, 5])
+        self.assertIn('first_name', response.json['errors'][2]['message'])
+        person = self.api.get(
+            f'{self.url_prefix}/person/{ids[2]}',
+            headers={'Authorization': token})
+        self.assertEqual(person.json['last_name'], 'Turing')
+
+    def test_post_not_a_list(self):
+        """ The body has to be a list
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        response = self.api.post(
+            f'{self.url_prefix}/person/bulk',
+            headers={'Authorization': token},
+            json={'first_name': 'Ada', 'last_name': 'Lovelace'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_and_delete(self):
+        """ Bulk changes apply to every selected row
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        ids = self.api.post(
+            f'{self.url_prefix}/person/bulk', headers=headers,
+            json=[{'first_name': 'Grace', 'last_name': 'Hopper'}] * 3
+        ).json['ids']
+        response = self.api.patch(
+            f'{self.url_prefix}/person/bulk', headers=headers,
+            json={'ids': ids[:2], 'values': {'middle_name': 'Brewster'}})
+        self.assertEqual(response.json['affected'], 2)
+        middle_names = [
+            self.api.get(f'{self.url_prefix}/person/{entity_id}',
+                         headers=headers).json['middle_name']
+            for entity_id in ids]
+        self.assertEqual(middle_names, ['Brewster', 'Brewster', None])
+
+        response = self.api.delete(
+            f'{self.url_prefix}/person/bulk', headers=headers,
+            json={'filter': {'last_name': 'Hopper'}})
+        self.assertEqual(response.json['affected'], 3)
+        person = self.api.get(
+            f'{self.url_prefix}/person/{ids[2]}', headers=headers)
+        self.assertEqual(person.status_code, 404)
+        person = self.api.get(
+            f'{self.url_prefix}/person/{ids[2]}?include_inactive=true',
+            headers=headers)
+        self.assertFalse(person.json['active'])
+
+    def test_patch_without_selection(self):
+        """ A bulk change has to select rows
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        response = self.api.patch(
+            f'{self.url_prefix}/person/bulk',
+            headers={'Authorization': token},
+            json={'values': {'middle_name': 'Everyone'}})
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_invalid_values(self):
+        """ Values and filters of the wrong type are refused before anything
+            is written
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        for body in ({'ids': [1], 'values': {'active': 'notbool'}},
+                     {'ids': [1], 'values': {'created_on': 'not a date'}},
+                     {'filter': {'active': 'notbool'},
+                      'values': {'middle_name': 'Everyone'}}):
+            response = self.api.patch(
+                f'{self.url_prefix}/person/bulk', headers=headers, json=body)
+            self.assertEqual(response.status_code, 400, body)
+
+
+class TestPersonItem(unittest.TestCase):
+    """ Item Class Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = main(UNIT_TEST=True, ENTITY_CACHE_SIZE=10).test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        return super().setUpClass()
+
+    def test_get_cached(self):
+        """ Repeated reads are served from the entity cache until a write
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        url = f'{self.url_prefix}/person/1'
+        before = self.api.get(f'{self.url_prefix}/status/entity-cache').json
+        self.assertEqual(self.api.get(url, headers=headers).status_code, 200)
+        self.api.get(url, headers=headers)
+        after = self.api.get(f'{self.url_prefix}/status/entity-cache').json
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+        response = self.api.put(
+            url, headers=headers, json={'middle_name': 'Updated'})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.api.get(url, headers=headers).json['middle_name'], 'Updated')
+
+    def test_get_missing(self):
+        """ Unknown ids are not found
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        response = self.api.get(
+            f'{self.url_prefix}/person/999999', headers={'Authorization': token})
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_not_modified(self):
+        """ A client holding the current ETag gets 304 until the row changes
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        url = f'{self.url_prefix}/person/1'
+        response = self.api.get(url, headers=headers)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        self.assertIn('Last-Modified', response.headers)
+        response = self.api.get(
+            url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        self.api.put(url, headers=headers, json={'middle_name': 'Changed'})
+        response = self.api.get(
+            url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_put_if_match(self):
+        """ Updating an old version fails with 412
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        url = f'{self.url_prefix}/person/1'
+        etag = self.api.get(url, headers=headers).headers['ETag']
+        response = self.api.put(
+            url, headers={**headers, 'If-Match': etag},
+            json={'middle_name': 'First'})
+        self.assertEqual(response.status_code, 204)
+        response = self.api.put(
+            url, headers={**headers, 'If-Match': etag},
+            json={'middle_name': 'Second'})
+        self.assertEqual(response.status_code, 412)
+
+    def test_collection_not_modified(self):
+        """ The page ETag follows writes to its rows, rows leaving it
+            included
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        url = f'{self.url_prefix}/person?limit=5'
+        etag = self.api.get(url, headers=headers).headers['ETag']
+        response = self.api.get(
+            url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.api.put(f'{self.url_prefix}/person/1', headers=headers,
+                     json={'middle_name': 'Again'})
+        response = self.api.get(
+            url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        person = self.api.post(
+            f'{self.url_prefix}/person', headers=headers,
+            json={'first_name': 'Ada', 'last_name': 'Lovelace'}).json
+        url = f'{self.url_prefix}/person?limit=5&sort=-id'
+        etag = self.api.get(url, headers=headers).headers['ETag']
+        self.api.delete(f'{self.url_prefix}/person/{person["id"]}',
+                        headers=headers)
+        response = self.api.get(
+            url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_collection_validator_cost(self):
+        """ The ETag of a page comes from the page's own SELECT, streams
+            carry none
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=unused-argument,too-many-arguments
+            statements.append(statement)
+
+        with self.api.application.app_context():
+            engine = db.get_engine()
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            response = self.api.get(
+                f'{self.url_prefix}/person?limit=2&fields=first_name',
+                headers=headers)
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+        self.assertIn('ETag', response.headers)
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('count(', statements[0])
+        response = self.api.get(
+            f'{self.url_prefix}/person?stream=true', headers=headers)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_put_and_delete_missing(self):
+        """ Writes to a person that does not exist answer 404
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        url = f'{self.url_prefix}/person/999999'
+        response = self.api.put(url, headers=headers,
+                                json={'middle_name': 'Nobody'})
+        self.assertEqual(response.status_code, 404)
+        if_match = 'W/"999999-20200101000000000000"'
+        response = self.api.put(
+            url, headers={**headers, 'If-Match': if_match},
+            json={'middle_name': 'Nobody'})
+        self.assertEqual(response.status_code, 404)
+        response = self.api.delete(url, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_put_and_post_not_an_object(self):
+        """ A null or non object body is refused with 400
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        for body in ('null', '[1]', '"Ada"'):
+            response = self.api.put(
+                f'{self.url_prefix}/person/1', data=body,
+                headers={**headers, 'Content-Type': 'application/json'})
+            self.assertEqual(response.status_code, 400, body)
+            response = self.api.post(
+                f'{self.url_prefix}/person', data=body,
+                headers={**headers, 'Content-Type': 'application/json'})
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_delete(self):
+        """ A deleted person is gone from reads and updates, deleting it
+            again is fine
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        person = self.api.post(
+            f'{self.url_prefix}/person', headers=headers,
+            json={'first_name': 'Ada', 'last_name': 'Lovelace'}).json
+        url = f'{self.url_prefix}/person/{person["id"]}'
+        self.assertEqual(self.api.delete(url, headers=headers).status_code, 204)
+        self.assertEqual(self.api.get(url, headers=headers).status_code, 404)
+        deleted_etag = self.api.get(f'{url}?include_inactive=true',
+                                    headers=headers).headers['ETag']
+        self.assertEqual(self.api.delete(url, headers=headers).status_code, 204)
+        response = self.api.put(url, headers=headers,
+                                json={'middle_name': 'Byron'})
+        self.assertEqual(response.status_code, 404)
+        response = self.api.get(f'{url}?include_inactive=true', headers=headers)
+        self.assertIsNone(response.json['middle_name'])
+        self.assertEqual(response.headers['ETag'], deleted_etag)
+
+
+class TestPersonReplica(unittest.TestCase):
+    """ Reads on replicas, writes on the primary
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        folder = os.path.abspath(settings.APP_DATA_FOLDER)
+        cls.replicas = [os.path.join(folder, f'replica_{number}.db')
+                        for number in range(2)]
+        cls.application = main(
+            UNIT_TEST=True,
+            SQLALCHEMY_REPLICA_URIS=[
+                f'sqlite:///{path}' for path in cls.replicas],
+            DATABASE_STICKY_SECONDS=60)
+        # The replicas start as copies of the freshly built primary and are
+        # never replicated to, rows written later only exist on the primary
+        primary = sqlite3.connect(cls.application.config['SQL_LITE_DATABASE_PATH'])
+        for path in cls.replicas:
+            replica = sqlite3.connect(path)
+            primary.backup(replica)
+            replica.close()
+        primary.close()
+        cls.api = cls.application.test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        return super().setUpClass()
+
+    def test_read_your_writes(self):
+        """ The writing token reads the primary, other tokens a replica
+        """
+        writer = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        reader = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        response = self.api.post(
+            f'{self.url_prefix}/person/bulk', headers=writer,
+            json=[{'first_name': 'Grace', 'last_name': 'Hopper'}])
+        url = f'{self.url_prefix}/person/{response.json["ids"][0]}'
+        self.assertEqual(self.api.get(url, headers=writer).status_code, 200)
+        self.assertEqual(self.api.get(url, headers=reader).status_code, 404)
+        self.assertEqual(
+            self.api.get(f'{self.url_prefix}/person/1',
+                         headers=reader).status_code, 200)
+
+    def test_strategies(self):
+        """ Replicas take turns, least connections picks an idle one
+        """
+        with self.application.app_context():
+            chosen = [replica_router.choose(db) for _ in range(4)]
+            self.assertEqual(sorted(chosen), ['replica_0', 'replica_0',
+                                              'replica_1', 'replica_1'])
+            self.assertNotEqual(chosen[0], chosen[1])
+            replica_router.configure(
+                replica_router.binds, 'least_connections', 60)
+            try:
+                self.assertIn(replica_router.choose(db),
+                              ['replica_0', 'replica_1'])
+            finally:
+                replica_router.configure(
+                    replica_router.binds, 'round_robin', 60)
+
+    def test_shared_write_marks(self):
+        """ A write seen by one worker's router keeps the token on the
+            primary in every other worker sharing the marks file
+        """
+        config = {'DATABASE_WRITE_MARKS': 'sqlite',
+                  'DATABASE_WRITE_MARKS_FILE': 'write_marks_test.db'}
+        with mock.patch.dict(self.application.config, config):
+            marks = write_marks(self.application)
+        self.assertIsInstance(marks, SqliteWriteMarks)
+        self.addCleanup(os.remove, marks.path)
+        workers = [ReplicaRouter() for _ in range(2)]
+        for worker in workers:
+            worker.configure(replica_router.binds, 'round_robin', 60,
+                             SqliteWriteMarks(marks.path))
+        with self.application.app_context():
+            g.token_id = 'writer'
+            workers[0].record_write()
+            self.assertIsNone(workers[1].choose(db))
+            g.token_id = 'reader'
+            self.assertIn(workers[1].choose(db), ['replica_0', 'replica_1'])
+        self.assertIsNone(write_marks(self.application))
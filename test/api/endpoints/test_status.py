@@ -1,7 +1,15 @@
 """ Test Status Endpoint
 """
+import json
+import os
+import pstats
+import re
+import tempfile
+import threading
 import unittest
+from unittest import mock
 from sample import settings
+from sample.api.metrics import RequestMetrics, request_metrics
 from sample.app import main
 
 
@@ -21,3 +29,158 @@ class TestStatusCollection(unittest.TestCase):
         response = self.api.get(f'{self.url_prefix}/status')
         self.assertIsNotNone(response)
         self.assertAlmostEqual(response.status_code, 200)
+
+    def test_get_token_cache(self):
+        """ A repeated token is answered from the cache
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        before = self.api.get(f'{self.url_prefix}/status/token-cache').json
+        for _ in range(2):
+            self.api.get(
+                f'{self.url_prefix}/person', headers={'Authorization': token})
+        after = self.api.get(f'{self.url_prefix}/status/token-cache').json
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_get_pool(self):
+        """ Pool figures follow database use
+        """
+        response = self.api.get(f'{self.url_prefix}/status/pool')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.json['checkouts'], 0)
+        self.assertEqual(response.json['checked_out'], 0)
+
+    def test_get_metrics(self):
+        """ Requests are counted per endpoint with their SQL figures, other
+            workers' counters are added in
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        response = self.api.get(
+            f'{self.url_prefix}/person/1', headers={'Authorization': token})
+        self.assertRegex(response.headers['Server-Timing'],
+                         r'db;dur=[\d.]+;desc="\d+ queries", serialize;dur=')
+
+        with open(os.path.join(request_metrics.folder, 'other.json'), 'w') as other:
+            json.dump([['requests', '/api/person/<int:id>', 'GET', '200', 1000]],
+                      other)
+        response = self.api.get(f'{self.url_prefix}/status/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.data.decode('utf-8')
+        match = re.search(
+            r'sample_http_requests_total\{endpoint="/api/person/<int:id>",'
+            r'method="GET",status="200"\} (\d+)', text)
+        self.assertGreaterEqual(int(match.group(1)), 1001)
+        self.assertRegex(
+            text, r'sample_http_request_sql_queries_total\{endpoint='
+                  r'"/api/person/<int:id>",method="GET"\} [1-9]')
+        self.assertIn('sample_http_request_duration_seconds_bucket', text)
+
+    def test_metrics_first_scrape(self):
+        """ A worker whose first request is the scrape writes its own file
+        """
+        metrics = RequestMetrics()
+        folder = tempfile.mkdtemp()
+        metrics.configure(False, False, folder, 1.0)
+        metrics.aggregate()
+        names = os.listdir(folder)
+        self.assertEqual(len(names), 1)
+        self.assertNotEqual(names[0], 'None.json')
+
+    def test_metrics_write_failure(self):
+        """ Concurrent flushes do not collide and a failed write does not
+            fail the request that triggered it
+        """
+        threads = [threading.Thread(target=request_metrics.flush, args=(True,))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        with mock.patch('sample.api.metrics.os.replace',
+                        side_effect=OSError('disk full')):
+            request_metrics.flush(force=True)
+            request_metrics._next_flush = 0  # pylint: disable=protected-access
+            response = self.api.get(
+                f'{self.url_prefix}/person/1', headers={'Authorization': token})
+        self.assertEqual(response.status_code, 200)
+
+
+class TestStatusProfiles(unittest.TestCase):
+    """ Profiling Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = main(UNIT_TEST=True, PROFILE_ENABLED=True,
+                       PROFILE_SECRET='secret', PROFILE_RETENTION=2,
+                       PROFILE_FOLDER='test-profiles').test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        return super().setUpClass()
+
+    def test_profile_request(self):
+        """ Only requests with the secret are profiled, the newest profiles
+            are kept and can be listed and read
+        """
+        headers = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        url = f'{self.url_prefix}/person/1'
+        response = self.api.get(url, headers={**headers, 'X-Profile': 'wrong'})
+        self.assertNotIn('X-Profile-File', response.headers)
+
+        names = []
+        for _ in range(3):
+            response = self.api.get(
+                url, headers={**headers, 'X-Profile': 'secret'})
+            names.append(response.headers['X-Profile-File'])
+        response = self.api.get(f'{url}?profile=secret', headers=headers)
+        names.append(response.headers['X-Profile-File'])
+
+        listed = self.api.get(
+            f'{self.url_prefix}/status/profiles', headers=headers).json
+        self.assertEqual([profile['name'] for profile in listed],
+                         list(reversed(names))[:2])
+
+        response = self.api.get(
+            f'{self.url_prefix}/status/profiles/{names[-1]}', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        path = os.path.join(tempfile.mkdtemp(), names[-1])
+        with open(path, 'wb') as profile:
+            profile.write(response.data)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+        response.close()
+
+        response = self.api.get(
+            f'{self.url_prefix}/status/profiles/{names[0]}', headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_write_failure(self):
+        """ A profile that can not be written does not fail the request
+        """
+        headers = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        with mock.patch('cProfile.Profile.dump_stats',
+                        side_effect=OSError('disk full')):
+            response = self.api.get(
+                f'{self.url_prefix}/person?profile=secret', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-File', response.headers)
+
+    def test_profile_collection(self):
+        """ The query switch profiles collection pages and streams without
+            being read as a filter or copied into the next link
+        """
+        headers = {'Authorization': self.api.get(
+            f'{self.url_prefix}/token').json['token']}
+        self.api.post(f'{self.url_prefix}/person', headers=headers,
+                      json={'first_name': 'Ada', 'last_name': 'Lovelace'})
+        url = f'{self.url_prefix}/person?limit=1&profile=secret'
+        response = self.api.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Profile-File', response.headers)
+        self.assertIn('Link', response.headers)
+        self.assertNotIn('profile', response.headers['Link'])
+        response = self.api.get(f'{url}&stream=1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Profile-File', response.headers)
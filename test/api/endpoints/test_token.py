@@ -0,0 +1,41 @@
+""" Test Token Endpoint
+"""
+import unittest
+from sample import settings
+from sample.app import main
+
+
+class TestToken(unittest.TestCase):
+    """ Token Class Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = main(UNIT_TEST=True).test_client()
+        cls.url_prefix = settings.FLASK_URL_PREFIX
+        return super().setUpClass()
+
+    def test_get(self):
+        """ Issued tokens open protected endpoints
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        response = self.api.get(
+            f'{self.url_prefix}/person', headers={'Authorization': token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete(self):
+        """ A revoked token is rejected
+        """
+        token = self.api.get(f'{self.url_prefix}/token').json['token']
+        headers = {'Authorization': token}
+        response = self.api.delete(f'{self.url_prefix}/token', headers=headers)
+        self.assertEqual(response.status_code, 204)
+        response = self.api.get(f'{self.url_prefix}/person', headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+    def test_forged_token(self):
+        """ Tokens that do not verify are rejected
+        """
+        response = self.api.get(
+            f'{self.url_prefix}/person', headers={'Authorization': 'forged'})
+        self.assertEqual(response.status_code, 401)
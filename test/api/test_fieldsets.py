@@ -0,0 +1,45 @@
+""" Test sparse fieldsets
+"""
+import unittest
+from werkzeug.exceptions import BadRequest
+from sample.app import main
+from sample.api.endpoints.person import ENTITY
+from sample.api.fieldsets import FieldSets
+
+
+class TestFieldSets(unittest.TestCase):
+    """ Field Sets Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(UNIT_TEST=True)
+        return super().setUpClass()
+
+    def requested(self, query: str):
+        """ Field set named by a query string
+        """
+        with self.application.test_request_context(query):
+            return FieldSets.requested(ENTITY)
+
+    def test_requested(self):
+        """ Fields come back in model order, all fields mean no projection
+        """
+        self.assertEqual(self.requested('/?fields=last_name,id'),
+                         self.requested('/?fields=id,%20last_name'))
+        self.assertIsNone(self.requested('/'))
+        self.assertIsNone(self.requested('/?fields=' + ','.join(ENTITY)))
+        for query in ('/?fields=id,password', '/?fields=,'):
+            with self.assertRaises(BadRequest, msg=query):
+                self.requested(query)
+
+    def test_model_cached(self):
+        """ A field set's model is built once
+        """
+        field_sets = FieldSets()
+        fields = self.requested('/?fields=id,last_name')
+        model = field_sets.model(ENTITY, fields)
+        self.assertEqual(list(model), ['id', 'last_name'])
+        self.assertIs(field_sets.model(ENTITY, tuple(fields)), model)
+        self.assertIs(field_sets.model(ENTITY, None), ENTITY)
+        self.assertEqual(len(field_sets), 1)
@@ -0,0 +1,55 @@
+""" Test Signers
+"""
+import os
+import tempfile
+import time
+import unittest
+from sample.api.signers import SIGNERS, Signer, make_signer
+
+
+class TestSigners(unittest.TestCase):
+    """ Signer Test
+    """
+
+    def test_sign_and_verify(self):
+        """ Every backend verifies its own tokens and rejects the others
+        """
+        claims = {'jti': 'id', 'aud': 'localhost', 'exp': int(time.time()) + 60}
+        signers = [make_signer(algorithm) for algorithm in SIGNERS]
+        for signer in signers:
+            token = signer.sign(claims)
+            self.assertEqual(signer.verify(token, 'localhost'), claims)
+            for other in signers:
+                if other is not signer:
+                    with self.assertRaises(Exception):
+                        other.verify(token, 'localhost')
+
+    def test_key_file_is_reused(self):
+        """ The first signer writes the key, later signers read the same key
+        """
+        claims = {'aud': 'localhost'}
+        for algorithm in SIGNERS:
+            with tempfile.TemporaryDirectory() as folder:
+                path = os.path.join(folder, 'key')
+                first = make_signer(algorithm, path)
+                second = make_signer(algorithm, path)
+                self.assertEqual(
+                    second.verify(first.sign(claims), 'localhost'), claims)
+                self.assertEqual(os.listdir(folder), ['key'])
+
+    def test_unknown_algorithm(self):
+        """ Only the listed backends can be chosen
+        """
+        with self.assertRaises(ValueError):
+            make_signer('none')
+
+    def test_incomplete_signer(self):
+        """ A signer that can not generate keys fails when it is created
+        """
+        class NoKeySigner(Signer):  # pylint: disable=abstract-method
+            """ Missing generate
+            """
+            algorithm = 'none'
+
+        with self.assertRaises(TypeError):
+            NoKeySigner()
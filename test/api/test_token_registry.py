@@ -0,0 +1,57 @@
+""" Test Token Registry
+"""
+import os
+import tempfile
+import time
+import unittest
+from sample.api.token_registry import SqliteTokenRegistry, TokenRegistry
+
+
+class TestTokenRegistry(unittest.TestCase):
+    """ TokenRegistry Class Test
+    """
+
+    def test_expired_tokens_are_evicted(self):
+        """ Expired entries stop validating and are dropped
+        """
+        registry = TokenRegistry()
+        now = int(time.time())
+        registry.add('old', now - 1)
+        registry.add('new', now + 60)
+        self.assertFalse(registry.is_active('old'))
+        self.assertTrue(registry.is_active('new'))
+        self.assertEqual(len(registry), 1)
+
+    def test_revoke(self):
+        """ Revoked entries stop validating
+        """
+        registry = TokenRegistry()
+        registry.add('jti', int(time.time()) + 60)
+        self.assertTrue(registry.revoke('jti'))
+        self.assertFalse(registry.is_active('jti'))
+        self.assertFalse(registry.revoke('jti'))
+
+
+class TestSqliteTokenRegistry(unittest.TestCase):
+    """ SqliteTokenRegistry Class Test
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'tokens.db')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_shared_between_instances(self):
+        """ Tokens added by one worker validate on another
+        """
+        issuer = SqliteTokenRegistry(self.path)
+        validator = SqliteTokenRegistry(self.path)
+        now = int(time.time())
+        issuer.add('new', now + 60)
+        issuer.add('old', now - 1)
+        self.assertTrue(validator.is_active('new'))
+        self.assertFalse(validator.is_active('old'))
+        self.assertTrue(validator.revoke('new'))
+        self.assertFalse(issuer.is_active('new'))
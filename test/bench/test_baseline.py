@@ -0,0 +1,33 @@
+""" Test benchmark baselines
+"""
+import os
+import tempfile
+import unittest
+from sample.bench import measure
+from sample.bench.baseline import load_results, regressions, save_results
+
+
+class TestBaseline(unittest.TestCase):
+    """ Baseline Test
+    """
+
+    def test_save_and_load(self):
+        """ Results survive a round trip through the JSON file
+        """
+        results = {'noop': measure(lambda: None, 10)}
+        path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        save_results(results, path)
+        self.assertEqual(load_results(path), results)
+
+    def test_regressions(self):
+        """ Only slowdowns above the threshold are reported
+        """
+        baseline = {'fast': {'mean_us': 10.0}, 'slow': {'mean_us': 10.0}}
+        results = {
+            'fast': {'mean_us': 11.0},
+            'slow': {'mean_us': 15.0},
+            'new': {'mean_us': 99.0}
+        }
+        messages = regressions(results, baseline, 0.2)
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0].startswith('slow:'))
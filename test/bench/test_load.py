@@ -0,0 +1,48 @@
+""" Test load generator helpers
+"""
+import unittest
+from sample.bench.histogram import LatencyHistogram
+from sample.bench.load import parse_mix
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """ Histogram Test
+    """
+
+    def test_percentiles(self):
+        """ Percentiles are within the bucket precision
+        """
+        histogram = LatencyHistogram()
+        for latency in range(1, 10001):
+            histogram.record(latency)
+        self.assertEqual(histogram.count, 10000)
+        for percent, expected in ((50, 5000), (90, 9000), (99, 9900)):
+            self.assertAlmostEqual(
+                histogram.percentile(percent), expected, delta=expected * 0.03)
+        self.assertEqual(histogram.percentile(100), 10000)
+
+    def test_merge(self):
+        """ Merged histograms hold every sample
+        """
+        fast, slow = LatencyHistogram(), LatencyHistogram()
+        for _ in range(99):
+            fast.record(100)
+        slow.record(100000)
+        merged = LatencyHistogram().merge([fast, slow])
+        self.assertEqual(merged.count, 100)
+        self.assertAlmostEqual(merged.percentile(50), 100, delta=3)
+        self.assertEqual(merged.summary()['max_ms'], 100)
+
+
+class TestMix(unittest.TestCase):
+    """ Operation Mix Test
+    """
+
+    def test_parse_mix(self):
+        """ Weights are read per operation, unknown operations refused
+        """
+        self.assertEqual(parse_mix('get=3,list'), {'get': 3, 'list': 1})
+        with self.assertRaises(ValueError):
+            parse_mix('get=1,fly=2')
+        with self.assertRaises(ValueError):
+            parse_mix('get=0')
@@ -0,0 +1,87 @@
+""" Test active-only reads and the archival of soft deleted rows
+"""
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy.orm.exc import NoResultFound
+from sample.app import main
+from sample.data import db
+from sample.data.access import (PersonAccess, PersonArchiveAccess,
+                                archive_inactive)
+from sample.data.models import Person, PersonArchive
+
+
+class TestArchive(unittest.TestCase):
+    """ Archive Test
+    """
+
+    def setUp(self):
+        self.application = main(UNIT_TEST=True)
+        self.access = PersonAccess()
+        with self.application.app_context():
+            self.ids = self.access.bulk_create(1, [
+                {'first_name': 'Ada', 'last_name': 'Lovelace'},
+                {'first_name': 'Grace', 'last_name': 'Hopper'},
+                {'first_name': 'Alan', 'last_name': 'Turing'}]).ids
+            self.access.bulk_delete(1, ids=self.ids[1:])
+
+    def age(self, entity_id: int, days: int) -> None:
+        """ Pretends the row was last written days ago
+        """
+        db.session.execute(Person.__table__.update().where(
+            Person.id == entity_id).values(
+                modified_on=datetime.now() - timedelta(days=days)))
+        db.session.commit()
+
+    def test_scoped_reads(self):
+        """ Soft deleted rows are only read when asked for
+        """
+        with self.application.app_context():
+            with self.assertRaises(NoResultFound):
+                self.access.get_values(self.ids[1])
+            self.assertFalse(self.access.get_values(
+                self.ids[1], include_inactive=True)['active'])
+            with self.assertRaises(NoResultFound):
+                self.access.get(self.ids[1])
+            self.assertEqual(
+                [person.id for person in self.access.page(10).items],
+                [1, self.ids[0]])
+            self.assertEqual(len(self.access.page(
+                10, include_inactive=True).items), 4)
+            self.assertEqual(len(self.access.page(
+                10, filters={'active': 'false'}).items), 2)
+            self.assertEqual(len(list(self.access.stream())), 2)
+            self.assertEqual(len(self.access.search(
+                'grace', 10, include_inactive=True).items), 1)
+
+    def test_archive(self):
+        """ Only rows inactive past the retention window move, in batches,
+            and stay readable from the archive
+        """
+        with self.application.app_context():
+            self.age(self.ids[1], 40)
+            self.age(self.ids[2], 40)
+            self.assertEqual(archive_inactive(50), {'person': 0})
+            self.assertEqual(archive_inactive(30, batch_size=1),
+                             {'person': 2})
+            self.assertIsNone(Person.query.get(self.ids[1]))
+            archived = PersonArchiveAccess().get_values(self.ids[1])
+            self.assertEqual(archived['first_name'], 'Grace')
+            self.assertFalse(archived['active'])
+            self.assertIsNotNone(archived['archived_on'])
+            self.assertEqual(self.access.search(
+                'grace', 10, include_inactive=True).items, [])
+            self.assertEqual(archive_inactive(30), {'person': 0})
+
+    def test_referenced_rows_stay(self):
+        """ A person other rows were created or modified by is not moved,
+            the rows after it still are
+        """
+        with self.application.app_context():
+            self.access.bulk_update(self.ids[1], {'middle_name': 'M'},
+                                    ids=[self.ids[0]])
+            self.age(self.ids[1], 40)
+            self.age(self.ids[2], 40)
+            self.assertEqual(archive_inactive(30, batch_size=1),
+                             {'person': 1})
+            self.assertIsNone(PersonArchive.query.get(self.ids[1]))
+            self.assertIsNotNone(PersonArchive.query.get(self.ids[2]))
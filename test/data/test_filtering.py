@@ -0,0 +1,114 @@
+""" Test that collection filters and sorts are answered from indexes
+"""
+import unittest
+from sqlalchemy import event
+from sample.app import main
+from sample.data import db
+from sample.data.access import InvalidFilter, InvalidPage, PersonAccess
+
+
+class TestPersonQueryPlans(unittest.TestCase):
+    """ EXPLAIN QUERY PLAN of the statements PersonAccess.page runs
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(UNIT_TEST=True)
+        cls.access = PersonAccess()
+        with cls.application.app_context():
+            for number in range(3):
+                cls.access.create(1, {
+                    'first_name': f'First {number}',
+                    'last_name': f'Last {number}'})
+        return super().setUpClass()
+
+    def plan(self, **page) -> str:
+        """ Query plan of the SELECT a page is read with
+        """
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=unused-argument,too-many-arguments
+            statements.append((statement, parameters))
+
+        with self.application.app_context():
+            engine = db.get_engine()
+            event.listen(engine, 'before_cursor_execute', capture)
+            try:
+                self.access.page(limit=10, **page)
+            finally:
+                event.remove(engine, 'before_cursor_execute', capture)
+            statement, parameters = [
+                (statement, parameters) for statement, parameters in statements
+                if statement.lstrip().startswith('SELECT')][-1]
+            rows = db.session.connection().execute(
+                f'EXPLAIN QUERY PLAN {statement}', parameters)
+            return ' | '.join(row[-1] for row in rows)
+
+    def test_name_filter(self):
+        """ last_name, with or without first_name, searches the composite,
+            the partial one over active rows unless inactive are included
+        """
+        plan = self.plan(filters={'last_name': 'Last 1'})
+        self.assertIn('last_name_first_name (last_name=?)', plan)
+        plan = self.plan(filters={'last_name': 'Last 1',
+                                  'first_name': 'First 1'})
+        self.assertIn('person_active_last_name_first_name (last_name=? AND '
+                      'first_name=?)', plan)
+        plan = self.plan(filters={'last_name': 'Last 1',
+                                  'first_name': 'First 1'},
+                         include_inactive=True)
+        self.assertIn('USING INDEX person_last_name_first_name (last_name=? '
+                      'AND first_name=?)', plan)
+
+    def test_active_name_sort(self):
+        """ Active rows sorted by name, the default scope or asked for, are
+            read in order from the partial index, without a sort step
+        """
+        for filters in ({}, {'active': 'true'}):
+            with self.application.app_context():
+                after = self.access.page(
+                    limit=1, sort='last_name,first_name',
+                    filters=filters).next_cursor
+            self.assertIsNotNone(after)
+            plan = self.plan(sort='last_name,first_name',
+                             filters=filters, after=after)
+            self.assertIn('USING INDEX person_active_last_name_first_name',
+                          plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_created_on_range(self):
+        """ created_on ranges search person_created_on
+        """
+        plan = self.plan(sort='created_on', filters={
+            'created_on[gte]': '2000-01-01', 'created_on[lt]': '2100-01-01'})
+        self.assertIn('USING INDEX person_created_on (created_on>? AND '
+                      'created_on<?)', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_created_by_filter(self):
+        """ created_by_id searches its index
+        """
+        plan = self.plan(filters={'created_by_id': '1'})
+        self.assertIn('USING INDEX person_created_by_id (created_by_id=?)',
+                      plan)
+
+    def test_descending_sort(self):
+        """ A descending multi-column sort walks the index backwards
+        """
+        plan = self.plan(sort='-last_name,-first_name,-id')
+        self.assertIn('person_active_last_name_first_name', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_rejected(self):
+        """ Filters and sorts that no index backs are refused
+        """
+        with self.application.app_context():
+            for filters in ({'middle_name': 'x'}, {'first_name': 'x'},
+                            {'last_name[gt]': 'x'}, {'active': 'maybe'},
+                            {'created_on': 'not a date'}):
+                with self.assertRaises(InvalidFilter, msg=filters):
+                    self.access.page(limit=1, filters=filters)
+            for sort in ('first_name', 'last_name,-first_name', 'id,last_name',
+                         'last_name,,first_name'):
+                with self.assertRaises(InvalidPage, msg=sort):
+                    self.access.page(limit=1, sort=sort)
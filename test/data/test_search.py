@@ -0,0 +1,154 @@
+""" Test full-text name search
+"""
+import unittest
+from sqlalchemy.dialects import postgresql
+from sample.app import main
+from sample.data import db
+from sample.data.access import PersonAccess
+from sample.data.models import Person
+from sample.data.search import (InvalidSearch, LikeNameSearch, name_search,
+                                search_words)
+
+
+class TestNameSearch(unittest.TestCase):
+    """ Name Search Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(UNIT_TEST=True)
+        cls.access = PersonAccess()
+        with cls.application.app_context():
+            cls.access.bulk_create(1, [
+                {'first_name': 'Ada', 'middle_name': 'King',
+                 'last_name': 'Lovelace'},
+                {'first_name': 'Adam', 'last_name': 'Smith'},
+                {'first_name': 'Zoe', 'last_name': 'Ada'},
+                {'first_name': 'José', 'last_name': 'Álvarez'}])
+        return super().setUpClass()
+
+    def names(self, query: str) -> list:
+        """ First and last names of the first page found for query
+        """
+        with self.application.app_context():
+            return [(person.first_name, person.last_name)
+                    for person in self.access.search(query, 10).items]
+
+    def test_words(self):
+        """ Punctuation is dropped, a query needs a word
+        """
+        self.assertEqual(search_words('Ada, "Lov*'), ['ada', 'lov'])
+        with self.assertRaises(InvalidSearch):
+            search_words(' "* ')
+
+    def test_prefix(self):
+        """ Every word has to start a name, accents are ignored
+        """
+        self.assertEqual(self.names('ada lov'), [('Ada', 'Lovelace')])
+        self.assertEqual(self.names('jose alv'), [('José', 'Álvarez')])
+        self.assertEqual(self.names('a'), [])
+        self.assertEqual(self.names('zzz'), [])
+
+    def test_ranked(self):
+        """ A last name match ranks above a first name match
+        """
+        names = self.names('ada')
+        self.assertEqual(names[0], ('Zoe', 'Ada'))
+        self.assertEqual(len(names), 3)
+
+    def test_paged(self):
+        """ Pages follow each other and stop at max_results
+        """
+        with self.application.app_context():
+            first = self.access.search('ada', 2)
+            second = self.access.search('ada', 2, int(first.next_cursor))
+            capped = self.access.search('ada', 2, max_results=2)
+        self.assertEqual(first.next_cursor, '2')
+        self.assertEqual(len(second.items), 1)
+        self.assertIsNone(second.next_cursor)
+        self.assertIsNone(capped.next_cursor)
+
+    def test_kept_in_sync(self):
+        """ Updates, soft deletes and deletes made by any write path are
+            seen by the next search
+        """
+        with self.application.app_context():
+            ids = self.access.bulk_create(1, [
+                {'first_name': 'Grace', 'last_name': 'Hopper'},
+                {'first_name': 'Grace', 'last_name': 'Kelly'},
+                {'first_name': 'Grace', 'last_name': 'Jones'}]).ids
+            self.access.update(1, ids[0], {'last_name': 'Murray'})
+            self.access.bulk_delete(1, ids=[ids[1]])
+            db.session.execute(
+                Person.__table__.delete().where(Person.id == ids[2]))
+            db.session.commit()
+        self.assertEqual(self.names('grace'), [('Grace', 'Murray')])
+        self.assertEqual(self.names('hopper'), [])
+
+    def test_inactive_outnumber_candidates(self):
+        """ Inactive matches are left out before candidates are cut, and
+            the candidates are the best ranked ones
+        """
+        with self.application.app_context():
+            ids = self.access.bulk_create(1, [
+                {'first_name': 'Jane', 'last_name': 'Quill'}] * 300).ids
+            self.access.bulk_delete(1, ids=ids)
+            self.access.bulk_create(1, [
+                {'first_name': 'John', 'last_name': 'Quill'},
+                {'first_name': 'Quill', 'last_name': 'Jones'}])
+            found = self.access.search('quill', 10, candidates=200,
+                                       max_results=50)
+        self.assertEqual([(person.first_name, person.last_name)
+                          for person in found.items],
+                         [('John', 'Quill'), ('Quill', 'Jones')])
+
+    def test_existing_database(self):
+        """ A database created before the search is indexed at start up,
+            rows already stored included
+        """
+        with self.application.app_context():
+            for name in ('insert', 'delete', 'update'):
+                db.session.execute(f'DROP TRIGGER person_search_{name}')
+            db.session.execute('DROP TABLE person_search')
+            db.session.commit()
+            self.access.bulk_create(1, [
+                {'first_name': 'Hedy', 'last_name': 'Lamarr'}])
+        main(UNIT_TEST=True, SQLALCHEMY_REBUILD=False)
+        self.assertEqual(self.names('lamarr'), [('Hedy', 'Lamarr')])
+        self.assertEqual(self.names('ada lov'), [('Ada', 'Lovelace')])
+        with self.application.app_context():
+            self.access.bulk_create(1, [
+                {'first_name': 'Hedy', 'last_name': 'Kiesler'}])
+        self.assertEqual(self.names('kiesler'), [('Hedy', 'Kiesler')])
+
+    def test_query_plan(self):
+        """ SQLite answers from the FTS5 index
+        """
+        with self.application.app_context():
+            statement, parameters = name_search(
+                'sqlite', Person.__table__, Person.search_columns
+            ).statement(['ada'], 10)
+            plan = ' | '.join(row[-1] for row in db.session.execute(
+                f'EXPLAIN QUERY PLAN {statement}', parameters))
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+
+    def test_other_databases(self):
+        """ Postgres matches the indexed tsvector, others fall back to LIKE
+        """
+        search = name_search(
+            'postgresql', Person.__table__, Person.search_columns)
+        statement, parameters = search.statement(['ada', 'l'], 10)
+        self.assertEqual(parameters['query'], "'ada':* & 'l'")
+        self.assertIn(search.document, str(statement))
+        self.assertIn(search.document, search.create_ddl()[0])
+        statement, _ = search.statement(['ada'], 10, where='person.active')
+        text = str(statement)
+        self.assertLess(text.index('person.active'),
+                        text.index('LIMIT :candidates'))
+        search = name_search(
+            'mysql', Person.__table__, Person.search_columns)
+        self.assertIsInstance(search, LikeNameSearch)
+        statement, _ = search.statement(['ad_a'], 10)
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.assertIn('ILIKE', str(compiled))
+        self.assertIn('ad\\_a%', compiled.params.values())
@@ -0,0 +1,44 @@
+""" Test the SQLite performance profile
+"""
+import unittest
+from sample.app import main
+from sample.data import db
+from sample.data.sqlite import sqlite_profile
+
+
+class TestSqliteProfile(unittest.TestCase):
+    """ SQLite Profile Test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(
+            UNIT_TEST=True,
+            SQLITE_PERFORMANCE_PROFILE=True,
+            SQLITE_BUSY_TIMEOUT=1234,
+            SQLITE_MAINTENANCE_INTERVAL=0)
+        with cls.application.app_context():
+            # Connections opened by earlier tests predate the profile
+            db.get_engine().dispose()
+        return super().setUpClass()
+
+    def pragma(self, name: str):
+        """ Value of a pragma on a pooled connection
+        """
+        with self.application.app_context():
+            return db.session.execute(f'PRAGMA {name}').scalar()
+
+    def test_pragmas(self):
+        """ New connections get the profile
+        """
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+
+    def test_maintenance(self):
+        """ Returning a connection runs maintenance once it is due
+        """
+        before = sqlite_profile.maintenance_runs
+        self.pragma('journal_mode')
+        self.assertGreater(sqlite_profile.maintenance_runs, before)
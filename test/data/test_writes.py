@@ -0,0 +1,86 @@
+""" Test that single entity writes take one statement
+"""
+import unittest
+from sqlalchemy import event
+from sqlalchemy.orm.exc import NoResultFound
+from sample.app import main
+from sample.data import db
+from sample.data.access import InvalidEntity, PersonAccess, StaleEntity
+
+
+class TestPersonWrites(unittest.TestCase):
+    """ Statements PersonAccess sends for create, update and delete
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = main(UNIT_TEST=True)
+        cls.access = PersonAccess()
+        return super().setUpClass()
+
+    def statements(self, write) -> list:
+        """ SQL statements run by write
+        """
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=unused-argument,too-many-arguments
+            statements.append(statement.lstrip().split()[0])
+
+        engine = db.get_engine()
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            write()
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+        return statements
+
+    def test_create(self):
+        """ The created row is returned without reading it back
+        """
+        with self.application.app_context():
+            created = []
+            statements = self.statements(lambda: created.append(
+                self.access.create(1, {'first_name': 'Ada',
+                                       'last_name': 'Lovelace'})))
+            person = created[0]
+            self.assertEqual(statements, ['INSERT'])
+            self.assertIsNotNone(person.id)
+            self.assertTrue(person.active)
+            self.assertEqual(person.created_by_id, 1)
+            stored = self.access.get_values(person.id)
+            self.assertEqual(stored['modified_on'], person.modified_on)
+            with self.assertRaises(InvalidEntity):
+                self.access.create(1, {'first_name': 'Ada'})
+
+    def test_update(self):
+        """ One UPDATE, the If-Match check included
+        """
+        with self.application.app_context():
+            person = self.access.create(
+                1, {'first_name': 'Grace', 'last_name': 'Hopper'})
+            statements = self.statements(lambda: self.access.update(
+                1, person.id, {'middle_name': 'Brewster'},
+                expected_modified_on=person.modified_on))
+            self.assertEqual(statements, ['UPDATE'])
+            self.assertEqual(self.access.get_values(person.id)['middle_name'],
+                             'Brewster')
+            with self.assertRaises(StaleEntity):
+                self.access.update(1, person.id, {'middle_name': 'Murray'},
+                                   expected_modified_on=person.modified_on)
+            with self.assertRaises(NoResultFound):
+                self.access.update(1, 999999, {'middle_name': 'Murray'})
+
+    def test_delete(self):
+        """ One UPDATE deactivates the row
+        """
+        with self.application.app_context():
+            person = self.access.create(
+                1, {'first_name': 'Alan', 'last_name': 'Turing'})
+            statements = self.statements(
+                lambda: self.access.delete(1, person.id))
+            self.assertEqual(statements, ['UPDATE'])
+            self.assertFalse(self.access.get_values(
+                person.id, include_inactive=True)['active'])
+            self.access.delete(1, person.id)
+            with self.assertRaises(NoResultFound):
+                self.access.delete(1, 999999)
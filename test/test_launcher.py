@@ -0,0 +1,94 @@
+""" Test the gunicorn launcher of python -m sample
+"""
+import io
+import unittest
+from unittest import mock
+from sample import settings
+from sample.__main__ import (
+    StandaloneApplication, auto_workers, gunicorn_options)
+
+
+class TestLauncher(unittest.TestCase):
+    """ Launcher Test
+    """
+
+    def test_defaults(self):
+        """ Without arguments the settings are used, the bind has no space
+        """
+        options = gunicorn_options([])
+        self.assertEqual(options['bind'], '127.0.0.1:5000')
+        self.assertEqual(options['workers'], 4)
+        self.assertEqual(options['worker_class'], 'sync')
+        self.assertTrue(options['preload_app'])
+
+    def test_flags(self):
+        """ Flags override settings and are converted
+        """
+        options = gunicorn_options([
+            '--workers=3', '--threads=8', '--worker-class=gthread',
+            '--max-requests=1000', '--max-requests-jitter=50',
+            '--preload-app=false', '--bind=0.0.0.0:8080'])
+        self.assertEqual(options['workers'], 3)
+        self.assertEqual(options['threads'], 8)
+        self.assertEqual(options['worker_class'], 'gthread')
+        self.assertEqual(options['max_requests_jitter'], 50)
+        self.assertFalse(options['preload_app'])
+        self.assertEqual(options['bind'], '0.0.0.0:8080')
+        self.assertEqual(gunicorn_options(['--archive'])['workers'], 4)
+
+    def test_auto_workers(self):
+        """ auto sizes workers from the CPU count
+        """
+        with mock.patch('sample.__main__.cpu_count', return_value=4):
+            self.assertEqual(auto_workers('sync'), 9)
+            self.assertEqual(auto_workers('gthread'), 4)
+            options = gunicorn_options(['--workers=auto'])
+        self.assertEqual(options['workers'], 9)
+
+    def test_invalid(self):
+        """ Bad values exit with their code
+        """
+        cases = {
+            '--workers=0': -6,
+            '--workers=many': -6,
+            '--bind=127.0.0. 1:5000': -5,
+            '--worker-class=eventlet': -8,
+            '--timeout=-1': -14,
+            '--preload-app=maybe': -15,
+            '--unknown=1': -16,
+        }
+        for argument, code in cases.items():
+            with self.assertRaises(SystemExit) as context, \
+                    mock.patch('sys.stderr'):
+                gunicorn_options([argument])
+            self.assertEqual(context.exception.code, code, argument)
+
+    def test_replica_warning(self):
+        """ Several workers with replicas warn when write marks stay in
+            each worker
+        """
+        with mock.patch.object(settings, 'SQLALCHEMY_REPLICA_URIS',
+                               ['sqlite:///replica.db']), \
+                mock.patch.object(settings, 'DATABASE_WRITE_MARKS', 'memory'), \
+                mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            gunicorn_options(['--workers=2'])
+            gunicorn_options(['--workers=1'])
+        self.assertEqual(
+            stderr.getvalue().count('DATABASE_WRITE_MARKS=memory'), 1)
+        with mock.patch.object(settings, 'SQLALCHEMY_REPLICA_URIS',
+                               ['sqlite:///replica.db']), \
+                mock.patch.object(settings, 'DATABASE_WRITE_MARKS', 'sqlite'), \
+                mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            gunicorn_options(['--workers=2'])
+        self.assertNotIn('DATABASE_WRITE_MARKS', stderr.getvalue())
+
+    def test_load_config(self):
+        """ Options are handed to gunicorn's config, unknown ones refused
+        """
+        application = StandaloneApplication(
+            None, gunicorn_options(['--workers=2', '--keepalive=7']))
+        self.assertEqual(application.cfg.workers, 2)
+        self.assertEqual(application.cfg.keepalive, 7)
+        # gunicorn reports configuration errors and exits
+        with self.assertRaises(SystemExit), mock.patch('sys.stderr'):
+            StandaloneApplication(None, {'no_such_option': 1})
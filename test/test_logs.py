@@ -0,0 +1,65 @@
+""" Test the logging pipeline
+"""
+import json
+import logging
+import queue
+import unittest
+from sample.logs import BoundedQueueHandler, JsonFormatter, SamplingFilter
+from sample.settings import get_logger
+
+
+def make_record(name: str = 'sample.test', level: int = logging.INFO,
+                message: str = 'hello %s', args=('world',), **extra):
+    """ LogRecord as a logger would build it
+    """
+    record = logging.getLogger(name).makeRecord(
+        name, level, __file__, 1, message, args, None, extra=extra)
+    return record
+
+
+class TestLogs(unittest.TestCase):
+    """ Logging Test
+    """
+
+    def test_get_logger_adds_no_handlers(self):
+        """ Repeated calls share the single root handler
+        """
+        get_logger('sample.test')
+        handlers = list(logging.getLogger().handlers)
+        logger = get_logger('sample.test')
+        get_logger('sample.other')
+        self.assertEqual(logging.getLogger().handlers, handlers)
+        self.assertEqual(len([handler for handler in handlers if isinstance(
+            handler, BoundedQueueHandler)]), 1)
+        self.assertEqual(logger.handlers, [])
+
+    def test_json_lines(self):
+        """ Records become one JSON document with their extra fields
+        """
+        document = json.loads(JsonFormatter().format(
+            make_record(request_id=7)))
+        self.assertEqual(document['message'], 'hello world')
+        self.assertEqual(document['logger'], 'sample.test')
+        self.assertEqual(document['level'], 'INFO')
+        self.assertEqual(document['request_id'], 7)
+
+    def test_sampling(self):
+        """ Sampled loggers and their children drop records below WARNING
+        """
+        sampling = SamplingFilter({'sample.hot': 0.0})
+        self.assertFalse(sampling.filter(make_record('sample.hot')))
+        self.assertFalse(sampling.filter(make_record('sample.hot.path')))
+        self.assertTrue(sampling.filter(
+            make_record('sample.hot', logging.WARNING)))
+        self.assertTrue(sampling.filter(make_record('sample.cold')))
+
+    def test_full_queue_drops(self):
+        """ A full queue drops records instead of blocking the caller
+        """
+        handler = BoundedQueueHandler(queue.Queue(1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+        self.assertEqual(handler.dropped, 1)
+        queued = handler.queue.get_nowait()
+        self.assertEqual(queued.msg, 'hello world')
+        self.assertIsNone(queued.args)